@@ -27,18 +27,59 @@ def create_gpio_config_template():
         "arduino": {
             "port": "COM7",
             "baudrate": 9600,
-            "timeout": 1
+            "timeout": 1,
+            "protocol": "auto"
         },
+        "devices": [],
         "volume": {
             "enabled": True,
-            "default_value": 0
+            "default_value": 0,
+            "backend": "keypress",
+            "coalesce_ms": 30
         },
         "media": {
             "enabled": True
         },
+        "buttons": {
+            "count": 9
+        },
+        "actions": {
+            "max_workers": 4,
+            "max_in_flight": 16
+        },
+        "input": {
+            "backend": "auto"
+        },
+        "reconnect": {
+            "initial_delay_ms": 100,
+            "max_delay_ms": 500
+        },
+        "debounce": {
+            "min_interval_ms": 50,
+            "edge": "leading",
+            "max_per_second": 0,
+            "commands": {}
+        },
+        "gestures": {
+            "long_press_ms": 500,
+            "double_press_ms": 250,
+            "chord_ms": 80,
+            "repeat_ms": 300
+        },
+        "profiles": {
+            "auto_switch": False,
+            "apps": {}
+        },
+        "launcher": {
+            "helper": False
+        },
+        "http": {
+            "timeout_ms": 2000,
+            "pool_size": 4
+        },
         "debug": {
             "enabled": True,
-            "log_level": "INFO"
+            "log_level": "DEBUG"
         }
     }
     
@@ -215,7 +256,7 @@ begin
       '    },\\n' +
       '    "debug": {\\n' +
       '        "enabled": true,\\n' +
-      '        "log_level": "INFO"\\n' +
+      '        "log_level": "DEBUG"\\n' +
       '    }\\n' +
       '}';
     
@@ -276,7 +317,7 @@ echo         "enabled": true>> "%INSTALL_DIR%\\gpio_config.json"
 echo     },>> "%INSTALL_DIR%\\gpio_config.json"
 echo     "debug": {>> "%INSTALL_DIR%\\gpio_config.json"
 echo         "enabled": true,>> "%INSTALL_DIR%\\gpio_config.json"
-echo         "log_level": "INFO">> "%INSTALL_DIR%\\gpio_config.json"
+echo         "log_level": "DEBUG">> "%INSTALL_DIR%\\gpio_config.json"
 echo     }>> "%INSTALL_DIR%\\gpio_config.json"
 echo }>> "%INSTALL_DIR%\\gpio_config.json"
 
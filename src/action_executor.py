@@ -0,0 +1,108 @@
+"""
+Action executor for StreamDeck
+按钮动作线程池
+
+Button actions (opening a browser, launching an exe) can block for hundreds
+of milliseconds. They run here on a small pool of worker threads so the
+serial thread only has to enqueue them and can go straight back to reading.
+
+Each key has its own FIFO and runs on at most one worker at a time, so
+presses of the same button always run in the order they arrived. Keys with
+work waiting go through one shared ready queue that every idle worker takes
+from, so a slow action only holds up later presses of its own button.
+submit() never blocks: when too many actions are already in flight, new
+ones are dropped with a warning instead of stalling the caller.
+"""
+
+import collections
+import queue
+import threading
+
+from app_logging import get_logger
+
+log = get_logger("ACTION")
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_IN_FLIGHT = 16
+
+_STOP = object()
+
+
+class ActionExecutor:
+    """Bounded thread pool with per-key ordering"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT, name="action"):
+        self.max_workers = max(1, int(max_workers))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.in_flight = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> deque of (func, args); present while the key is queued or running
+        self._ready = queue.SimpleQueue()  # Keys whose next action may run
+        self._closing = False
+        self._threads = []
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._worker, name=f"{name}-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, func, *args):
+        """Queue func(*args) behind earlier actions of key; returns False if it was dropped"""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.dropped += 1
+                log.warning("%s actions in flight, dropping action for %s", self.in_flight, key)
+                return False
+            self.in_flight += 1
+            actions = self._pending.get(key)
+            if actions is not None:
+                # Queued or running: the worker finishing it hands the key back to the ready queue
+                actions.append((func, args))
+                return True
+            self._pending[key] = collections.deque([(func, args)])
+        self._ready.put(key)
+        return True
+
+    def _worker(self):
+        while True:
+            key = self._ready.get()
+            if key is _STOP:
+                return
+            with self._lock:
+                func, args = self._pending[key].popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                log.error("Action for %s failed: %s", key, e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    if self._pending[key]:
+                        self._ready.put(key)
+                    else:
+                        del self._pending[key]
+                        if self._closing and not self._pending:
+                            self._stop_workers()
+
+    def _stop_workers(self):
+        # Caller holds _lock
+        for _ in self._threads:
+            self._ready.put(_STOP)
+
+    def shutdown(self):
+        """Let the workers finish what is already queued, then exit"""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            if not self._pending:
+                self._stop_workers()
+
+    def get_stats(self):
+        """Current load (for debugging/status)"""
+        return {
+            "max_workers": self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,171 @@
+"""
+Logging for StreamDeck
+日志系统（后台队列 + 滚动文件）
+
+All modules log through loggers named "streamdeck.<TAG>". Records are put
+on a queue as-is and formatted on a background thread, so a log call on the
+serial thread costs one level check when the level is disabled and one
+queue put when it is enabled; no string is built and no I/O happens on the
+caller's thread.
+
+The background listener writes to the console (when there is one - a
+windowed PyInstaller build has no stdout) in the familiar "[GPIO] ..." /
+"[GPIO ERROR] ..." form, and to a rotating streamdeck.log next to the app
+once configure_logging() is given a log file.
+
+Debug output that needs work just to build its arguments (stat calls,
+JSON dumps, parsed versions) is guarded by the shared DEBUG switch:
+
+    from app_logging import get_logger, DEBUG
+    log = get_logger("ICON")
+    ...
+    if DEBUG.enabled:
+        log.debug("Icon file size: %s bytes", os.path.getsize(path))
+
+so with debug off such a statement is one attribute read. The switch
+follows the log level and can be flipped at runtime (tray menu).
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FILE_NAME = "streamdeck.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+_root = logging.getLogger("streamdeck")
+_root.propagate = False
+_queue = queue.SimpleQueue()
+_handlers = []
+_listener = None
+_log_file = None
+_level = logging.INFO  # Level to return to when debug is switched off
+
+
+class DebugSwitch:
+    """Shared flag every module imports once; enabled while DEBUG records are logged"""
+
+    __slots__ = ("enabled",)
+
+    def __init__(self):
+        self.enabled = False
+
+    def __bool__(self):
+        return self.enabled
+
+
+DEBUG = DebugSwitch()
+
+
+class TaggedFormatter(logging.Formatter):
+    """[TAG] message, [TAG LEVEL] for anything but INFO"""
+
+    def __init__(self, timestamps=False):
+        super().__init__()
+        self.timestamps = timestamps
+
+    def format(self, record):
+        tag = record.name.rpartition(".")[2]
+        if record.levelno != logging.INFO:
+            tag = f"{tag} {record.levelname}"
+        line = f"[{tag}] {record.getMessage()}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        if self.timestamps:
+            line = f"{self.formatTime(record)} {line}"
+        return line
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues the record untouched; message formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def _restart_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(_queue, *_handlers)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def parse_level(level):
+    """Level name ("debug", "INFO", ...) or number to a logging level, INFO if unknown"""
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level).upper(), logging.INFO)
+
+
+def set_level(level):
+    global _level
+    level = parse_level(level)
+    if level > logging.DEBUG:
+        _level = level
+    _root.setLevel(level)
+    DEBUG.enabled = level <= logging.DEBUG
+
+
+def set_debug(enabled):
+    """Switch debug output on, or back to the configured level"""
+    _root.setLevel(logging.DEBUG if enabled else _level)
+    DEBUG.enabled = bool(enabled)
+
+
+def configure_logging(level=None, log_file=None, console=True):
+    """Start the background log writer (safe to call again to change level or add the file)"""
+    global _log_file
+    if level is not None:
+        set_level(level)
+    changed = False
+    if not _root.handlers:
+        _root.addHandler(DeferredQueueHandler(_queue))
+        if console and sys.stdout is not None:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(TaggedFormatter())
+            _handlers.append(console_handler)
+        atexit.register(_stop_listener)
+        changed = True
+    if log_file and log_file != _log_file:
+        try:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                encoding="utf-8", delay=True)
+            file_handler.setFormatter(TaggedFormatter(timestamps=True))
+            _handlers[:] = [h for h in _handlers
+                            if not isinstance(h, logging.handlers.RotatingFileHandler)] + [file_handler]
+            _log_file = log_file
+            changed = True
+        except OSError as e:
+            print(f"[LOG WARNING] Cannot write log file {log_file}: {e}")
+    if changed:
+        _restart_listener()
+
+
+def default_log_file(directory):
+    return os.path.join(directory, LOG_FILE_NAME)
+
+
+def get_logger(tag):
+    """Logger for a module; logs to the console until configure_logging() adds more"""
+    if not _root.handlers:
+        configure_logging(level=logging.INFO)
+    return logging.getLogger(f"streamdeck.{tag}")
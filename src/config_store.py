@@ -0,0 +1,335 @@
+"""
+Config store for StreamDeck
+统一配置存储（一次读取、校验、缓存、变更通知）
+
+gpio_config.json, update_config.json and the button profiles are each
+registered once as a ConfigFile with their defaults, a validator and the
+typed object handed out for them (GpioSettings for gpio_config.json, a
+read-only mapping for a button profile). Every subsystem loads through the
+same ConfigFile, so a file is read and parsed once and all of them share
+the parsed object:
+
+- load() costs one os.stat while the file is unchanged; the file is read
+  again only when (st_mtime_ns, st_size, st_ino) changes, and an invalid
+  file is reported and the last good config kept
+- edit() is a private, mutable copy for dialogs to change and save()
+- save() validates, hands the new config to readers at once and writes the
+  file atomically, now or coalesced delay_ms later
+- subscribe(callback) is told about every change, from our own saves and
+  from edits on disk that a load() picked up
+
+load_all() reads every registered file in one pass at startup; queued
+saves are written at exit.
+"""
+
+import atexit
+import copy
+import json
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+from app_logging import get_logger, DEBUG
+from timer_scheduler import TimerScheduler
+
+log = get_logger("CONFIG")
+
+REPLACE_ATTEMPTS = 5
+
+
+def get_app_data_dir():
+    """Get the directory where the application should store its data files"""
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        # Running as script
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+    return app_dir
+
+
+def write_file_atomic(path, data, fsync=True):
+    """Replace path with data (bytes) so readers see the old or the new file, never a partial one
+
+    The data goes to a temporary file in the same directory that is then
+    os.replace()d over the target. With fsync the file, and on POSIX its
+    directory, are flushed to disk so the new file also survives a power
+    loss.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    temp_file = path + ".tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_file, path)
+                break
+            except PermissionError:
+                # Windows refuses while another program (a watcher, an editor) has the file open
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.02)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+    if fsync and os.name == "posix":
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _stat_key(path):
+    # The inode catches atomic replaces and the size/ns mtime quick edits within one coarse mtime tick
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+_save_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def _scheduler():
+    global _save_scheduler
+    with _scheduler_lock:
+        if _save_scheduler is None:
+            _save_scheduler = TimerScheduler("config-save")
+        return _save_scheduler
+
+
+class ConfigFile:
+    """One JSON config file: defaults, validation, a cached typed view and atomic saves
+
+    defaults: used (and with create=True written) while the file is missing
+    validate(data): raises ValueError for a config that must not be used
+    view(data): the object load() hands out, built once per change
+    merge_defaults: top-level keys missing from the file come from defaults
+    """
+
+    def __init__(self, path, defaults=None, validate=None, view=MappingProxyType,
+                 merge_defaults=False, create=False, indent=4, fsync=True):
+        self.path = path
+        self.defaults = defaults
+        self.validate = validate
+        self.view = view
+        self.merge_defaults = merge_defaults
+        self.create = create
+        self.indent = indent
+        self.fsync = fsync
+        self._key = None        # (st_mtime_ns, st_size, st_ino) of the file _data was read from
+        self._data = None       # Parsed config (never handed out)
+        self._view = None
+        self._staged = None     # Saved config not yet written; load() returns it meanwhile
+        self.error = None       # Why the file was last rejected, None while its config is in use
+        self._timer = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def load(self):
+        """Typed view of the config; one os.stat while the file is unchanged"""
+        key = _stat_key(self.path)
+        with self._lock:
+            if self._staged is not None or (key is not None and key == self._key):
+                return self._view
+        return self._refresh(key)
+
+    def edit(self):
+        """Mutable copy of the config, to change and save()"""
+        self.load()
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    def subscribe(self, callback):
+        """Call callback(view) whenever the config changes"""
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        """Forget the cached file state, so the next load() reads the file"""
+        with self._lock:
+            if self._staged is None:
+                self._key = None
+
+    def _default_data(self):
+        return copy.deepcopy(self.defaults) if self.defaults is not None else {}
+
+    def _read(self):
+        with open(self.path, "rb") as f:
+            data = json.loads(f.read().decode("utf-8"))
+        if self.merge_defaults and isinstance(data, dict) and self.defaults is not None:
+            data = {**copy.deepcopy(self.defaults), **data}
+        if self.validate is not None:
+            self.validate(data)
+        return data
+
+    def _refresh(self, key):
+        name = os.path.basename(self.path)
+        error = None
+        if key is None:
+            data = self._default_data()
+            if self.create:
+                try:
+                    write_file_atomic(self.path, self._encode(data), fsync=self.fsync)
+                    key = _stat_key(self.path)
+                    log.info("Created default configuration file: %s", self.path)
+                except OSError as e:
+                    log.error("Failed to create %s: %s", self.path, e)
+            elif DEBUG.enabled:
+                log.debug("%s not found, using defaults", name)
+        else:
+            try:
+                data = self._read()
+                view = self.view(data)
+            except (OSError, ValueError, TypeError, UnicodeDecodeError) as e:
+                log.error("Ignoring invalid %s: %s", name, e)
+                error = str(e)
+                with self._lock:
+                    self.error = error
+                    if self._view is not None:
+                        self._key = key  # Reported once; the last good config stays in use
+                        return self._view
+                data = self._default_data()
+            else:
+                return self._publish(key, data, view)
+            if DEBUG.enabled:
+                log.debug("Using default configuration for %s", name)
+        return self._publish(key, data, self.view(data), error)
+
+    def _publish(self, key, data, view, error=None):
+        with self._lock:
+            if self._staged is not None:
+                return self._view  # A save won the race; it is newer than the file
+            changed = self._data is not None and data != self._data
+            self._key, self._data, self._view = key, data, view
+            self.error = error
+        if DEBUG.enabled and key is not None:
+            log.debug("Loaded %s", self.path)
+        if changed:
+            self._notify(view)
+        return view
+
+    def save(self, data, delay_ms=0):
+        """Validate data, hand it to readers and write the file
+
+        With delay_ms the write happens delay_ms after the last save of a
+        burst, so repeated saves cost one write. Raises ValueError for an
+        invalid config; returns False if an immediate write failed.
+        """
+        data = copy.deepcopy(data)
+        if self.validate is not None:
+            self.validate(data)
+        view = self.view(data)
+        with self._lock:
+            changed = data != self._data
+            self._data, self._view, self._staged = data, view, data
+            self.error = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if delay_ms:
+                self._timer = _scheduler().call_later(delay_ms / 1000.0, self.flush)
+        if changed:
+            self._notify(view)
+        if delay_ms:
+            if DEBUG.enabled:
+                log.debug("Save of %s queued, written in %s ms", self.path, delay_ms)
+            return True
+        return self.flush()
+
+    def flush(self):
+        """Write a queued save now; returns False if the write failed"""
+        # One writer at a time, so an older config can never land on disk after a newer one
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                data = self._staged
+            if data is None:
+                return True
+            try:
+                write_file_atomic(self.path, self._encode(data), fsync=self.fsync)
+                key = _stat_key(self.path)
+            except Exception as e:
+                log.error("Failed to save %s: %s", self.path, e)
+                with self._lock:
+                    if self._staged is data:
+                        # Readers go back to what is on disk
+                        self._staged = None
+                        self._key = None
+                return False
+            with self._lock:
+                if self._staged is data:
+                    # What we just wrote is the config for the file as it is now
+                    self._staged = None
+                    self._key = key
+        log.debug("Configuration saved to %s", self.path)
+        return True
+
+    def _encode(self, data):
+        return json.dumps(data, indent=self.indent, ensure_ascii=False).encode("utf-8")
+
+    def _notify(self, view):
+        for callback in list(self._listeners):
+            try:
+                callback(view)
+            except Exception as e:
+                log.error("Config change handler for %s failed: %s", os.path.basename(self.path), e)
+
+
+class ConfigStore:
+    """The app's config files by name"""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, **options):
+        """The ConfigFile registered as name, created on first use (options as for ConfigFile)
+
+        Registering a name again returns the existing file, unless its path
+        changed, in which case the new path replaces it.
+        """
+        with self._lock:
+            config_file = self._files.get(name)
+            if config_file is None or config_file.path != path:
+                config_file = self._files[name] = ConfigFile(path, **options)
+            return config_file
+
+    def get(self, name):
+        return self._files[name]
+
+    def load(self, name):
+        """Typed view of a registered config"""
+        return self._files[name].load()
+
+    def load_all(self):
+        """Read every registered file (one pass of I/O at startup)"""
+        with self._lock:
+            files = list(self._files.values())
+        for config_file in files:
+            config_file.load()
+
+    def flush_all(self):
+        """Write every queued save now (also run at exit)"""
+        with self._lock:
+            files = list(self._files.values())
+        for config_file in files:
+            config_file.flush()
+
+
+store = ConfigStore()
+atexit.register(store.flush_all)
@@ -0,0 +1,251 @@
+"""
+Config file watcher for StreamDeck
+配置文件变更监听
+
+Watches pref.json and gpio_config.json so edits made by scripts, editors
+or other tools are applied without a restart, not only saves from our own
+dialogs.
+
+The directory holding the files is watched (editors and atomic saves
+replace the file instead of writing it in place) with:
+- inotify on Linux
+- ReadDirectoryChangesW on Windows
+- polling st_mtime_ns/st_size everywhere else, or if the native API fails
+
+Bursts of events (truncate + write + rename) are debounced, the new file is
+parsed and validated, and only a valid, actually changed file reaches the
+callback. A broken file is reported and ignored, so the running config
+stays in place until the file is fixed.
+"""
+
+import ctypes
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("WATCH")
+
+DEFAULT_DEBOUNCE_MS = 200
+POLL_INTERVAL = 1.0
+
+
+class InotifyBackend:
+    """Linux inotify on the watched directory"""
+
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def run(self, emit, stopped):
+        import select
+        while not stopped.is_set():
+            if not select.select([self._fd], [], [], 0.5)[0]:
+                continue
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset + self._EVENT.size <= len(data):
+                _, _, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name:
+                    emit(os.fsdecode(name))
+        os.close(self._fd)
+
+
+class ReadDirectoryChangesBackend:
+    """Windows ReadDirectoryChangesW on the watched directory"""
+
+    name = "ReadDirectoryChangesW"
+
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_ALL = 0x00000007
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    _HEADER = struct.Struct("<III")  # NextEntryOffset, Action, FileNameLength
+
+    def __init__(self, directory):
+        from ctypes import wintypes
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._kernel32.CreateFileW.restype = wintypes.HANDLE
+        self._kernel32.ReadDirectoryChangesW.argtypes = [
+            wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+            ctypes.POINTER(wintypes.DWORD), ctypes.c_void_p, ctypes.c_void_p]
+        self._handle = self._kernel32.CreateFileW(
+            directory, self.FILE_LIST_DIRECTORY, self.FILE_SHARE_ALL, None,
+            self.OPEN_EXISTING, self.FILE_FLAG_BACKUP_SEMANTICS, None)
+        if self._handle in (None, wintypes.HANDLE(-1).value):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def run(self, emit, stopped):
+        from ctypes import wintypes
+        buffer = ctypes.create_string_buffer(8192)
+        returned = wintypes.DWORD()
+        flags = (self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_SIZE
+                 | self.FILE_NOTIFY_CHANGE_LAST_WRITE)
+        while not stopped.is_set():
+            # Blocks until something in the directory changes (the thread is a daemon)
+            if not self._kernel32.ReadDirectoryChangesW(self._handle, buffer, len(buffer), False,
+                                                        flags, ctypes.byref(returned), None, None):
+                raise ctypes.WinError(ctypes.get_last_error())
+            data = buffer.raw[:returned.value]
+            offset = 0
+            while offset + self._HEADER.size <= len(data):
+                next_offset, _, length = self._HEADER.unpack_from(data, offset)
+                start = offset + self._HEADER.size
+                emit(data[start:start + length].decode("utf-16-le"))
+                if not next_offset:
+                    break
+                offset += next_offset
+        self._kernel32.CloseHandle(self._handle)
+
+
+class PollingBackend:
+    """Portable fallback: compare st_mtime_ns and st_size of the files"""
+
+    name = "polling"
+
+    def __init__(self, directory, names, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.names = names
+        self.interval = interval
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def run(self, emit, stopped):
+        last = {name: self._stat(name) for name in self.names}
+        while not stopped.wait(self.interval):
+            for name in self.names:
+                current = self._stat(name)
+                if current != last[name]:
+                    last[name] = current
+                    emit(name)
+
+
+def create_backend(directory, names):
+    """Native backend for this platform, polling if it is unavailable"""
+    try:
+        if sys.platform.startswith("linux"):
+            return InotifyBackend(directory)
+        if sys.platform == "win32":
+            return ReadDirectoryChangesBackend(directory)
+    except Exception as e:
+        log.warning("Native file watching unavailable (%s), polling instead", e)
+    return PollingBackend(directory, names)
+
+
+class ConfigWatcher:
+    """Watches config files in one directory and reports valid changes
+
+    watch(path, validate, callback): validate(data) raises ValueError for a
+    config that must not be applied; callback(data) runs on the watcher
+    thread with the parsed JSON.
+    """
+
+    def __init__(self, directory, debounce_ms=DEFAULT_DEBOUNCE_MS):
+        self.directory = directory
+        self.debounce = debounce_ms / 1000.0
+        self.backend = None
+        self._files = {}      # file name -> (validate, callback)
+        self._contents = {}   # file name -> raw bytes last seen
+        self._events = queue.SimpleQueue()
+        self._stopped = threading.Event()
+
+    def watch(self, path, validate, callback):
+        name = os.path.basename(path)
+        self._files[name] = (validate, callback)
+        self._contents[name] = self._read(name)
+
+    def start(self):
+        self.backend = create_backend(self.directory, list(self._files))
+        threading.Thread(target=self._run_backend, name="config-watch", daemon=True).start()
+        threading.Thread(target=self._run_debounce, name="config-debounce", daemon=True).start()
+        log.info("Watching %s (%s)", ', '.join(sorted(self._files)), self.backend.name)
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run_backend(self):
+        try:
+            self.backend.run(self._events.put, self._stopped)
+        except Exception as e:
+            if self._stopped.is_set():
+                return
+            log.warning("%s watcher failed (%s), polling instead", self.backend.name, e)
+            self.backend = PollingBackend(self.directory, list(self._files))
+            self.backend.run(self._events.put, self._stopped)
+
+    def _run_debounce(self):
+        pending = {}  # file name -> time to process it
+        while not self._stopped.is_set():
+            timeout = max(0.0, min(pending.values()) - time.perf_counter()) if pending else None
+            try:
+                name = self._events.get(timeout=timeout)
+                if name in self._files:
+                    # Every new event pushes the deadline back until writes settle
+                    pending[name] = time.perf_counter() + self.debounce
+            except queue.Empty:
+                pass
+            now = time.perf_counter()
+            for name in [name for name, due in pending.items() if due <= now]:
+                del pending[name]
+                self._process(name)
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _process(self, name):
+        raw = self._read(name)
+        if raw is None or raw == self._contents.get(name):
+            return  # Deleted (mid-replace) or touched without changes
+        validate, callback = self._files[name]
+        try:
+            data = json.loads(raw.decode("utf-8"))
+            validate(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            log.error("Ignoring invalid %s: %s", name, e)
+            return
+        self._contents[name] = raw
+        log.info("%s changed on disk", name)
+        try:
+            callback(data)
+        except Exception as e:
+            log.error("Failed to apply %s: %s", name, e)
@@ -2,12 +2,113 @@
 #define DT 4
 #define SW 3
 
+// Binary frame protocol (see serial_protocol.py on the host side)
+// Frame: SYNC, OPCODE, PAYLOAD..., CRC8(OPCODE + PAYLOAD)
+#define FRAME_SYNC 0xA5
+#define OP_MUTE 0x01
+#define OP_MEDIA 0x02
+#define OP_VOLUME 0x03
+#define OP_RELEASE 0x04
+#define OP_HELLO 0x7F
+#define OP_BUTTON 0x80
+#define PROTOCOL_VERSION 2
+
 const int buttonPins[] = {A1, A2, A0, 11, 10, 9, 2, 6, 7, 8};  // ultimi = MEDIA
 
+// Buttons report press and release edges (BUTTON_n / RELEASE_n) so the host
+// can tell short, long and double presses apart
+#define BUTTON_DEBOUNCE_MS 20
+bool buttonDown[10];
+unsigned long buttonChangedAt[10];
+
 int counter = 0;
 int currentStateCLK;
 int lastStateCLK;
 
+// Text lines until the host asks for binary frames
+bool binaryMode = false;
+char commandBuffer[16];
+byte commandLength = 0;
+
+byte crc8(const byte *data, byte length) {
+  byte crc = 0;
+  for (byte i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (byte bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void sendFrame(byte opcode, const byte *payload, byte length) {
+  byte frame[6];
+  frame[0] = FRAME_SYNC;
+  frame[1] = opcode;
+  for (byte i = 0; i < length; i++) {
+    frame[2 + i] = payload[i];
+  }
+  frame[2 + length] = crc8(frame + 1, length + 1);
+  Serial.write(frame, length + 3);
+}
+
+// Host commands: "PROTO_BINARY" switches to frames, "PROTO_TEXT" switches back
+void readHostCommands() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      commandBuffer[commandLength] = '\0';
+      if (strcmp(commandBuffer, "PROTO_BINARY") == 0) {
+        binaryMode = true;
+        byte version = PROTOCOL_VERSION;
+        sendFrame(OP_HELLO, &version, 1);
+      } else if (strcmp(commandBuffer, "PROTO_TEXT") == 0) {
+        binaryMode = false;
+      }
+      commandLength = 0;
+    } else if (commandLength < sizeof(commandBuffer) - 1) {
+      commandBuffer[commandLength++] = c;
+    }
+  }
+}
+
+void sendVolume(int value) {
+  if (binaryMode) {
+    byte payload[2] = {(byte)(value >> 8), (byte)(value & 0xFF)};
+    sendFrame(OP_VOLUME, payload, 2);
+  } else {
+    Serial.print("VOLUME_");
+    Serial.println(value);
+  }
+}
+
+void sendButton(int number) {
+  if (binaryMode) {
+    sendFrame(OP_BUTTON | number, NULL, 0);
+  } else {
+    Serial.print("BUTTON_");
+    Serial.println(number);
+  }
+}
+
+void sendRelease(int number) {
+  if (binaryMode) {
+    byte payload = number;
+    sendFrame(OP_RELEASE, &payload, 1);
+  } else {
+    Serial.print("RELEASE_");
+    Serial.println(number);
+  }
+}
+
+void sendCommand(byte opcode, const char *text) {
+  if (binaryMode) {
+    sendFrame(opcode, NULL, 0);
+  } else {
+    Serial.println(text);
+  }
+}
+
 void setup() {
   Serial.begin(9600);
 
@@ -24,6 +125,8 @@ void setup() {
 }
 
 void loop() {
+  readHostCommands();
+
   // Encoder rotazione
   currentStateCLK = digitalRead(CLK);
   if (currentStateCLK != lastStateCLK) {
@@ -32,27 +135,33 @@ void loop() {
     } else {
       counter--;
     }
-    Serial.print("VOLUME_");
-    Serial.println(counter);
+    sendVolume(counter);
   }
   lastStateCLK = currentStateCLK;
 
   // Pulsante encoder = MUTE
   if (digitalRead(SW) == LOW) {
-    Serial.println("MUTE");
+    sendCommand(OP_MUTE, "MUTE");
     delay(200); // debounce
   }
 
   // Pulsanti utente
+  unsigned long now = millis();
   for (int i = 0; i < 10; i++) {
-    if (digitalRead(buttonPins[i]) == LOW) {
-      if (i < 9) {
-        Serial.print("BUTTON_");
-        Serial.println(i + 1);
+    bool down = digitalRead(buttonPins[i]) == LOW;
+    if (down == buttonDown[i] || now - buttonChangedAt[i] < BUTTON_DEBOUNCE_MS) {
+      continue;
+    }
+    buttonDown[i] = down;
+    buttonChangedAt[i] = now;
+    if (i < 9) {
+      if (down) {
+        sendButton(i + 1);
       } else {
-        Serial.println("MEDIA");
+        sendRelease(i + 1);
       }
-      delay(200); // debounce
+    } else if (down) {
+      sendCommand(OP_MEDIA, "MEDIA");
     }
   }
 }
@@ -0,0 +1,101 @@
+"""
+Event limiter for StreamDeck
+按钮去抖与限速
+
+Cheap push buttons bounce: one press can arrive as BUTTON_3 two or three
+times within a few milliseconds, and each copy would launch the exe again.
+Every bound command gets an EventLimiter in the dispatch table, so the
+extra copies are dropped on the serial thread before anything is queued.
+
+- "leading" edge: the first event fires at once, further events are
+  dropped until the command has been quiet for min_interval_ms
+- "trailing" edge: each event restarts the quiet period and only the last
+  one fires, min_interval_ms after it (scheduled on the TimerScheduler)
+- max_per_second: token bucket on top of the debounce (0 = unlimited)
+
+submit() runs on the serial thread and trailing events fire on the timer
+thread, so the limiter state is updated under a lock; fire() itself is
+called outside it.
+"""
+
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("GPIO")
+
+DEFAULT_MIN_INTERVAL_MS = 50
+DEFAULT_EDGE = "leading"
+DEFAULT_MAX_PER_SECOND = 0
+EDGES = ("leading", "trailing")
+
+
+class EventLimiter:
+    """Debounce plus rate limit for one command"""
+
+    __slots__ = ("key", "interval", "trailing", "rate", "capacity", "tokens", "refilled_at",
+                 "last_event", "pending", "scheduler", "dropped", "_lock")
+
+    def __init__(self, key, min_interval_ms=DEFAULT_MIN_INTERVAL_MS, edge=DEFAULT_EDGE,
+                 max_per_second=DEFAULT_MAX_PER_SECOND, scheduler=None):
+        self.key = key
+        self.interval = max(0.0, min_interval_ms / 1000.0)
+        self.trailing = edge == "trailing"
+        self.rate = max(0.0, float(max_per_second))
+        self.capacity = max(1.0, self.rate)  # Burst of up to one second's worth, at least one event
+        self.tokens = self.capacity
+        self.refilled_at = None
+        self.last_event = None
+        self.pending = None
+        self.scheduler = scheduler
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def submit(self, now, fire, *args):
+        """Run fire(*args) now, later (trailing edge) or not at all; False if dropped"""
+        with self._lock:
+            last_event, self.last_event = self.last_event, now
+            if self.trailing:
+                if self.pending is not None:
+                    self.pending.cancel()
+                    self.dropped += 1
+                self.pending = self.scheduler.call_at(now + self.interval, self._fire_trailing, fire, args)
+                return True
+            if last_event is not None and now - last_event < self.interval:
+                self.dropped += 1
+                return False
+            if not self._take_token(now):
+                return False
+        fire(*args)
+        return True
+
+    def _fire_trailing(self, fire, args):
+        with self._lock:
+            self.pending = None
+            if not self._take_token(time.perf_counter()):
+                return
+        fire(*args)
+
+    def _take_token(self, now):
+        # Caller holds _lock
+        if not self.rate:
+            return True
+        if self.refilled_at is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens < 1.0:
+            self.dropped += 1
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+def create_limiter(key, settings, scheduler):
+    """EventLimiter for a command, or None when its settings disable limiting"""
+    if settings.min_interval_ms <= 0 and settings.max_per_second <= 0:
+        return None
+    if settings.edge == "trailing" and settings.min_interval_ms <= 0:
+        log.warning("Trailing-edge debounce for %s needs min_interval_ms > 0, using leading edge", key)
+        return EventLimiter(key, 0, "leading", settings.max_per_second, scheduler)
+    return EventLimiter(key, settings.min_interval_ms, settings.edge, settings.max_per_second, scheduler)
@@ -0,0 +1,64 @@
+"""
+Foreground window watcher for StreamDeck
+前台程序监听（配置档自动切换）
+
+With "profiles": {"auto_switch": true} the button profile follows the
+program in front. A daemon thread polls GetForegroundWindow (a cheap
+user32 call) and only when the window handle changes looks up the owning
+process and its program name, so an idle desktop costs a few syscalls per
+interval. Windows only; elsewhere auto-switching is reported unavailable
+and profiles are switched from the tray or serial only.
+"""
+
+import os
+import sys
+import threading
+
+from app_logging import get_logger
+
+log = get_logger("PROFILE")
+
+POLL_INTERVAL = 0.25
+
+
+class ForegroundWatcher:
+    """Calls callback(program name, lowercase "obs64.exe") when the foreground program changes"""
+
+    def __init__(self, callback, interval=POLL_INTERVAL):
+        if sys.platform != "win32":
+            raise OSError("foreground window tracking is only available on Windows")
+        import ctypes
+        from process_table import WindowsProcesses
+        self._ctypes = ctypes
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._processes = WindowsProcesses()
+        self.callback = callback
+        self.interval = interval
+        self._own_pid = os.getpid()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._run, name="foreground-watch", daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        last_hwnd = None
+        last_pid = None
+        pid = self._ctypes.c_ulong()
+        while not self._stopped.wait(self.interval):
+            hwnd = self._user32.GetForegroundWindow()
+            if not hwnd or hwnd == last_hwnd:
+                continue
+            last_hwnd = hwnd
+            self._user32.GetWindowThreadProcessId(hwnd, self._ctypes.byref(pid))
+            # Our own windows (GUI, dialogs) never switch the profile
+            if pid.value == last_pid or pid.value == self._own_pid:
+                continue
+            last_pid = pid.value
+            path = self._processes.image_path(pid.value)
+            if not path:
+                continue
+            try:
+                self.callback(os.path.basename(path).lower())
+            except Exception as e:
+                log.error("Profile auto-switch failed: %s", e)
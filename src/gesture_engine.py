@@ -0,0 +1,237 @@
+"""
+Gesture engine for StreamDeck
+按钮手势识别（短按 / 长按 / 双击 / 组合键）
+
+The controller has 9 buttons, but each one can carry several bindings in
+pref.json:
+
+    "BUTTON_1"                short press (also "BUTTON_1:short")
+    "BUTTON_1:long"           held for gestures.long_press_ms
+    "BUTTON_1:double"         pressed twice within gestures.double_press_ms
+    "BUTTON_1+BUTTON_2"       both pressed within gestures.chord_ms
+
+Only buttons that have a long, double or chord binding go through the
+engine; every other button keeps dispatching on the press itself, so plain
+presses gain no latency. Timeouts are scheduled on the shared
+TimerScheduler instead of a thread or threading.Timer per button.
+
+The sketch reports RELEASE_n when a button is let go. Older sketches only
+repeat BUTTON_n every ~200 ms while a button is held; until the engine has
+seen a RELEASE token it treats those repeats as "still held" and assumes
+the button was released gestures.repeat_ms after the last one.
+"""
+
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("GPIO")
+
+DEFAULT_LONG_PRESS_MS = 500
+DEFAULT_DOUBLE_PRESS_MS = 250
+DEFAULT_CHORD_MS = 80
+DEFAULT_REPEAT_MS = 300
+
+GESTURES = ("short", "long", "double")
+
+
+class KeySpec:
+    """Gesture bindings of one button"""
+
+    __slots__ = ("short", "long", "double", "chords")
+
+    def __init__(self):
+        self.short = None   # Binding tokens, None if unbound
+        self.long = None
+        self.double = None
+        self.chords = []    # (frozenset of member keys, binding token)
+
+
+def parse_binding(token):
+    """Split a pref.json key into (button keys, gesture): "BUTTON_1:long" -> (("BUTTON_1",), "long")"""
+    if "+" in token:
+        members = tuple(member.strip() for member in token.split("+"))
+        return members, "chord"
+    base, _, gesture = token.rpartition(":")
+    if base and gesture in GESTURES:
+        return (base,), gesture
+    return (token,), None
+
+
+def build_key_specs(tokens):
+    """KeySpec per button that needs the engine (it has a long, double or chord binding)"""
+    specs = {}
+    plain = set()
+    for token in tokens:
+        keys, gesture = parse_binding(token)
+        if gesture is None:
+            plain.add(token)
+            continue
+        if gesture == "chord":
+            if len(set(keys)) < 2:
+                log.warning("Ignoring chord binding with fewer than two buttons: %s", token)
+                continue
+            for key in keys:
+                specs.setdefault(key, KeySpec()).chords.append((frozenset(keys), token))
+        else:
+            setattr(specs.setdefault(keys[0], KeySpec()), gesture, token)
+    # "short" is only needed as a gesture for buttons the engine handles anyway
+    specs = {key: spec for key, spec in specs.items() if spec.long or spec.double or spec.chords}
+    for key, spec in specs.items():
+        if spec.short is None and key in plain:
+            spec.short = key
+    return specs
+
+
+class _KeyState:
+    __slots__ = ("down", "pressed_at", "read_at", "consumed", "tap_timer", "long_timer",
+                 "release_timer", "chord_timer")
+
+    def __init__(self):
+        self.down = False
+        self.pressed_at = 0.0
+        self.read_at = 0.0
+        self.consumed = False   # This press already produced its gesture (long, double, chord)
+        self.tap_timer = None   # Waiting for a second press (double)
+        self.long_timer = None
+        self.release_timer = None  # Assumed release for sketches without RELEASE_n
+        self.chord_timer = None
+
+
+class GestureEngine:
+    """Turns press/release streams of some buttons into gesture bindings
+
+    emit(token, read_at) runs the action bound to a gesture token; it is
+    called on the serial thread or the scheduler thread.
+    """
+
+    def __init__(self, specs, emit, scheduler, long_press_ms=DEFAULT_LONG_PRESS_MS,
+                 double_press_ms=DEFAULT_DOUBLE_PRESS_MS, chord_ms=DEFAULT_CHORD_MS,
+                 repeat_ms=DEFAULT_REPEAT_MS, releases_seen=False):
+        self.specs = specs
+        self.emit = emit
+        self.scheduler = scheduler
+        self.long_press = long_press_ms / 1000.0
+        self.double_press = double_press_ms / 1000.0
+        self.chord_window = chord_ms / 1000.0
+        self.repeat = repeat_ms / 1000.0
+        self.releases_seen = releases_seen
+        self._states = {key: _KeyState() for key in specs}
+        self._lock = threading.Lock()
+
+    def handles(self, key):
+        return key in self.specs
+
+    def press(self, key, now, read_at):
+        with self._lock:
+            spec = self.specs[key]
+            state = self._states[key]
+            if state.down:
+                if not self.releases_seen:
+                    # Repeat of a held button from a sketch without RELEASE_n
+                    self._cancel(state.release_timer)
+                    state.release_timer = self.scheduler.call_at(now + self.repeat, self._assumed_release, key)
+                    return
+                self._release(key, spec, state, now)  # The release was lost
+            state.down = True
+            state.pressed_at = now
+            state.read_at = read_at
+            state.consumed = False
+
+            if state.tap_timer is not None:
+                # Second press within the double-press window
+                self._cancel(state.tap_timer)
+                state.tap_timer = None
+                state.consumed = True
+                self.emit(spec.double, read_at)
+                return
+
+            for members, token in spec.chords:
+                if self._chord_complete(key, members, now):
+                    for member in members:
+                        self._consume(self._states[member])
+                    self.emit(token, read_at)
+                    return
+
+            if spec.long:
+                state.long_timer = self.scheduler.call_at(now + self.long_press, self._long_press, key, now)
+            if spec.chords and not spec.long and not spec.double:
+                # Chord-only buttons fire their short press once no chord can complete
+                state.chord_timer = self.scheduler.call_at(now + self.chord_window, self._chord_expired, key, now)
+            if not self.releases_seen:
+                state.release_timer = self.scheduler.call_at(now + self.repeat, self._assumed_release, key)
+
+    def release(self, key, now):
+        with self._lock:
+            self.releases_seen = True
+            spec = self.specs.get(key)
+            if spec is not None and self._states[key].down:
+                self._release(key, spec, self._states[key], now)
+
+    def _release(self, key, spec, state, now):
+        # Caller holds the lock
+        state.down = False
+        self._cancel(state.long_timer)
+        self._cancel(state.release_timer)
+        self._cancel(state.chord_timer)
+        state.long_timer = state.release_timer = state.chord_timer = None
+        if state.consumed:
+            return
+        if spec.double:
+            state.tap_timer = self.scheduler.call_at(now + self.double_press, self._single_tap, key)
+        elif spec.short:
+            self.emit(spec.short, state.read_at)
+
+    def _chord_complete(self, key, members, now):
+        for member in members:
+            if member == key:
+                continue
+            other = self._states.get(member)
+            if other is None or not other.down or other.consumed or now - other.pressed_at > self.chord_window:
+                return False
+        return True
+
+    def _consume(self, state):
+        state.consumed = True
+        self._cancel(state.long_timer)
+        self._cancel(state.chord_timer)
+        self._cancel(state.tap_timer)
+        state.long_timer = state.chord_timer = state.tap_timer = None
+
+    @staticmethod
+    def _cancel(timer):
+        if timer is not None:
+            timer.cancel()
+
+    # Scheduler callbacks
+
+    def _long_press(self, key, pressed_at):
+        with self._lock:
+            state = self._states[key]
+            if state.down and not state.consumed and state.pressed_at == pressed_at:
+                state.long_timer = None
+                state.consumed = True
+                self.emit(self.specs[key].long, state.read_at)
+
+    def _chord_expired(self, key, pressed_at):
+        with self._lock:
+            state = self._states[key]
+            if state.down and not state.consumed and state.pressed_at == pressed_at:
+                state.chord_timer = None
+                state.consumed = True
+                if self.specs[key].short:
+                    self.emit(self.specs[key].short, state.read_at)
+
+    def _single_tap(self, key):
+        with self._lock:
+            state = self._states[key]
+            state.tap_timer = None
+            if self.specs[key].short:
+                self.emit(self.specs[key].short, state.read_at)
+
+    def _assumed_release(self, key):
+        with self._lock:
+            state = self._states[key]
+            if state.down and not self.releases_seen:
+                self._release(key, self.specs[key], state, time.perf_counter())
@@ -1,215 +1,482 @@
-import subprocess
 import webbrowser
 import serial
 import time
-import ctypes
 import os
-import json
 import threading
-import sys
+import dataclasses
+from types import MappingProxyType
+from serial_protocol import BINARY_REQUEST, BINARY_REQUEST_ATTEMPTS
+from serial_transport import SerialWakeup, SerialWaiter, SerialDevice
+from action_executor import ActionExecutor
+from volume_control import VolumeCoalescer, create_volume_backend
+from reconnect_manager import ReconnectManager
+from gpio_settings import ConfigSnapshot, validate_gpio_config, gpio_config
+from input_backend import create_input_backend, VK_VOLUME_MUTE, VK_MEDIA_PLAY_PAUSE
+from latency_stats import LatencyStats, event_type
+from config_watcher import ConfigWatcher
+from timer_scheduler import TimerScheduler
+from event_limiter import create_limiter
+from gesture_engine import GestureEngine, build_key_specs, parse_binding
+from process_launcher import ProcessLauncher, POLICIES
+from http_client import HttpClient
+from foreground_watcher import ForegroundWatcher
+from prefController import DEFAULT_PROFILE
+from config_store import get_app_data_dir
+from app_logging import get_logger, set_level, set_debug, DEBUG
 
-def get_app_data_dir():
-    """Get the directory where the application should store its data files"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-    return app_dir
+log = get_logger("GPIO")
 
 # Configuration file path
-GPIO_CONFIG_FILE = os.path.join(get_app_data_dir(), "gpio_config.json")
-
-# Default configuration values
-DEFAULT_CONFIG = {
-    "arduino": {
-        "port": "COM7",
-        "baudrate": 9600,
-        "timeout": 1
-    },
-    "volume": {
-        "enabled": True,
-        "default_value": 0
-    },
-    "media": {
-        "enabled": True
-    },
-    "debug": {
-        "enabled": True,
-        "log_level": "INFO"
-    }
-}
+GPIO_CONFIG_FILE = gpio_config.path
 
-def load_gpio_config():
-    """Load GPIO configuration from file or create default if not exists"""
-    try:
-        if os.path.exists(GPIO_CONFIG_FILE):
-            with open(GPIO_CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-                print(f"[GPIO] Configuration loaded from {GPIO_CONFIG_FILE}")
-                return config
-        else:
-            # Create default config file
-            with open(GPIO_CONFIG_FILE, 'w') as f:
-                json.dump(DEFAULT_CONFIG, f, indent=4)
-                print(f"[GPIO] Created default configuration file: {GPIO_CONFIG_FILE}")
-                print(f"[GPIO] Please edit {GPIO_CONFIG_FILE} to configure your Arduino settings")
-                return DEFAULT_CONFIG
-    except Exception as e:
-        print(f"[GPIO ERROR] Failed to load configuration: {e}")
-        print(f"[GPIO] Using default configuration")
-        return DEFAULT_CONFIG
+# Load configuration (shared with every other reader of gpio_config.json)
+startup_settings = gpio_config.load()
 
-# Load configuration
-gpio_config = load_gpio_config()
+# Button actions run on this pool so slow launches never block the serial thread
+action_executor = ActionExecutor(startup_settings.action_max_workers, startup_settings.action_max_in_flight)
 
-# Extract Arduino settings from config
-ARDUINO_PORT = gpio_config["arduino"]["port"]
-BAUDRATE = gpio_config["arduino"]["baudrate"]
-SERIAL_TIMEOUT = gpio_config["arduino"]["timeout"]
+# Starts "exe" actions; paths are resolved when the button config is loaded
+process_launcher = ProcessLauncher(helper=startup_settings.launcher_helper)
 
-# Extract other settings
-VOLUME_ENABLED = gpio_config["volume"]["enabled"]
-VOLUME_DEFAULT = gpio_config["volume"]["default_value"]
-MEDIA_ENABLED = gpio_config["media"]["enabled"]
-DEBUG_ENABLED = gpio_config["debug"]["enabled"]
+# Sends "http" actions over keep-alive connections
+http_client = HttpClient(startup_settings.http_timeout_ms, startup_settings.http_pool_size)
 
 # Selected button state
 selected_button = None
 
 # Internal state for VOLUME
-last_volume_value = VOLUME_DEFAULT
+last_volume_value = startup_settings.volume_default
 is_muted = False
 
+# Current configuration: settings, buttons and dispatch table in one immutable
+# snapshot. Readers take one reference (per batch or event) and use only that;
+# writers publish a complete new snapshot under _publish_lock.
+snapshot = None
+_publish_lock = threading.RLock()
+
 # Config reload mechanism
 config_reload_event = threading.Event()
 gpio_reload_event = threading.Event()
-current_config = None
+serial_devices = []  # SerialDevice objects of the running listener (for status)
+config_watchers = []  # Watchers applying on-disk edits of pref.json / gpio_config.json
+dispatch_observer = None  # Optional callback(line) after each dispatch (simulator/benchmarks)
+
+# End-to-end latency histograms (serial read -> parse -> dispatch -> action)
+latency_stats = LatencyStats()
+batch_read_time = 0.0  # perf_counter() when the batch being dispatched was read
+LATENCY_STATS_FILE = os.path.join(get_app_data_dir(), "latency_stats.json")
+
+# Deferred callbacks of the serial pipeline (trailing-edge debounce, gesture timeouts)
+timer_scheduler = TimerScheduler()
+
+# Wakes the serial thread out of its selector as soon as a reload is signaled
+serial_wakeup = SerialWakeup()
+
+# Backoff between connection attempts for missing/unplugged devices (cut short by a reload signal)
+reconnect_manager = ReconnectManager(startup_settings.reconnect_initial_ms, startup_settings.reconnect_max_ms,
+                                     wakeup=serial_wakeup)
+
+def get_settings():
+    """GpioSettings of the current snapshot"""
+    return snapshot.settings
+
+def publish_snapshot(settings=None, buttons=None, profiles=None):
+    """Publish a new snapshot with the given parts replaced (a single reference swap)
+
+    buttons is the default profile (pref.json), profiles the named ones
+    ({name: button config}, replacing all of them). The dispatch table of
+    every profile is rebuilt, so a later profile switch has nothing to load.
+    """
+    global snapshot
+    with _publish_lock:
+        old = snapshot
+        if settings is None:
+            settings = old.settings
+        elif old is None or settings.log_level != old.settings.log_level:
+            set_level(settings.log_level)
+        sources = {name: entry[0] for name, entry in old.profiles.items()} if old else {}
+        if buttons is not None:
+            sources[DEFAULT_PROFILE] = _private_buttons(buttons)
+        if profiles is not None:
+            sources = {DEFAULT_PROFILE: sources.get(DEFAULT_PROFILE, MappingProxyType({}))}
+            sources.update((name, _private_buttons(config)) for name, config in profiles.items()
+                           if name != DEFAULT_PROFILE)
+        # Resolve the exe paths of every profile now rather than on the first press
+        process_launcher.prepare_all(*_exe_values(sources.values()))
+        compiled = MappingProxyType({name: (config, build_dispatch_table(config, settings))
+                                     for name, config in sources.items()})
+        active = old.profile if old is not None and old.profile in compiled else DEFAULT_PROFILE
+        buttons, table = compiled[active]
+        snapshot = ConfigSnapshot(version=old.version + 1 if old else 1,
+                                  settings=settings,
+                                  buttons=buttons,
+                                  table=table,
+                                  profile=active,
+                                  profiles=compiled)
+        return snapshot
+
+def _private_buttons(buttons):
+    # Private copy, so later edits of the caller's dict cannot leak in
+    return MappingProxyType({key: dict(action) for key, action in buttons.items()})
+
+def resolve_profile(profile):
+    """Profile name for "OBS", "obs" or an index ("0" is the default profile), None if unknown
+
+    A name always wins, so a profile called "2" is never taken for an index.
+    """
+    names = list(snapshot.profiles)
+    folded = profile.casefold()
+    for name in names:
+        if name.casefold() == folded:
+            return name
+    if profile.isdigit():
+        index = int(profile)
+        return names[index] if index < len(names) else None
+    return None
+
+def switch_profile(profile):
+    """PROFILE_<name> or PROFILE_n from a controller: make that profile active"""
+    name = resolve_profile(profile)
+    if name is None:
+        log.warning("Unknown profile: %s", profile)
+        return False
+    return switch_profile_by_name(name)
+
+def switch_profile_by_name(name):
+    """Make another profile active: its table is already built, so this is one snapshot swap"""
+    global snapshot
+    with _publish_lock:
+        current = snapshot
+        if name not in current.profiles:
+            log.warning("Unknown profile: %s", name)
+            return False
+        if name == current.profile:
+            return True
+        buttons, table = current.profiles[name]
+        snapshot = dataclasses.replace(current, version=current.version + 1,
+                                       profile=name, buttons=buttons, table=table)
+    log.info("Profile: %s", name)
+    return True
+
+def get_profiles():
+    """(profile names, active profile) for the tray menu"""
+    current = snapshot
+    return list(current.profiles), current.profile
 
 def reload_gpio_config():
-    """Reload GPIO configuration from file"""
-    global gpio_config, ARDUINO_PORT, BAUDRATE, SERIAL_TIMEOUT, VOLUME_ENABLED, VOLUME_DEFAULT, MEDIA_ENABLED, DEBUG_ENABLED, gpio_reload_event
+    """Publish the current gpio_config.json settings as a new snapshot
+
+    Returns False, keeping the running settings, if the file was rejected.
+    """
+    global action_executor, input_backend, reconnect_manager, process_launcher, http_client
     
-    try:
-        if os.path.exists(GPIO_CONFIG_FILE):
-            with open(GPIO_CONFIG_FILE, 'r') as f:
-                new_config = json.load(f)
-                
-                # Check if Arduino connection settings changed
-                old_port = ARDUINO_PORT
-                old_baudrate = BAUDRATE
-                old_timeout = SERIAL_TIMEOUT
-                
-                gpio_config = new_config
-                
-                # Update all configuration variables
-                ARDUINO_PORT = gpio_config["arduino"]["port"]
-                BAUDRATE = gpio_config["arduino"]["baudrate"]
-                SERIAL_TIMEOUT = gpio_config["arduino"]["timeout"]
-                VOLUME_ENABLED = gpio_config["volume"]["enabled"]
-                VOLUME_DEFAULT = gpio_config["volume"]["default_value"]
-                MEDIA_ENABLED = gpio_config["media"]["enabled"]
-                DEBUG_ENABLED = gpio_config["debug"]["enabled"]
-                
-                print(f"[GPIO] Configuration reloaded from {GPIO_CONFIG_FILE}")
-                print(f"[GPIO] Arduino: {ARDUINO_PORT} @ {BAUDRATE} baud")
-                
-                # Signal GPIO reload if connection settings changed
-                if old_port != ARDUINO_PORT or old_baudrate != BAUDRATE or old_timeout != SERIAL_TIMEOUT:
-                    gpio_reload_event.set()
-                    print(f"[GPIO] Arduino connection settings changed - forcing reconnection")
-                
-                return True
-        else:
-            print(f"[GPIO ERROR] Configuration file {GPIO_CONFIG_FILE} not found")
-            return False
-    except Exception as e:
-        print(f"[GPIO ERROR] Failed to reload configuration: {e}")
+    # Read only if the file changed; an invalid file is reported and the running settings kept
+    new = gpio_config.load()
+    if gpio_config.error is not None:
         return False
+    
+    with _publish_lock:
+        old = snapshot.settings
+        
+        # Replace the action pool if its limits changed; queued actions still finish
+        if (new.action_max_workers, new.action_max_in_flight) != (old.action_max_workers, old.action_max_in_flight):
+            old_executor = action_executor
+            action_executor = ActionExecutor(new.action_max_workers, new.action_max_in_flight)
+            old_executor.shutdown()
+        
+        if new.input_backend != old.input_backend:
+            old_backend = input_backend
+            input_backend = create_input_backend(new.input_backend)
+            old_backend.close()
+        
+        if new.launcher_helper != old.launcher_helper:
+            old_launcher = process_launcher
+            process_launcher = ProcessLauncher(helper=new.launcher_helper)
+            process_launcher.prepare_all(*_exe_values(buttons for buttons, _ in snapshot.profiles.values()))
+            old_launcher.close()
+        
+        if (new.http_timeout_ms, new.http_pool_size) != (old.http_timeout_ms, old.http_pool_size):
+            old_client = http_client
+            http_client = HttpClient(new.http_timeout_ms, new.http_pool_size)
+            old_client.close()
+        
+        backend_changed = new.volume_backend != old.volume_backend or new.input_backend != old.input_backend
+        for coalescer in [volume_coalescer] + list(namespace_volume_coalescers.values()):
+            coalescer.configure(
+                backend=create_volume_backend(new.volume_backend, input_backend) if backend_changed else None,
+                coalesce_ms=new.volume_coalesce_ms,
+                debug=new.debug_enabled)
+        
+        if (new.reconnect_initial_ms, new.reconnect_max_ms) != (old.reconnect_initial_ms, old.reconnect_max_ms):
+            reconnect_manager = ReconnectManager(new.reconnect_initial_ms, new.reconnect_max_ms, wakeup=serial_wakeup)
+        
+        # Feature flags are baked into the dispatch table, so it is rebuilt with the settings
+        publish_snapshot(settings=new)
+        update_foreground_watcher(new)
+    
+    log.info("Configuration reloaded from %s", GPIO_CONFIG_FILE)
+    log.info("Arduino: %s @ %s baud", new.arduino.port, new.arduino.baudrate)
+    
+    # Signal GPIO reload if connection settings changed
+    if new.devices != old.devices:
+        gpio_reload_event.set()
+        serial_wakeup.notify()
+        log.info("Arduino connection settings changed - forcing reconnection")
+    
+    return True
 
 def execute_action(action):
     if action["type"] == "link" and action["value"]:
         webbrowser.open(action["value"])
     elif action["type"] == "exe" and action["value"]:
         try:
-            subprocess.Popen(action["value"])
+            process_launcher.launch(action["value"], action.get("policy", "launch"))
         except Exception as e:
-            print("Error opening executable:", e)
+            log.error("Error opening executable: %s", e)
+    elif action["type"] == "http" and action["value"]:
+        http_client.send(action)
+    else:
+        log.info("No action defined")
+
+def run_timed_action(key, action, read_at, queued_at):
+    """Run a button action on a worker and record its queue, run and total latency"""
+    started_at = time.perf_counter()
+    try:
+        execute_action(action)
+    finally:
+        finished_at = time.perf_counter()
+        kind = event_type(key)
+        latency_stats.record(kind, "queue", started_at - queued_at)
+        latency_stats.record(kind, "run", finished_at - started_at)
+        latency_stats.record(kind, "total", finished_at - read_at)
+
+class DispatchTable:
+    """Serial tokens precompiled into handler callables
+
+    Built once per config load so each received line costs one dict lookup
+    (two for prefixed commands like VOLUME_n) instead of an if/elif chain.
+    """
+    __slots__ = ("exact", "prefixes", "actions", "debug", "gestures")
+
+    def __init__(self, exact, prefixes, actions, debug, gestures=None):
+        self.exact = exact          # token -> handler()
+        self.prefixes = prefixes    # token prefix (before "_") -> handler(argument)
+        self.actions = actions      # tokens whose handler queues a button action
+        self.debug = debug
+        self.gestures = gestures    # GestureEngine for buttons with long/double/chord bindings
+
+    def dispatch(self, line):
+        """Run the handler for a line, return False if nothing is bound to it"""
+        handler = self.exact.get(line)
+        if handler is not None:
+            handler()
+            return True
+        prefix, separator, argument = line.partition("_")
+        handler = self.prefixes.get(prefix)
+        if handler is not None and separator:
+            handler(argument)
+            return True
+        return False
+
+def _bind_action(key, action, debug):
+    """Pre-resolve the action for a button so dispatch only has to queue it"""
+    if debug:
+        def run_action(read_at=None):
+            log.debug("Executing action for %s", key)
+            action_executor.submit(key, run_timed_action, key, action, read_at or batch_read_time, time.perf_counter())
+    else:
+        def run_action(read_at=None):
+            action_executor.submit(key, run_timed_action, key, action, read_at or batch_read_time, time.perf_counter())
+    return run_action
+
+def _bind_limited(key, handler, limiter, debug):
+    """Put a command's debounce/rate limiter in front of its handler"""
+    submit = limiter.submit
+    perf_counter = time.perf_counter
+    if handler is handle_mute or handler is handle_media:
+        def run_limited():
+            if not submit(perf_counter(), handler) and debug:
+                log.debug("Debounced %s", key)
     else:
-        print("No action defined")
+        # The read time is passed along so a trailing-edge action still reports its full latency
+        def run_limited():
+            if not submit(perf_counter(), handler, batch_read_time) and debug:
+                log.debug("Debounced %s", key)
+    return run_limited
+
+def _bind_press(engine, key):
+    def press(read_at=None):
+        engine.press(key, time.perf_counter(), read_at or batch_read_time)
+    return press
+
+def _bind_release(engine, button_prefix):
+    """RELEASE_n handler; releases of buttons without gestures are ignored"""
+    if engine is None:
+        return lambda argument: None
+    def release(argument):
+        key = button_prefix + argument
+        if engine.handles(key):
+            engine.release(key, time.perf_counter())
+    return release
+
+def _build_gestures(config, settings, bound):
+    """GestureEngine for the buttons that have long/double/chord bindings, or None"""
+    specs = build_key_specs(config)
+    if not specs:
+        return None
+    previous = snapshot.table.gestures if snapshot is not None else None
+    gestures = settings.gestures
+    def emit(token, read_at):
+        bound[token](read_at)
+    return GestureEngine(specs, emit, timer_scheduler,
+                         long_press_ms=gestures.long_press_ms,
+                         double_press_ms=gestures.double_press_ms,
+                         chord_ms=gestures.chord_ms,
+                         repeat_ms=gestures.repeat_ms,
+                         releases_seen=previous.releases_seen if previous is not None else False)
+
+def _exe_values(configs):
+    """(exe values, whether any of them needs the process table) of some button configs"""
+    exes = [action for config in configs for action in config.values()
+            if action.get("type") == "exe" and action.get("value")]
+    return [action["value"] for action in exes], any(action.get("policy") in POLICIES[1:] for action in exes)
+
+def build_dispatch_table(config, settings):
+    """Build the dispatch table for a button config and GPIO settings"""
+    bound = {key: _bind_action(key, action, settings.debug_enabled) for key, action in config.items()}
+    # Gesture bindings ("BUTTON_1:long", "BUTTON_1+BUTTON_2") are never received as
+    # tokens; the engine runs them, and takes over the presses of their buttons
+    exact = {key: handler for key, handler in bound.items() if parse_binding(key)[1] is None}
+    engine = _build_gestures(config, settings, bound)
+    if engine is not None:
+        for key in engine.specs:
+            exact[key] = _bind_press(engine, key)
+    prefixes = {"RELEASE": _bind_release(engine, "BUTTON_"), "PROFILE": switch_profile}
+    
+    # Built-in commands take precedence over button config, as before
+    if settings.volume_enabled:
+        prefixes["VOLUME"] = handle_volume
+        exact["MUTE"] = handle_mute
+    if settings.media_enabled:
+        exact["MEDIA"] = handle_media
+    
+    # Namespaced devices get their own built-ins ("KNOBS:VOLUME_3"); each knob
+    # reports an absolute position, so every namespace has its own coalescer
+    for namespace in sorted({device.namespace for device in settings.devices if device.namespace}):
+        prefixes[f"{namespace}:RELEASE"] = _bind_release(engine, f"{namespace}:BUTTON_")
+        prefixes[f"{namespace}:PROFILE"] = switch_profile
+        if settings.volume_enabled:
+            prefixes[f"{namespace}:VOLUME"] = _bind_volume(get_namespace_volume_coalescer(namespace, settings))
+            exact[f"{namespace}:MUTE"] = handle_mute
+        if settings.media_enabled:
+            exact[f"{namespace}:MEDIA"] = handle_media
+    
+    actions = frozenset(key for key, handler in exact.items()
+                        if (key in config or (engine and engine.handles(key)))
+                        and handler is not handle_mute and handler is not handle_media)
+    
+    # Debounce/rate limit every command (not VOLUME_n, which has its own coalescing)
+    for key, handler in exact.items():
+        limiter = create_limiter(key, settings.debounce_for(key), timer_scheduler)
+        if limiter is not None:
+            exact[key] = _bind_limited(key, handler, limiter, settings.debug_enabled)
+    return DispatchTable(exact, prefixes, actions, settings.debug_enabled, engine)
+
+def _bind_volume(coalescer):
+    def run_volume(value):
+        handle_volume(value, coalescer)
+    return run_volume
 
 def listen_serial(config):
     try:
-        with serial.Serial(ARDUINO_PORT, BAUDRATE, timeout=SERIAL_TIMEOUT) as ser:
-            print(f"Connected to {ARDUINO_PORT}")
+        arduino = snapshot.settings.arduino
+        with serial.Serial(arduino.port, arduino.baudrate, timeout=arduino.timeout) as ser:
+            log.info("Connected to %s", arduino.port)
             while True:
                 line = ser.readline().decode('utf-8').strip()
                 if line:
-                    print("Received:", line)
-                    if line.startswith("VOLUME_") and VOLUME_ENABLED:
+                    log.info("Received: %s", line)
+                    settings = snapshot.settings
+                    if line.startswith("VOLUME_") and settings.volume_enabled:
                         value = line.replace("VOLUME_", "")
                         handle_volume(value)
-                    elif line == "MUTE" and VOLUME_ENABLED:
+                    elif line == "MUTE" and settings.volume_enabled:
                         handle_mute()
-                    elif line == "MEDIA" and MEDIA_ENABLED:
+                    elif line == "MEDIA" and settings.media_enabled:
                         handle_media()
                     elif line in config:
                         execute_action(config[line])
     except Exception as e:
-        print(f"[ERROR] Serial port: {e}")
+        log.error("Serial port: %s", e)
         time.sleep(5)
         listen_serial(config)
 
-def simulate_keypress(vk_code):
-    KEYEVENTF_EXTENDEDKEY = 0x0001
-    KEYEVENTF_KEYUP = 0x0002
-    ctypes.windll.user32.keybd_event(vk_code, 0, KEYEVENTF_EXTENDEDKEY, 0)
-    ctypes.windll.user32.keybd_event(vk_code, 0, KEYEVENTF_EXTENDEDKEY | KEYEVENTF_KEYUP, 0)
+# Key and media injection (SendInput on Windows, uinput on Linux)
+input_backend = create_input_backend(startup_settings.input_backend)
+
+def simulate_keypress(vk_code, count=1):
+    """Press and release a virtual key count times in one batched call"""
+    input_backend.tap(vk_code, count)
 
-def handle_volume(value):
+def handle_volume(value, coalescer=None):
     global last_volume_value
-    if not VOLUME_ENABLED:
-        print("[GPIO] Volume control is disabled in configuration")
+    if not snapshot.settings.volume_enabled:
+        log.info("Volume control is disabled in configuration")
         return
         
     try:
         volume_value = int(value)
-        delta = volume_value - last_volume_value
-        if delta != 0:
-            vk = 0xAF if delta > 0 else 0xAE  # VK_VOLUME_UP / VK_VOLUME_DOWN
-            for _ in range(abs(delta)):
-                simulate_keypress(vk)
-            if DEBUG_ENABLED:
-                print(f"[DEBUG] Volume adjusted by {delta}")
+        # The coalescer applies the net change from the last applied value,
+        # so a burst of VOLUME_n lines becomes a single adjustment
+        (coalescer or volume_coalescer).set_target(volume_value)
         last_volume_value = volume_value
     except ValueError:
-        print("[ERROR] Invalid volume value:", value)
+        log.error("Invalid volume value: %s", value)
+
+# Applies knob movements off the serial thread, one net adjustment per burst
+volume_coalescer = VolumeCoalescer(create_volume_backend(startup_settings.volume_backend, input_backend),
+                                   initial_value=startup_settings.volume_default,
+                                   coalesce_ms=startup_settings.volume_coalesce_ms,
+                                   debug=startup_settings.debug_enabled)
+namespace_volume_coalescers = {}
+
+def get_namespace_volume_coalescer(namespace, settings):
+    """Coalescer for the knob of a namespaced device (created on first use)"""
+    coalescer = namespace_volume_coalescers.get(namespace)
+    if coalescer is None:
+        coalescer = VolumeCoalescer(create_volume_backend(settings.volume_backend, input_backend),
+                                    initial_value=settings.volume_default,
+                                    coalesce_ms=settings.volume_coalesce_ms,
+                                    debug=settings.debug_enabled)
+        namespace_volume_coalescers[namespace] = coalescer
+    return coalescer
 
 def handle_mute():
     global is_muted
-    if not VOLUME_ENABLED:
-        print("[GPIO] Volume control is disabled in configuration")
+    settings = snapshot.settings
+    if not settings.volume_enabled:
+        log.info("Volume control is disabled in configuration")
         return
         
-    simulate_keypress(0xAD)  # VK_VOLUME_MUTE
+    simulate_keypress(VK_VOLUME_MUTE)
     is_muted = not is_muted
-    if DEBUG_ENABLED:
-        print(f"[DEBUG] Mute toggled -> {'ON' if is_muted else 'OFF'}")
+    if settings.debug_enabled:
+        log.debug("Mute toggled -> %s", 'ON' if is_muted else 'OFF')
 
 def handle_media():
-    if not MEDIA_ENABLED:
-        print("[GPIO] Media control is disabled in configuration")
+    settings = snapshot.settings
+    if not settings.media_enabled:
+        log.info("Media control is disabled in configuration")
         return
         
-    simulate_keypress(0xB3)  # VK_MEDIA_PLAY_PAUSE
-    if DEBUG_ENABLED:
-        print("[DEBUG] Media play/pause triggered")
+    simulate_keypress(VK_MEDIA_PLAY_PAUSE)
+    if settings.debug_enabled:
+        log.debug("Media play/pause triggered")
 
 def select_button(btn):
     global selected_button
     selected_button = btn
-    print(f"[DEBUG] Button selected: BUTTON_{btn}")
+    log.debug("Button selected: BUTTON_%s", btn)
 
 def deselect_button():
     global selected_button
@@ -222,96 +489,323 @@ def signal_config_reload():
     """Signal the serial thread to reload configuration"""
     global config_reload_event
     config_reload_event.set()
-    print("[GPIO] Config reload signal sent")
+    serial_wakeup.notify()
+    log.info("Config reload signal sent")
+
+def set_debug_enabled(enabled):
+    """Switch debug output on or off at runtime (tray menu); gpio_config.json is not changed"""
+    with _publish_lock:
+        set_debug(enabled)
+        for coalescer in [volume_coalescer] + list(namespace_volume_coalescers.values()):
+            coalescer.configure(debug=enabled)
+        publish_snapshot(settings=dataclasses.replace(snapshot.settings, debug_enabled=enabled))
+    log.info("Debug output %s", "enabled" if enabled else "disabled")
+
+def is_debug_enabled():
+    return DEBUG.enabled
 
 def signal_gpio_reload():
     """Signal the serial thread to reload GPIO configuration immediately"""
     global gpio_reload_event
-    print("[GPIO] signal_gpio_reload() called")
+    log.info("signal_gpio_reload() called")
     
     # Print current settings before reload
-    print(f"[GPIO] Before reload - Debug: {DEBUG_ENABLED}, Volume: {VOLUME_ENABLED}, Media: {MEDIA_ENABLED}")
+    settings = snapshot.settings
+    log.info("Before reload - Debug: %s, Volume: %s, Media: %s", settings.debug_enabled, settings.volume_enabled, settings.media_enabled)
     
-    # First reload the GPIO config in this thread to update global variables
+    # First reload the GPIO config in this thread and publish the new snapshot
     if reload_gpio_config():
-        print("[GPIO] GPIO configuration reloaded immediately")
+        log.info("GPIO configuration reloaded immediately")
         # Print current settings after reload
-        print(f"[GPIO] After reload - Debug: {DEBUG_ENABLED}, Volume: {VOLUME_ENABLED}, Media: {MEDIA_ENABLED}")
+        settings = snapshot.settings
+        log.info("After reload - Debug: %s, Volume: %s, Media: %s", settings.debug_enabled, settings.volume_enabled, settings.media_enabled)
         # Only signal reconnection if Arduino settings actually changed
         # (gpio_reload_event will be set by reload_gpio_config if needed)
     else:
         # If reload failed, still try to signal
-        print("[GPIO] GPIO config reload failed, signaling anyway")
+        log.info("GPIO config reload failed, signaling anyway")
         gpio_reload_event.set()
-    print("[GPIO] GPIO reload signal sent")
+        serial_wakeup.notify()
+    log.info("GPIO reload signal sent")
+
+def set_dispatch_observer(callback):
+    """Register a callback(line) run on the serial thread after each dispatch (None to remove)"""
+    global dispatch_observer
+    dispatch_observer = callback
 
 def get_current_gpio_settings():
     """Get current GPIO settings (for debugging/status)"""
+    current = snapshot
+    settings = current.settings
     return {
-        "arduino_port": ARDUINO_PORT,
-        "arduino_baudrate": BAUDRATE,
-        "volume_enabled": VOLUME_ENABLED,
-        "media_enabled": MEDIA_ENABLED,
-        "debug_enabled": DEBUG_ENABLED
+        "config_version": current.version,
+        "arduino_port": settings.arduino.port,
+        "arduino_baudrate": settings.arduino.baudrate,
+        "volume_enabled": settings.volume_enabled,
+        "media_enabled": settings.media_enabled,
+        "debug_enabled": settings.debug_enabled,
+        "log_level": settings.log_level,
+        "profile": current.profile,
+        "profiles": list(current.profiles),
+        "devices": [{
+            "name": device.name,
+            "port": device.port,
+            "namespace": device.namespace,
+            "connected": device.connected,
+            "failures": device.failures,
+            "binary_protocol": device.connected and device.decoder.binary_active
+        } for device in serial_devices],
+        "actions": action_executor.get_stats(),
+        "launcher": process_launcher.get_stats(),
+        "http": http_client.get_stats(),
+        "latency": latency_stats.snapshot()
     }
 
+def get_latency_stats():
+    """Latency percentiles per event type and stage (for debugging/status)"""
+    return latency_stats.snapshot()
+
+def dump_latency_stats(path=None):
+    """Print the latency report and write it as JSON; returns the file path"""
+    log.info("Serial latency report:\n%s", latency_stats.format_report())
+    try:
+        path = latency_stats.dump(path or LATENCY_STATS_FILE)
+        log.info("Latency stats written to %s", path)
+        return path
+    except Exception as e:
+        log.error("Failed to write latency stats: %s", e)
+        return None
+
+def reset_latency_stats():
+    """Clear all latency histograms"""
+    latency_stats.reset()
+    log.info("Latency stats reset")
+
+def on_pref_file_changed(config):
+    """pref.json was changed on disk (by any program)"""
+    if config != dict(snapshot.profiles[DEFAULT_PROFILE][0]):
+        signal_config_reload()
+
+def _on_profile_file_changed(name):
+    def on_profile_changed(config):
+        """profiles/<name>.json was changed on disk"""
+        entry = snapshot.profiles.get(name)
+        if entry is None or config != dict(entry[0]):
+            signal_config_reload()
+    return on_profile_changed
+
+def on_foreground_app(app):
+    """The foreground program changed: activate its profile, or the default one"""
+    current = snapshot
+    name = current.settings.profile_apps.get(app, DEFAULT_PROFILE)
+    if name != current.profile:
+        switch_profile_by_name(name)
+
+foreground_watcher = None  # Follows the foreground program when profiles.auto_switch is on
+
+def update_foreground_watcher(settings):
+    """Start or stop profile auto-switching to match the settings"""
+    global foreground_watcher
+    if settings.profile_auto_switch and foreground_watcher is None:
+        try:
+            foreground_watcher = ForegroundWatcher(on_foreground_app)
+            log.info("Profile auto-switch enabled")
+        except OSError as e:
+            log.warning("Profile auto-switch unavailable: %s", e)
+    elif not settings.profile_auto_switch and foreground_watcher is not None:
+        foreground_watcher.stop()
+        foreground_watcher = None
+
+def on_gpio_settings_changed(settings):
+    """The config store has new gpio_config.json settings (a dialog saved, or a load found an edit)"""
+    if settings != snapshot.settings:
+        signal_gpio_reload()
+
+gpio_config.subscribe(on_gpio_settings_changed)
+
+def on_gpio_config_file_changed(config):
+    """gpio_config.json was changed on disk (by any program)"""
+    # The store re-reads it and notifies on_gpio_settings_changed if the settings differ
+    gpio_config.load()
+
+def start_config_watcher():
+    """Apply edits to pref.json and gpio_config.json as soon as they hit the disk"""
+    import prefController
+    watchers = {}
+    files = [(prefController.PREF_FILE, prefController.validate_pref, on_pref_file_changed),
+             (GPIO_CONFIG_FILE, validate_gpio_config, on_gpio_config_file_changed)]
+    # Profiles that exist now; new profile files are picked up by the next reload
+    files.extend((prefController.profile_file(name), prefController.validate_pref, _on_profile_file_changed(name))
+                 for name in prefController.list_profiles())
+    for path, validate, callback in files:
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in watchers:
+            watchers[directory] = ConfigWatcher(directory)
+        watchers[directory].watch(path, validate, callback)
+    for watcher in watchers.values():
+        watcher.start()
+    config_watchers.extend(watchers.values())
+    return list(watchers.values())
+
+def request_binary_protocol(ser):
+    """Ask the Arduino sketch to switch to binary frames (ignored by old sketches)"""
+    try:
+        ser.write(BINARY_REQUEST)
+        if snapshot.settings.debug_enabled:
+            log.info("Requested binary frame protocol")
+    except Exception as e:
+        log.warning("Failed to request binary protocol: %s", e)
+
+def connect_device(device, waiter, in_use=()):
+    """Find and open a device, add it to the selector and start protocol negotiation
+
+    Returns False (with a retry scheduled) when the device is not plugged in
+    or cannot be opened.
+    """
+    manager = reconnect_manager
+    port = manager.resolve_port(device, exclude=in_use)
+    if port is None:
+        if device.failures == 0:
+            log.info("Waiting for %s to be plugged in...", device.name)
+        manager.failed(device)
+        return False
+    try:
+        ser = device.open()
+    except Exception as e:
+        # Report once per outage; retries keep backing off quietly
+        if device.failures == 0 or snapshot.settings.debug_enabled:
+            log.error("Serial port %s: %s", device.port, e)
+        manager.failed(device)
+        return False
+    waiter.register(device)
+    manager.connected(device)
+    log.info("Connected to %s%s", device.port, f" ({device.namespace})" if device.namespace else "")
+    if device.protocol != "text":
+        request_binary_protocol(ser)
+        device.binary_requests = 1
+    return True
+
+def disconnect_device(device, waiter):
+    """Remove a device from the selector, close it and schedule a fast retry"""
+    waiter.unregister(device)
+    device.close()
+    device.failures = 0
+    reconnect_manager.failed(device)
+
+def negotiate_protocol(device, text_before):
+    """Follow up on the binary protocol request after each read"""
+    decoder = device.decoder
+    if device.binary_requests and decoder.binary_active:
+        log.info("Binary frame protocol active on %s (v%s)", device.port, decoder.remote_version)
+        device.binary_requests = 0
+
+    # Old sketches answer in text forever; a new sketch may have missed the
+    # first request while its bootloader was running, so ask again a few times
+    if (device.binary_requests and not decoder.binary_active
+            and decoder.text_lines != text_before
+            and device.binary_requests < BINARY_REQUEST_ATTEMPTS):
+        request_binary_protocol(device.ser)
+        device.binary_requests += 1
+
 def listen_serial_with_reload():
-    """Enhanced serial listener that can reload config when signaled"""
-    global current_config, config_reload_event, gpio_reload_event
-    from prefController import load_pref
+    """Enhanced serial listener that can reload config when signaled
+
+    A single thread serves every configured device through one selector.
+    """
+    global config_reload_event, gpio_reload_event, batch_read_time, serial_devices
+    from prefController import load_pref, load_profiles
     
     # Load initial config
-    current_config = load_pref()
-    print(f"[GPIO] Initial config loaded with {len(current_config)} buttons")
-    print(f"[GPIO] Arduino: {ARDUINO_PORT} @ {BAUDRATE} baud")
+    current = publish_snapshot(buttons=load_pref(), profiles=load_profiles())
+    log.info("Initial config loaded with %s buttons", len(current.buttons))
+    if len(current.profiles) > 1:
+        log.info("Profiles: %s (active: %s)", ', '.join(current.profiles), current.profile)
+    log.info("Arduino: %s @ %s baud", current.settings.arduino.port, current.settings.arduino.baudrate)
     
-    while True:
-        try:
-            with serial.Serial(ARDUINO_PORT, BAUDRATE, timeout=SERIAL_TIMEOUT) as ser:
-                print(f"[GPIO] Connected to {ARDUINO_PORT}")
-                
+    # Sleeps until any port has bytes, a reload is signaled or a retry is due
+    with SerialWaiter(serial_wakeup) as waiter:
+        while True:
+            devices = [SerialDevice(**dataclasses.asdict(settings)) for settings in snapshot.settings.devices]
+            serial_devices = devices
+            if len(devices) > 1:
+                log.info("Listening to %s devices: %s", len(devices), ', '.join(d.port for d in devices))
+            
+            try:
                 while True:
                     # Check if GPIO reload was requested (Arduino connection settings changed)
                     if gpio_reload_event.is_set():
                         gpio_reload_event.clear()
-                        print(f"[GPIO] GPIO settings changed - reconnecting...")
-                        break  # Break out of serial loop to reconnect with new settings
+                        log.info("GPIO settings changed - reconnecting...")
+                        break  # Rebuild the device list and reconnect with new settings
                     
                     # Check if button config reload was requested (from GUI)
                     if config_reload_event.is_set():
-                        current_config = load_pref()
                         config_reload_event.clear()
-                        print(f"[GPIO] Button config reloaded! {len(current_config)} buttons configured")
+                        current = publish_snapshot(buttons=load_pref(), profiles=load_profiles())
+                        log.info("Button config reloaded! %s buttons configured", len(current.buttons))
                         
                         # Note: GPIO config should already be reloaded by signal_gpio_reload()
                         # when GPIO settings are saved, so we don't need to reload it here
                     
-                    # Read serial data with timeout
-                    line = ser.readline().decode('utf-8').strip()
-                    if line:
-                        # Cache current GPIO settings to avoid repeated dict lookups
-                        current_debug = DEBUG_ENABLED
-                        current_volume = VOLUME_ENABLED
-                        current_media = MEDIA_ENABLED
+                    # (Re)connect devices whose retry is due; one failing device never blocks the others
+                    now = time.perf_counter()
+                    next_retry = None
+                    for device in devices:
+                        if not device.connected and device.retry_at <= now:
+                            connect_device(device, waiter, {d.port for d in devices if d.connected})
+                        if not device.connected and (next_retry is None or device.retry_at < next_retry):
+                            next_retry = device.retry_at
+                    
+                    # Wait for bytes or a reload signal, then drain everything that
+                    # has arrived on each ready port in one read and split it in one pass
+                    timeout = None if next_retry is None else max(0.0, next_retry - time.perf_counter())
+                    ready = waiter.wait(timeout)
+                    if ready is None:
+                        # A reload signal also cuts the reconnect delay short
+                        for device in devices:
+                            device.retry_at = 0.0
+                            device.failures = min(device.failures, 1)
+                        continue
+                    read_at = time.perf_counter()
+                    
+                    for device in ready:
+                        decoder = device.decoder
+                        try:
+                            if not device.read():
+                                continue
+                        except Exception as e:
+                            log.error("Serial port %s: %s", device.port, e)
+                            disconnect_device(device, waiter)
+                            continue
                         
-                        if current_debug:
-                            print("[GPIO] Received:", line)
-                        if line.startswith("VOLUME_") and current_volume:
-                            value = line.replace("VOLUME_", "")
-                            handle_volume(value)
-                        elif line == "MUTE" and current_volume:
-                            handle_mute()
-                        elif line == "MEDIA" and current_media:
-                            handle_media()
-                        elif line in current_config:
-                            if current_debug:
-                                print(f"[GPIO] Executing action for {line}")
-                            execute_action(current_config[line])
-                        else:
-                            if current_debug:
-                                print(f"[GPIO] No action configured for: {line}")
-                            
-        except Exception as e:
-            print(f"[GPIO ERROR] Serial port: {e}")
-            time.sleep(5)
-            # Continue the loop to reconnect
\ No newline at end of file
+                        text_before = decoder.text_lines
+                        lines = decoder.decode()
+                        parsed_at = time.perf_counter()
+                        negotiate_protocol(device, text_before)
+                        
+                        observer = dispatch_observer
+                        prefix = device.prefix
+                        batch_read_time = read_at
+                        for line in lines:
+                            if prefix:
+                                line = prefix + line
+                            # Current snapshot per line, so a PROFILE_n switch applies to the next line
+                            table = snapshot.table
+                            if table.debug:
+                                log.debug("Received: %s", line)
+                            if table.dispatch(line):
+                                latency_stats.record_event(event_type(line), read_at, parsed_at,
+                                                           time.perf_counter(), line not in table.actions)
+                            elif table.debug:
+                                log.debug("No action configured for: %s", line)
+                            if observer is not None:
+                                observer(line)
+            finally:
+                for device in devices:
+                    if device.connected:
+                        waiter.unregister(device)
+                        device.close()
+
+# Publish the initial snapshot (the serial listener adds the button config)
+publish_snapshot(settings=startup_settings, buttons={})
+update_foreground_watcher(startup_settings)
@@ -1,10 +1,10 @@
 import os
-import json
 import copy
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
 import serial.tools.list_ports
+from gpio_settings import gpio_config
 
 def get_resource_path(relative_path):
     """Get the absolute path to a resource, works for PyInstaller bundles and source"""
@@ -22,64 +22,16 @@ def get_resource_path(relative_path):
     except:
         return relative_path
 
-def get_app_data_dir():
-    """Get the directory where the application should store its data files"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-    return app_dir
-
-# Configuration file path
-GPIO_CONFIG_FILE = os.path.join(get_app_data_dir(), "gpio_config.json")
-
-# Default configuration values
-DEFAULT_CONFIG = {
-    "arduino": {
-        "port": "COM7",
-        "baudrate": 9600,
-        "timeout": 1
-    },
-    "volume": {
-        "enabled": True,
-        "default_value": 0
-    },
-    "media": {
-        "enabled": True
-    },
-    "debug": {
-        "enabled": True,
-        "log_level": "INFO"
-    }
-}
-
 def load_gpio_config():
-    """Load GPIO configuration from file or create default if not exists"""
-    try:
-        if os.path.exists(GPIO_CONFIG_FILE):
-            with open(GPIO_CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-                print(f"[GPIO CONFIG] Configuration loaded from {GPIO_CONFIG_FILE}")
-                return config
-        else:
-            # Create default config file
-            with open(GPIO_CONFIG_FILE, 'w') as f:
-                json.dump(DEFAULT_CONFIG, f, indent=4)
-                print(f"[GPIO CONFIG] Created default configuration file: {GPIO_CONFIG_FILE}")
-                return DEFAULT_CONFIG
-    except Exception as e:
-        print(f"[GPIO CONFIG ERROR] Failed to load configuration: {e}")
-        print(f"[GPIO CONFIG] Using default configuration")
-        return DEFAULT_CONFIG
+    """Editable copy of the GPIO configuration (created with defaults if it does not exist)"""
+    return gpio_config.edit()
 
 def save_gpio_config(config):
-    """Save GPIO configuration to file"""
+    """Validate and save the GPIO configuration; the GPIO listener picks it up from the config store"""
     try:
-        with open(GPIO_CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=4)
-        print(f"[GPIO CONFIG] Configuration saved to {GPIO_CONFIG_FILE}")
+        if not gpio_config.save(config):
+            return False
+        print(f"[GPIO CONFIG] Configuration saved to {gpio_config.path}")
         return True
     except Exception as e:
         print(f"[GPIO CONFIG ERROR] Failed to save configuration: {e}")
@@ -160,7 +112,8 @@ class GPIOConfigGUI:
         # Create BooleanVar for checkboxes
         self.volume_var = tk.BooleanVar(value=self.config['volume']['enabled'])
         self.media_var = tk.BooleanVar(value=self.config['media']['enabled'])
-        self.debug_var = tk.BooleanVar(value=self.config['debug']['enabled'])
+        debug = self.config['debug']
+        self.debug_var = tk.BooleanVar(value=str(debug.get('log_level') or ('DEBUG' if debug['enabled'] else 'INFO')).upper() == 'DEBUG')
         
         self.setup_ui()
     
@@ -431,25 +384,23 @@ class GPIOConfigGUI:
         self.config['volume']['enabled'] = self.volume_var.get()
         self.config['media']['enabled'] = self.media_var.get()
         self.config['debug']['enabled'] = self.debug_var.get()
+        # log_level takes precedence over enabled, so keep the two in step
+        if self.debug_var.get():
+            self.config['debug']['log_level'] = 'DEBUG'
+        elif str(self.config['debug'].get('log_level', '')).upper() == 'DEBUG':
+            self.config['debug']['log_level'] = 'INFO'
         
         # Save to file
         if save_gpio_config(self.config):
             messagebox.showinfo("Success", "Configuration saved successfully!")
             
-            # Trigger immediate GPIO config reload
+            # The GPIO listener is subscribed to the config store and reloaded on the save itself
             try:
-                from gpio import signal_gpio_reload, get_current_gpio_settings
-                print(f"[GPIO CONFIG] Triggering GPIO reload...")
-                signal_gpio_reload()
-                print("[GPIO CONFIG] GPIO reload signal sent to GPIO system")
-                
-                # Print current settings for verification
+                from gpio import get_current_gpio_settings
                 settings = get_current_gpio_settings()
                 print(f"[GPIO CONFIG] Current settings: {settings}")
             except Exception as e:
-                print(f"[GPIO CONFIG] Warning: Could not signal GPIO reload: {e}")
-                import traceback
-                traceback.print_exc()
+                print(f"[GPIO CONFIG] Warning: Could not read GPIO settings: {e}")
             
             self.root.destroy()
             return True
@@ -0,0 +1,314 @@
+"""
+GPIO settings snapshot for StreamDeck
+GPIO 配置不可变快照
+
+gpio_config.json is parsed once into a frozen GpioSettings object, and
+together with the button config and the dispatch table built from both it
+forms a ConfigSnapshot. The serial, GUI and tray threads never see a
+half-applied reload: a reload builds a complete new snapshot and publishes
+it with one reference swap, and readers take one reference per event and
+use only that.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from action_executor import DEFAULT_MAX_WORKERS, DEFAULT_MAX_IN_FLIGHT
+from volume_control import DEFAULT_COALESCE_MS
+from reconnect_manager import parse_usb_id, DEFAULT_INITIAL_DELAY_MS, DEFAULT_MAX_DELAY_MS
+from event_limiter import DEFAULT_MIN_INTERVAL_MS, DEFAULT_EDGE, DEFAULT_MAX_PER_SECOND, EDGES
+from http_client import DEFAULT_TIMEOUT_MS as DEFAULT_HTTP_TIMEOUT_MS, DEFAULT_POOL_SIZE as DEFAULT_HTTP_POOL_SIZE
+from gesture_engine import DEFAULT_LONG_PRESS_MS, DEFAULT_DOUBLE_PRESS_MS, DEFAULT_CHORD_MS, DEFAULT_REPEAT_MS
+from config_store import store, get_app_data_dir
+from app_logging import get_logger, LEVELS
+
+log = get_logger("GPIO")
+
+DEFAULT_BUTTON_COUNT = 9
+NAMESPACE_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSettings:
+    """Connection settings of one controller"""
+    name: str
+    port: str
+    baudrate: int
+    timeout: float
+    protocol: str = "auto"          # "auto" negotiates binary frames, "text" never does
+    namespace: str = None           # Prefix for this device's commands ("PEDAL" -> "PEDAL:BUTTON_1")
+    vid: int = None                 # USB identity, used to find the board again after re-plug
+    pid: int = None
+    serial_number: str = None
+
+
+@dataclass(frozen=True, slots=True)
+class DebounceSettings:
+    """Debounce and rate limit of one command (or the default for all)"""
+    min_interval_ms: int = DEFAULT_MIN_INTERVAL_MS
+    edge: str = DEFAULT_EDGE        # "leading" fires the first event, "trailing" the last
+    max_per_second: float = DEFAULT_MAX_PER_SECOND  # 0 = unlimited
+
+    @classmethod
+    def from_config(cls, config, base=None):
+        base = base or cls()
+        return cls(
+            min_interval_ms=config.get("min_interval_ms", base.min_interval_ms),
+            edge=config.get("edge", base.edge),
+            max_per_second=config.get("max_per_second", base.max_per_second),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class GestureSettings:
+    """Timing of long presses, double presses and chords"""
+    long_press_ms: int = DEFAULT_LONG_PRESS_MS
+    double_press_ms: int = DEFAULT_DOUBLE_PRESS_MS
+    chord_ms: int = DEFAULT_CHORD_MS
+    repeat_ms: int = DEFAULT_REPEAT_MS  # Hold detection for sketches that do not send RELEASE_n
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            long_press_ms=config.get("long_press_ms", DEFAULT_LONG_PRESS_MS),
+            double_press_ms=config.get("double_press_ms", DEFAULT_DOUBLE_PRESS_MS),
+            chord_ms=config.get("chord_ms", DEFAULT_CHORD_MS),
+            repeat_ms=config.get("repeat_ms", DEFAULT_REPEAT_MS),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class GpioSettings:
+    """Everything the GPIO layer reads from gpio_config.json"""
+    devices: tuple                  # DeviceSettings, the main "arduino" device first
+    volume_enabled: bool
+    volume_default: int
+    volume_backend: str             # "keypress" or "endpoint"
+    volume_coalesce_ms: int
+    media_enabled: bool
+    button_count: int               # Buttons on the controller(s), shown in the GUI in pages of 9
+    input_backend: str              # "auto", "sendinput", "uinput" or "recording"
+    debug_enabled: bool             # Per-event debug output on the serial thread
+    log_level: str                  # "DEBUG", "INFO", "WARNING" or "ERROR"
+    action_max_workers: int
+    action_max_in_flight: int
+    reconnect_initial_ms: int
+    reconnect_max_ms: int
+    debounce: DebounceSettings
+    debounce_commands: MappingProxyType  # Command -> DebounceSettings override
+    gestures: GestureSettings
+    profile_auto_switch: bool       # Follow the foreground program (Windows)
+    profile_apps: MappingProxyType  # Lowercase program name ("obs64.exe") -> profile name
+    launcher_helper: bool           # Keep a warm helper process that spawns "exe" actions
+    http_timeout_ms: int            # Default timeout of "http" actions
+    http_pool_size: int             # Keep-alive connections per host
+
+    @property
+    def arduino(self):
+        """The main controller"""
+        return self.devices[0]
+
+    def debounce_for(self, key):
+        """DebounceSettings of a command ("BUTTON_3", "PEDAL:BUTTON_1", "MUTE")"""
+        return self.debounce_commands.get(key, self.debounce)
+
+    @classmethod
+    def from_config(cls, config):
+        volume = config["volume"]
+        actions = config.get("actions", {})
+        reconnect = config.get("reconnect", {})
+        http = config.get("http", {})
+        profiles = config.get("profiles", {})
+        debounce_config = config.get("debounce", {})
+        debounce = DebounceSettings.from_config(debounce_config)
+        debug = config["debug"]
+        # An explicit log_level wins; debug.enabled only picks DEBUG or INFO when it is missing
+        log_level = debug.get("log_level")
+        log_level = str(log_level).upper() if log_level else ("DEBUG" if debug["enabled"] else "INFO")
+        return cls(
+            devices=load_device_settings(config),
+            volume_enabled=volume["enabled"],
+            volume_default=volume["default_value"],
+            volume_backend=volume.get("backend", "keypress"),
+            volume_coalesce_ms=volume.get("coalesce_ms", DEFAULT_COALESCE_MS),
+            media_enabled=config["media"]["enabled"],
+            button_count=config.get("buttons", {}).get("count", DEFAULT_BUTTON_COUNT),
+            input_backend=config.get("input", {}).get("backend", "auto"),
+            debug_enabled=log_level == "DEBUG",
+            log_level=log_level,
+            action_max_workers=actions.get("max_workers", DEFAULT_MAX_WORKERS),
+            action_max_in_flight=actions.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+            reconnect_initial_ms=reconnect.get("initial_delay_ms", DEFAULT_INITIAL_DELAY_MS),
+            reconnect_max_ms=reconnect.get("max_delay_ms", DEFAULT_MAX_DELAY_MS),
+            debounce=debounce,
+            debounce_commands=MappingProxyType({
+                key: DebounceSettings.from_config(override, debounce)
+                for key, override in debounce_config.get("commands", {}).items()}),
+            gestures=GestureSettings.from_config(config.get("gestures", {})),
+            profile_auto_switch=profiles.get("auto_switch", False),
+            profile_apps=MappingProxyType({app.lower(): name for app, name in profiles.get("apps", {}).items()}),
+            launcher_helper=config.get("launcher", {}).get("helper", False),
+            http_timeout_ms=http.get("timeout_ms", DEFAULT_HTTP_TIMEOUT_MS),
+            http_pool_size=http.get("pool_size", DEFAULT_HTTP_POOL_SIZE),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """Settings, button config and the dispatch table built from both, published together
+
+    Every profile's table is built up front; switching profiles publishes a
+    copy with another profile/buttons/table, without reading any file.
+    """
+    version: int                    # Increases with every publish
+    settings: GpioSettings
+    buttons: MappingProxyType       # Read-only view of the active profile (button key -> action)
+    table: object                   # gpio.DispatchTable for settings + buttons
+    profile: str                    # Active profile name
+    profiles: MappingProxyType      # Profile name -> (buttons, table), the default profile first
+
+
+def load_device_settings(config):
+    """Main "arduino" device plus any extra "devices", missing fields taken from the main one"""
+    arduino = config["arduino"]
+    protocol = arduino.get("protocol", "auto")
+    devices = [DeviceSettings(
+        name="arduino",
+        port=arduino["port"],
+        baudrate=arduino["baudrate"],
+        timeout=arduino["timeout"],
+        protocol=protocol,
+        namespace=arduino.get("namespace") or None,
+        vid=parse_usb_id(arduino.get("vid")),
+        pid=parse_usb_id(arduino.get("pid")),
+        serial_number=arduino.get("serial_number") or None,
+    )]
+    for extra in config.get("devices", []):
+        if not extra.get("port"):
+            log.warning("Ignoring device without a port: %s", extra)
+            continue
+        devices.append(DeviceSettings(
+            name=extra.get("name", extra["port"]),
+            port=extra["port"],
+            baudrate=extra.get("baudrate", arduino["baudrate"]),
+            timeout=extra.get("timeout", arduino["timeout"]),
+            protocol=extra.get("protocol", protocol),
+            namespace=extra.get("namespace") or None,
+            vid=parse_usb_id(extra.get("vid")),
+            pid=parse_usb_id(extra.get("pid")),
+            serial_number=extra.get("serial_number") or None,
+        ))
+    return tuple(devices)
+
+
+def validate_gpio_config(config):
+    """Raise ValueError if a GPIO config is missing settings the listener needs"""
+    if not isinstance(config, dict):
+        raise ValueError("GPIO config must be a JSON object")
+    arduino = config.get("arduino")
+    if not isinstance(arduino, dict):
+        raise ValueError("missing \"arduino\" section")
+    if not isinstance(arduino.get("port"), str) or not arduino["port"]:
+        raise ValueError("arduino.port must be a non-empty string")
+    if not isinstance(arduino.get("baudrate"), int) or arduino["baudrate"] <= 0:
+        raise ValueError("arduino.baudrate must be a positive integer")
+    if not isinstance(arduino.get("timeout"), (int, float)):
+        raise ValueError("arduino.timeout must be a number")
+    for section, keys in (("volume", ("enabled", "default_value")), ("media", ("enabled",)), ("debug", ("enabled",))):
+        if not isinstance(config.get(section), dict) or any(key not in config[section] for key in keys):
+            raise ValueError(f"\"{section}\" section must contain {', '.join(keys)}")
+    log_level = config["debug"].get("log_level")
+    if log_level and str(log_level).upper() not in LEVELS:
+        raise ValueError(f"debug.log_level must be one of {', '.join(LEVELS)}")
+    devices = config.get("devices", [])
+    if not isinstance(devices, list) or not all(isinstance(device, dict) for device in devices):
+        raise ValueError("\"devices\" must be a list of objects")
+    for device in [arduino] + devices:
+        namespace = device.get("namespace")
+        # Prefixed commands are split at the first "_" ("PEDAL:VOLUME_3"), so a namespace must not contain one
+        if namespace and (not isinstance(namespace, str) or not NAMESPACE_PATTERN.fullmatch(namespace)):
+            raise ValueError(f"namespace {namespace!r} must contain only letters and digits")
+    count = config.get("buttons", {}).get("count", DEFAULT_BUTTON_COUNT)
+    if not isinstance(count, int) or count <= 0:
+        raise ValueError("buttons.count must be a positive integer")
+    profiles = config.get("profiles", {})
+    if not isinstance(profiles, dict) or not isinstance(profiles.get("apps", {}), dict):
+        raise ValueError("\"profiles\" must be an object with an optional \"apps\" object")
+    debounce = config.get("debounce", {})
+    if not isinstance(debounce, dict) or not isinstance(debounce.get("commands", {}), dict):
+        raise ValueError("\"debounce\" must be an object with an optional \"commands\" object")
+    for name, section in [("debounce", debounce)] + [(f"debounce.commands.{key}", value)
+                                                     for key, value in debounce.get("commands", {}).items()]:
+        if not isinstance(section, dict):
+            raise ValueError(f"{name} must be an object")
+        if section.get("edge", DEFAULT_EDGE) not in EDGES:
+            raise ValueError(f"{name}.edge must be one of {', '.join(EDGES)}")
+
+
+# Default configuration values
+DEFAULT_GPIO_CONFIG = {
+    "arduino": {
+        "port": "COM7",
+        "baudrate": 9600,
+        "timeout": 1,
+        "protocol": "auto"
+    },
+    "devices": [],
+    "volume": {
+        "enabled": True,
+        "default_value": 0,
+        "backend": "keypress",
+        "coalesce_ms": 30
+    },
+    "media": {
+        "enabled": True
+    },
+    "buttons": {
+        "count": 9
+    },
+    "actions": {
+        "max_workers": 4,
+        "max_in_flight": 16
+    },
+    "input": {
+        "backend": "auto"
+    },
+    "reconnect": {
+        "initial_delay_ms": 100,
+        "max_delay_ms": 500
+    },
+    "debounce": {
+        "min_interval_ms": 50,
+        "edge": "leading",
+        "max_per_second": 0,
+        "commands": {}
+    },
+    "gestures": {
+        "long_press_ms": 500,
+        "double_press_ms": 250,
+        "chord_ms": 80,
+        "repeat_ms": 300
+    },
+    "profiles": {
+        "auto_switch": False,
+        "apps": {}
+    },
+    "launcher": {
+        "helper": False
+    },
+    "http": {
+        "timeout_ms": 2000,
+        "pool_size": 4
+    },
+    "debug": {
+        "enabled": True,
+        "log_level": "DEBUG"
+    }
+}
+
+# Registered once: the listener and the GPIO settings dialog share this entry
+GPIO_CONFIG_FILE = os.path.join(get_app_data_dir(), "gpio_config.json")
+gpio_config = store.register("gpio", GPIO_CONFIG_FILE, defaults=DEFAULT_GPIO_CONFIG,
+                             validate=validate_gpio_config, view=GpioSettings.from_config, create=True)
@@ -4,7 +4,8 @@ import sys
 import tkinter as tk
 from tkinter import simpledialog, filedialog
 import webbrowser
-from gpio import execute_action
+from gpio import execute_action, get_settings
+from http_client import METHODS
 
 def get_resource_path(relative_path):
     """Get the absolute path to a resource, works for PyInstaller bundles and source"""
@@ -29,6 +30,8 @@ MEDIUM_FONT = None  # Add medium font for consistency
 SCREEN = None
 
 BTN_SIZE = 100
+BUTTONS_PER_PAGE = 9  # 3x3 grid; controllers with more buttons are shown in pages
+PAGER_BTN_SIZE = 30
 SPACING_X = 140
 SPACING_Y = 120
 MARGIN_Y = 20
@@ -42,6 +45,7 @@ CONFIG_BTN_HEIGHT = 40
 CONFIG_BTN_SPACING = 20
 CONFIG_INPUT_WIDTH = 540
 CONFIG_INPUT_HEIGHT = 30
+METHOD_BTN_WIDTH = 80
 
 # UI state variables - properly initialized
 cancel_button_rect = None
@@ -49,10 +53,17 @@ type_button_rects = {}
 browse_button_rect = None
 save_button_rect = None
 input_rect = None
+method_button_rect = None
+prev_page_rect = None
+next_page_rect = None
+
+# Page of the button grid being shown
+current_page = 0
 
 # Temporary configuration state
 temp_config_type = None
 temp_config_value = None
+temp_config_method = None
 
 # UI interaction state
 save_enabled = False
@@ -100,11 +111,13 @@ def update_cursor():
 
 def reset_ui_state():
     """Reset all UI state variables to ensure clean state"""
-    global temp_config_type, temp_config_value, save_enabled, save_clicked, input_active
+    global temp_config_type, temp_config_value, temp_config_method, save_enabled, save_clicked, input_active
     global cancel_button_rect, type_button_rects, browse_button_rect, save_button_rect, input_rect
+    global method_button_rect, current_page
     
     temp_config_type = None
     temp_config_value = None
+    temp_config_method = None
     save_enabled = False
     save_clicked = False
     input_active = False
@@ -114,13 +127,33 @@ def reset_ui_state():
     browse_button_rect = None
     save_button_rect = None
     input_rect = None
+    method_button_rect = None
+    current_page = 0
     
     print("[GUI DEBUG] UI state reset")
 
+def page_count():
+    """Number of 9-button pages for the configured button count"""
+    return max(1, -(-get_settings().button_count // BUTTONS_PER_PAGE))
+
+
+def change_page(step):
+    """Show the previous (-1) or next (+1) page of buttons"""
+    global current_page
+    current_page = (current_page + step) % page_count()
+
+
+def page_buttons():
+    """(grid position, button number) of the buttons on the current page"""
+    first = min(current_page, page_count() - 1) * BUTTONS_PER_PAGE
+    last = min(first + BUTTONS_PER_PAGE, get_settings().button_count)
+    return [(number - first, number + 1) for number in range(first, last)]
+
+
 def draw_buttons(config, selected=None):
     """
     Draw the main StreamDeck interface including:
-    - 9 button grid (3x3)
+    - 9 button grid (3x3), one page of the configured buttons
     - Status text
     - Configuration panel (if a button is selected)
     """
@@ -133,8 +166,8 @@ def draw_buttons(config, selected=None):
     total_width = 3 * BTN_SIZE + 2 * (SPACING_X - BTN_SIZE)
     start_x = (SCREEN_WIDTH - total_width) // 2
 
-    for i in range(9):
-        key = f"BUTTON_{i+1}"
+    for i, number in page_buttons():
+        key = f"BUTTON_{number}"
         x = start_x + (i % 3) * SPACING_X
         y = MARGIN_Y + (i // 3) * SPACING_Y
 
@@ -150,7 +183,7 @@ def draw_buttons(config, selected=None):
         pygame.draw.rect(SCREEN, border_color, (x, y, BTN_SIZE, BTN_SIZE), width=3, border_radius=8)
 
         # Button number
-        num_text = FONT.render(str(i+1), True, (255, 255, 255))
+        num_text = FONT.render(str(number), True, (255, 255, 255))
         num_x = x + (BTN_SIZE - num_text.get_width()) // 2
         num_y = y + (BTN_SIZE - num_text.get_height()) // 2
         SCREEN.blit(num_text, (num_x, num_y))
@@ -161,9 +194,12 @@ def draw_buttons(config, selected=None):
 
     # === STATUS TEXT ===
     if selected:
-        text = f"Program button {selected[-1]}"
+        text = f"Program button {selected.rpartition('_')[2]}"
     else:
         text = "Click on a button to program it"
+    pages = page_count()
+    if pages > 1:
+        text = f"Page {current_page + 1}/{pages}  -  {text}"
 
     text_render = MEDIUM_FONT.render(text, True, (255, 255, 255))
     text_area_y = linea_y + 10
@@ -174,19 +210,32 @@ def draw_buttons(config, selected=None):
 
     SCREEN.blit(text_render, (text_x, text_y))
 
+    # === PAGE ARROWS ===
+    global prev_page_rect, next_page_rect
+    if pages > 1:
+        arrow_y = text_area_y + (text_area_height - PAGER_BTN_SIZE) // 2
+        prev_page_rect = pygame.Rect(start_x, arrow_y, PAGER_BTN_SIZE, PAGER_BTN_SIZE)
+        next_page_rect = pygame.Rect(start_x + total_width - PAGER_BTN_SIZE, arrow_y, PAGER_BTN_SIZE, PAGER_BTN_SIZE)
+        for rect, label in ((prev_page_rect, "<"), (next_page_rect, ">")):
+            pygame.draw.rect(SCREEN, (80, 80, 80), rect, border_radius=6)
+            arrow = FONT.render(label, True, (255, 255, 255))
+            SCREEN.blit(arrow, arrow.get_rect(center=rect.center))
+    else:
+        prev_page_rect = next_page_rect = None
+
     # === CONFIGURATION PANEL ===
     if selected:
         # Global variables for UI interaction
         global type_button_rects, cancel_button_rect, input_rect, browse_button_rect, save_button_rect
-        global temp_config_type, temp_config_value
+        global temp_config_type, temp_config_value, method_button_rect
         
         # Get current or temporary configuration
         data = config.get(selected, {"type": "none", "value": ""})
         button_type = temp_config_type if temp_config_type is not None else data.get("type", "none")
         value = temp_config_value if temp_config_value is not None else data.get("value", "")
 
-        # Draw action type buttons (LINK, EXE, NONE)
-        options = ["LINK", "EXE", "NONE"]
+        # Draw action type buttons (LINK, EXE, HTTP, NONE)
+        options = ["LINK", "EXE", "HTTP", "NONE"]
         config_panel_y = CONFIG_PANEL_Y
         total_width = len(options) * CONFIG_BTN_WIDTH + (len(options) - 1) * CONFIG_BTN_SPACING
         config_start_x = (SCREEN_WIDTH - total_width) // 2
@@ -208,14 +257,27 @@ def draw_buttons(config, selected=None):
         config_panel_y += CONFIG_BTN_HEIGHT + 15
 
         # Draw input fields based on selected type
-        if button_type == "link":
+        method_button_rect = None
+        if button_type in ("link", "http"):
             # URL input field
-            label = SMALL_FONT.render("ENTER URL:", True, (200, 200, 200))
+            label_text = "ENTER URL:" if button_type == "link" else "ENTER REQUEST URL AND METHOD:"
+            label = SMALL_FONT.render(label_text, True, (200, 200, 200))
             SCREEN.blit(label, (50, config_panel_y))
 
             config_panel_y += label.get_height() + 5
 
-            input_rect = pygame.Rect(50, config_panel_y, CONFIG_INPUT_WIDTH, CONFIG_INPUT_HEIGHT)
+            input_width = CONFIG_INPUT_WIDTH
+            if button_type == "http":
+                # Method toggle next to the URL field; click to cycle GET/POST/...
+                input_width -= METHOD_BTN_WIDTH + 10
+                method = get_http_method(data)
+                method_button_rect = pygame.Rect(50 + input_width + 10, config_panel_y,
+                                                 METHOD_BTN_WIDTH, CONFIG_INPUT_HEIGHT)
+                pygame.draw.rect(SCREEN, (200, 120, 40), method_button_rect, border_radius=5)
+                method_text = SMALL_FONT.render(method, True, (255, 255, 255))
+                SCREEN.blit(method_text, method_text.get_rect(center=method_button_rect.center))
+
+            input_rect = pygame.Rect(50, config_panel_y, input_width, CONFIG_INPUT_HEIGHT)
             
             # Input field background with focus indication
             if input_active:
@@ -243,7 +305,7 @@ def draw_buttons(config, selected=None):
                     text_width = 0
                 else:
                     # Show placeholder when inactive
-                    placeholder = "https://example.com"
+                    placeholder = "https://example.com" if button_type == "link" else "http://127.0.0.1:8123/api/webhook/..."
                     color_placeholder = (150, 150, 150)
                     render_text = SMALL_FONT.render(placeholder, True, color_placeholder)
                     SCREEN.blit(render_text, (text_x, text_y))
@@ -373,6 +435,28 @@ def draw_buttons(config, selected=None):
     pygame.display.flip()
 
 
+def saved_http_method(data):
+    """Method an http button config is sent with (GET, or POST if it has a body)"""
+    if data.get("type") != "http":
+        return "GET"
+    if data.get("method"):
+        return str(data["method"]).upper()
+    return "POST" if data.get("body") not in (None, "") else "GET"
+
+
+def get_http_method(data):
+    """Method shown for an http button: the pending choice, else the saved one"""
+    if temp_config_method is not None:
+        return temp_config_method
+    return saved_http_method(data)
+
+
+def next_http_method(method):
+    """Method after the given one in the GUI toggle"""
+    index = METHODS.index(method) if method in METHODS else -1
+    return METHODS[(index + 1) % len(METHODS)]
+
+
 def is_dirty(selected, config):
     """Check if current button configuration has unsaved changes"""
     global temp_config_type, temp_config_value
@@ -400,23 +484,25 @@ def is_dirty(selected, config):
     # Check if there are actual changes
     type_changed = current_type != saved_type
     value_changed = str(current_value).strip() != str(saved_value).strip()
+    method_changed = (current_type == "http" and temp_config_method is not None
+                      and temp_config_method != saved_http_method(current))
     
     # Debug logging for troubleshooting
-    if type_changed or value_changed:
+    if type_changed or value_changed or method_changed:
         print(f"[GUI DEBUG] Button {selected} dirty - Type: {saved_type} -> {current_type}, Value: '{saved_value}' -> '{current_value}'")
     
-    return type_changed or value_changed
+    return type_changed or value_changed or method_changed
 
 
 def find_button_click(mx, my):
     total_width = 3 * BTN_SIZE + 2 * (SPACING_X - BTN_SIZE)
     start_x = (SCREEN_WIDTH - total_width) // 2
 
-    for i in range(9):
+    for i, number in page_buttons():
         x = start_x + (i % 3) * SPACING_X
         y = MARGIN_Y + (i // 3) * SPACING_Y
         if x <= mx <= x + BTN_SIZE and y <= my <= y + BTN_SIZE:
-            return f"BUTTON_{i+1}"
+            return f"BUTTON_{number}"
     return None
 
 
@@ -437,11 +523,12 @@ def configure_button(button_key, config):
         except:
             pass  # Ignore if icon file doesn't exist
 
+    current = config.get(button_key, {"type": "none", "value": ""})
     choice_var = tk.StringVar(root)
-    choice_var.set(config[button_key]["type"])
+    choice_var.set(current["type"])
 
     value_var = tk.StringVar(root)
-    value_var.set(config[button_key].get("value", ""))
+    value_var.set(current.get("value", ""))
 
     def update_value_widget(button_type):
         for widget in root.pack_slaves():
@@ -457,6 +544,15 @@ def configure_button(button_key, config):
             tk.Button(root, text="Test Action", command=lambda: webbrowser.open(value_var.get())).pack()
             tk.Button(root, text="Save", command=save).pack()
 
+        elif button_type == "http":
+            tk.Label(root, text="Enter request URL:").pack()
+            entry = tk.Entry(root, width=50, textvariable=value_var)
+            entry.pack()
+            entry.is_value_widget = True
+
+            tk.Button(root, text="Test Action", command=lambda: execute_action({"type": "http", "value": value_var.get()})).pack()
+            tk.Button(root, text="Save", command=save).pack()
+
         elif button_type == "exe":
             def open_file():
                 path = filedialog.askopenfilename(title="Select executable file")
@@ -478,7 +574,7 @@ def configure_button(button_key, config):
         root.destroy()
 
     tk.Label(root, text="Select action type:").pack()
-    tk.OptionMenu(root, choice_var, "link", "exe", "none", command=update_value_widget).pack()
+    tk.OptionMenu(root, choice_var, "link", "exe", "http", "none", command=update_value_widget).pack()
     update_value_widget(choice_var.get())
 
     root.mainloop()
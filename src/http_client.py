@@ -0,0 +1,107 @@
+"""
+HTTP action client for StreamDeck
+HTTP 请求动作（连接池 + keep-alive）
+
+"http" buttons call a URL directly instead of opening it in the browser,
+for local endpoints such as an OBS websocket bridge, Home Assistant or a
+webhook:
+
+    "BUTTON_4": {"type": "http", "value": "http://127.0.0.1:8123/api/webhook/lights",
+                 "method": "POST", "body": {"on": true}, "timeout": 2}
+
+- method: GET, POST, PUT, PATCH or DELETE (default GET, or POST if a body is set)
+- body: a string is sent as-is, an object/list as JSON
+- headers: optional object of extra request headers
+- timeout: seconds, default http.timeout_ms from gpio_config.json
+
+All requests share one requests.Session whose adapter keeps up to
+http.pool_size keep-alive connections per host, so repeated presses reuse
+an open socket instead of connecting (and TLS handshaking) every time.
+requests is imported on the first http action, not at startup.
+"""
+
+import threading
+
+from app_logging import get_logger, DEBUG
+
+log = get_logger("HTTP")
+
+DEFAULT_TIMEOUT_MS = 2000
+DEFAULT_POOL_SIZE = 4
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+
+class HttpClient:
+    """Sends http actions over a pooled keep-alive session"""
+
+    def __init__(self, timeout_ms=DEFAULT_TIMEOUT_MS, pool_size=DEFAULT_POOL_SIZE):
+        self.timeout = max(0.1, timeout_ms / 1000.0)
+        self.pool_size = max(1, int(pool_size))
+        self.sent = 0
+        self.failed = 0
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    # pool_connections: hosts kept, pool_maxsize: sockets per host (one per action worker)
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers["User-Agent"] = "StreamDeck"
+                    self._session = session
+                session = self._session
+        return session
+
+    def send(self, action):
+        """Perform an http action; returns the status code, or None if the request failed"""
+        url = action["value"]
+        body = action.get("body")
+        method = str(action.get("method") or ("POST" if body not in (None, "") else "GET")).upper()
+        if method not in METHODS:
+            log.error("Unsupported HTTP method for %s: %s", url, method)
+            self.failed += 1
+            return None
+        options = {"timeout": action.get("timeout") or self.timeout}
+        if isinstance(action.get("headers"), dict):
+            options["headers"] = action["headers"]
+        if isinstance(body, (dict, list)):
+            options["json"] = body
+        elif body not in (None, ""):
+            options["data"] = str(body).encode("utf-8")
+        try:
+            response = self._get_session().request(method, url, **options)
+            # Read the body so the connection goes back to the pool
+            response.content
+        except Exception as e:
+            self.failed += 1
+            log.error("%s %s failed: %s", method, url, e)
+            return None
+        self.sent += 1
+        if response.status_code >= 400:
+            log.warning("%s %s -> %d", method, url, response.status_code)
+        elif DEBUG.enabled:
+            log.debug("%s %s -> %d in %.1f ms", method, url, response.status_code,
+                      response.elapsed.total_seconds() * 1000)
+        return response.status_code
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def get_stats(self):
+        """Request counters (for debugging/status)"""
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "pool_size": self.pool_size,
+            "session": self._session is not None,
+        }
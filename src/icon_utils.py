@@ -7,6 +7,9 @@ import os
 import sys
 from PIL import Image
 import pygame
+from app_logging import get_logger, DEBUG
+
+log = get_logger("ICON")
 
 
 def get_resource_path(relative_path):
@@ -48,14 +51,16 @@ def find_icon_file():
         icon_path4 = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'icon.ico')
         possible_paths.append(icon_path4)
     
-    print(f"[ICON] Searching for icon in paths:")
+    if DEBUG.enabled:
+        log.debug("Searching for icon in paths:")
     for i, path in enumerate(possible_paths, 1):
         exists = os.path.exists(path)
-        print(f"[ICON]   {i}. {path} - {'EXISTS' if exists else 'NOT FOUND'}")
+        if DEBUG.enabled:
+            log.debug("  %s. %s - %s", i, path, 'EXISTS' if exists else 'NOT FOUND')
         if exists:
             return path
     
-    print("[ICON] No icon file found in any location")
+    log.info("No icon file found in any location")
     return None
 
 
@@ -64,19 +69,20 @@ def set_tkinter_window_icon(window):
     try:
         icon_path = find_icon_file()
         if icon_path:
-            print(f"[ICON] Setting Tkinter window icon from: {icon_path}")
-            # Check file size for debugging
-            file_size = os.path.getsize(icon_path)
-            print(f"[ICON] Icon file size: {file_size} bytes")
+            if DEBUG.enabled:
+                log.debug("Setting Tkinter window icon from: %s", icon_path)
+                # Check file size for debugging
+                log.debug("Icon file size: %s bytes", os.path.getsize(icon_path))
             
             window.iconbitmap(default=icon_path)
-            print(f"[ICON] Tkinter window icon successfully set!")
+            log.debug("Tkinter window icon successfully set!")
             return True
         else:
-            print("[ICON] No icon file found for Tkinter window")
+            log.debug("No icon file found for Tkinter window")
     except Exception as e:
-        print(f"[ICON WARNING] Failed to set Tkinter window icon: {e}")
-        print(f"[ICON] Error details: {type(e).__name__}: {str(e)}")
+        log.warning("Failed to set Tkinter window icon: %s", e)
+        if DEBUG.enabled:
+            log.debug("Error details: %s: %s", type(e).__name__, e)
         # Don't print full traceback by default to reduce noise
     return False
 
@@ -86,16 +92,16 @@ def set_pygame_window_icon():
     try:
         icon_path = find_icon_file()
         if icon_path:
-            print(f"[ICON] Setting Pygame window icon from: {icon_path}")
+            log.debug("Setting Pygame window icon from: %s", icon_path)
             
             # Try direct loading first
             try:
                 icon_surface = pygame.image.load(icon_path)
                 pygame.display.set_icon(icon_surface)
-                print(f"[ICON] Pygame window icon successfully set!")
+                log.debug("Pygame window icon successfully set!")
                 return True
             except Exception as direct_error:
-                print(f"[ICON] Direct load failed: {direct_error}, trying PIL conversion")
+                log.debug("Direct load failed: %s, trying PIL conversion", direct_error)
                 
                 # Try converting via PIL for better ICO support
                 from PIL import Image
@@ -108,13 +114,13 @@ def set_pygame_window_icon():
                 image_string = pil_image.tobytes()
                 icon_surface = pygame.image.fromstring(image_string, pil_image.size, 'RGBA')
                 pygame.display.set_icon(icon_surface)
-                print(f"[ICON] Pygame window icon set via PIL conversion!")
+                log.debug("Pygame window icon set via PIL conversion!")
                 return True
         else:
-            print("[ICON] No icon file found for Pygame window, creating fallback")
+            log.debug("No icon file found for Pygame window, creating fallback")
     except Exception as e:
-        print(f"[ICON WARNING] Failed to set Pygame window icon: {e}")
-        print("[ICON] Creating fallback icon for Pygame window")
+        log.warning("Failed to set Pygame window icon: %s", e)
+        log.debug("Creating fallback icon for Pygame window")
         
     # Create a fallback icon for pygame
     try:
@@ -123,10 +129,10 @@ def set_pygame_window_icon():
         # Draw a simple pattern
         pygame.draw.rect(icon_surface, (255, 255, 255), (8, 8, 16, 16))
         pygame.display.set_icon(icon_surface)
-        print("[ICON] Pygame fallback window icon created")
+        log.debug("Pygame fallback window icon created")
         return True
     except Exception as fallback_error:
-        print(f"[ICON WARNING] Failed to create fallback icon: {fallback_error}")
+        log.warning("Failed to create fallback icon: %s", fallback_error)
     
     return False
 
@@ -136,13 +142,13 @@ def load_pil_icon():
     try:
         icon_path = find_icon_file()
         if icon_path:
-            print(f"[ICON] Loading PIL icon from: {icon_path}")
+            log.debug("Loading PIL icon from: %s", icon_path)
             return Image.open(icon_path)
     except Exception as e:
-        print(f"[ICON WARNING] Failed to load PIL icon: {e}")
+        log.warning("Failed to load PIL icon: %s", e)
     
     # Create fallback PIL image
-    print("[ICON] Creating fallback PIL icon")
+    log.debug("Creating fallback PIL icon")
     image = Image.new('RGBA', (64, 64), color=(0, 0, 0, 0))  # Transparent background
     from PIL import ImageDraw
     draw = ImageDraw.Draw(image)
@@ -162,5 +168,5 @@ def load_pil_icon():
             color = (255, 140, 0) if (i + j) % 2 == 0 else (100, 180, 255)
             draw.rectangle([x1, y1, x2, y2], fill=color, outline=(255, 255, 255), width=1)
     
-    print("[ICON] Fallback PIL icon created successfully")
+    log.debug("Fallback PIL icon created successfully")
     return image
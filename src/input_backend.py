@@ -0,0 +1,207 @@
+"""
+Input injection backends for StreamDeck
+按键/媒体键注入后端
+
+All simulated key presses (volume, mute, media) go through one backend
+object with a single method, tap(vk_code, count). Every backend submits a
+whole batch of presses in one call, so a volume ramp of N steps is one
+system call instead of 2 x N keybd_event calls.
+
+- "sendinput": Windows, one SendInput call with an array of key events
+- "uinput":    Linux, one write of raw input events to a uinput device
+               (needs the optional evdev package and access to /dev/uinput)
+- "recording": records the last taps without sending anything (simulator,
+               benchmarks, CI)
+- "auto":      sendinput on Windows, uinput on Linux
+
+When the configured backend cannot be created, a NullBackend drops the
+taps and the failure is logged once as an error: volume and media keys do
+nothing until the backend is fixed, but nothing piles up in memory.
+"""
+
+import collections
+import os
+import struct
+import sys
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("INPUT")
+
+# Windows virtual key codes used by StreamDeck
+VK_VOLUME_MUTE = 0xAD
+VK_VOLUME_DOWN = 0xAE
+VK_VOLUME_UP = 0xAF
+VK_MEDIA_PLAY_PAUSE = 0xB3
+
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+INPUT_KEYBOARD = 1
+
+# Taps kept by the recording backend (older ones are discarded)
+RECORDING_LIMIT = 10000
+
+
+class NullBackend:
+    """Drops taps; stands in when no real backend could be created"""
+
+    name = "null"
+
+    def __init__(self, reason=None):
+        self.reason = reason
+        self.dropped = 0
+
+    def tap(self, vk_code, count=1):
+        self.dropped += count
+
+    def close(self):
+        pass
+
+
+class RecordingBackend:
+    """Records the last taps instead of injecting them"""
+
+    name = "recording"
+
+    def __init__(self, limit=RECORDING_LIMIT):
+        self.events = collections.deque(maxlen=limit)
+        self._lock = threading.Lock()
+
+    def tap(self, vk_code, count=1):
+        with self._lock:
+            self.events.append((time.perf_counter(), vk_code, count))
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+
+    def close(self):
+        pass
+
+
+class SendInputBackend:
+    """Injects key presses on Windows with one batched SendInput call"""
+
+    name = "sendinput"
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [("dx", wintypes.LONG), ("dy", wintypes.LONG),
+                        ("mouseData", wintypes.DWORD), ("dwFlags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD),
+                        ("dwFlags", wintypes.DWORD), ("time", wintypes.DWORD),
+                        ("dwExtraInfo", ctypes.c_size_t)]
+
+        class HARDWAREINPUT(ctypes.Structure):
+            _fields_ = [("uMsg", wintypes.DWORD), ("wParamL", wintypes.WORD),
+                        ("wParamH", wintypes.WORD)]
+
+        class INPUTUNION(ctypes.Union):
+            _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("union", INPUTUNION)]
+
+        self._input_type = INPUT
+        self._input_size = ctypes.sizeof(INPUT)
+        self._send_input = ctypes.windll.user32.SendInput
+        self._send_input.argtypes = [wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int]
+        self._send_input.restype = wintypes.UINT
+
+    def tap(self, vk_code, count=1):
+        if count <= 0:
+            return
+        events = (self._input_type * (2 * count))()
+        for i in range(count):
+            down = events[2 * i]
+            down.type = INPUT_KEYBOARD
+            down.union.ki.wVk = vk_code
+            down.union.ki.dwFlags = KEYEVENTF_EXTENDEDKEY
+            up = events[2 * i + 1]
+            up.type = INPUT_KEYBOARD
+            up.union.ki.wVk = vk_code
+            up.union.ki.dwFlags = KEYEVENTF_EXTENDEDKEY | KEYEVENTF_KEYUP
+        sent = self._send_input(len(events), events, self._input_size)
+        if sent != len(events):
+            log.warning("SendInput injected %s of %s key events", sent, len(events))
+
+    def close(self):
+        pass
+
+
+class UinputBackend:
+    """Injects key presses on Linux through a virtual uinput keyboard"""
+
+    name = "uinput"
+
+    # struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+    _EVENT = struct.Struct("llHHi")
+    EV_SYN = 0x00
+    EV_KEY = 0x01
+    SYN_REPORT = 0
+
+    def __init__(self):
+        from evdev import UInput, ecodes
+        self._keys = {
+            VK_VOLUME_MUTE: ecodes.KEY_MUTE,
+            VK_VOLUME_DOWN: ecodes.KEY_VOLUMEDOWN,
+            VK_VOLUME_UP: ecodes.KEY_VOLUMEUP,
+            VK_MEDIA_PLAY_PAUSE: ecodes.KEY_PLAYPAUSE,
+        }
+        self._device = UInput({ecodes.EV_KEY: list(self._keys.values())}, name="StreamDeck")
+        self._taps = {}
+
+    def _tap_bytes(self, vk_code):
+        """Raw events for one press + release, built once per key"""
+        data = self._taps.get(vk_code)
+        if data is None:
+            key = self._keys.get(vk_code)
+            if key is None:
+                return None
+            event = self._EVENT.pack
+            data = (event(0, 0, self.EV_KEY, key, 1) + event(0, 0, self.EV_SYN, self.SYN_REPORT, 0) +
+                    event(0, 0, self.EV_KEY, key, 0) + event(0, 0, self.EV_SYN, self.SYN_REPORT, 0))
+            self._taps[vk_code] = data
+        return data
+
+    def tap(self, vk_code, count=1):
+        data = self._tap_bytes(vk_code)
+        if data is None:
+            log.warning("No uinput mapping for virtual key 0x%02X", vk_code)
+            return
+        if count > 0:
+            os.write(self._device.fd, data * count)
+
+    def close(self):
+        self._device.close()
+
+
+BACKENDS = {
+    "sendinput": SendInputBackend,
+    "uinput": UinputBackend,
+    "recording": RecordingBackend,
+}
+
+
+def create_input_backend(name="auto"):
+    """Create the configured backend, or a NullBackend (logged once) when it is unavailable"""
+    if name == "auto":
+        name = "sendinput" if sys.platform == "win32" else "uinput"
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        reason = f"unknown input backend '{name}'"
+    else:
+        try:
+            return backend_class()
+        except Exception as e:
+            reason = f"{name} input backend unavailable ({e})"
+    log.error("%s - volume, mute and media keys are disabled", reason)
+    return NullBackend(reason)
@@ -0,0 +1,145 @@
+"""
+Latency statistics for StreamDeck
+串口到动作的端到端延迟统计
+
+The serial pipeline stamps every event with time.perf_counter() (monotonic)
+when its bytes are read, when the batch has been parsed, when the handler
+has been dispatched and, for button actions, when the action starts and
+finishes on the worker pool. The differences are aggregated here into
+fixed-size histograms per event type and stage, so recording a sample is a
+bucket lookup and never allocates, and p50/p95/p99 can be read at any time.
+
+Stages:
+- "parse":    bytes read -> line decoded
+- "dispatch": line decoded -> handler returned (action queued, key sent)
+- "queue":    action queued -> action started on a worker
+- "run":      action started -> action finished
+- "total":    bytes read -> action finished (or handler returned)
+"""
+
+import bisect
+import json
+import threading
+
+STAGES = ("parse", "dispatch", "queue", "run", "total")
+
+# Bucket upper bounds in seconds: 1 us to ~100 s, 12 buckets per decade
+# (each bucket is ~21% wider than the previous, so percentiles are within ~10%)
+BUCKET_BOUNDS = tuple(10 ** (exponent / 12.0) * 1e-6 for exponent in range(0, 97))
+
+
+def event_type(line):
+    """Group serial tokens into event types: BUTTON_3 -> "button", PEDAL:VOLUME_12 -> "volume" """
+    prefix = line.rpartition(":")[2].partition("_")[0]
+    return prefix.lower() if prefix.isalpha() else "other"
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds"""
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples (capped at the max)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(fraction * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        """Counts and percentiles in milliseconds"""
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "min_ms": round((self.minimum or 0.0) * 1000, 3),
+            "max_ms": round(self.maximum * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0
+        }
+
+
+class LatencyStats:
+    """Histograms per (event type, stage), safe to record from any thread"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, kind, stage):
+        # Caller holds the lock
+        key = (kind, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        return histogram
+
+    def record(self, kind, stage, seconds):
+        with self._lock:
+            self._histogram(kind, stage).record(seconds)
+
+    def record_event(self, kind, read_at, parsed_at, dispatched_at, complete=True):
+        """Record the serial-thread stages of one event
+
+        complete is False when the handler only queued an action; its total is
+        recorded by the worker once the action finishes.
+        """
+        with self._lock:
+            self._histogram(kind, "parse").record(parsed_at - read_at)
+            self._histogram(kind, "dispatch").record(dispatched_at - parsed_at)
+            if complete:
+                self._histogram(kind, "total").record(dispatched_at - read_at)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def snapshot(self):
+        """{event type: {stage: summary}} for status calls"""
+        with self._lock:
+            items = sorted(self._histograms.items(),
+                           key=lambda item: (item[0][0], STAGES.index(item[0][1])))
+            result = {}
+            for (kind, stage), histogram in items:
+                result.setdefault(kind, {})[stage] = histogram.summary()
+        return result
+
+    def format_report(self):
+        """Human-readable table of the current snapshot"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "No serial events recorded yet"
+        lines = [f"{'event':<8} {'stage':<9} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for kind, stages in snapshot.items():
+            for stage, summary in stages.items():
+                lines.append(f"{kind:<8} {stage:<9} {summary['count']:>7} {summary['p50_ms']:>9.3f} "
+                             f"{summary['p95_ms']:>9.3f} {summary['p99_ms']:>9.3f} {summary['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Write the snapshot as JSON, return the path"""
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=4)
+        return path
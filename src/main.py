@@ -1,5 +1,14 @@
-from gpio import listen_serial, select_button, get_selected_button, deselect_button
-from prefController import load_pref, save_pref
+import sys
+if "--launcher-helper" in sys.argv:
+    # Warm launcher helper (frozen build): spawn programs for the main process, nothing else
+    from process_launcher import helper_main
+    helper_main()
+    sys.exit(0)
+
+from gpio import listen_serial, select_button, get_selected_button, deselect_button, get_profiles
+from prefController import load_pref, save_pref, flush_pref, load_profiles, get_app_data_dir, DEFAULT_PROFILE
+from config_store import store
+from app_logging import configure_logging, default_log_file
 from gui import init_pygame, draw_buttons, find_button_click
 import pygame
 import pyperclip
@@ -15,10 +24,11 @@ def open_gui():
         # Reset UI state to ensure clean start
         gui.reset_ui_state()
         
-        # Load configuration with error handling
+        # Load configuration with error handling; the GUI edits the active profile
+        profile = get_profiles()[1]
         try:
-            config = load_pref()
-            print(f"[GUI] Loaded configuration with {len(config)} buttons")
+            config = dict(load_pref(profile))  # Editable copy of the read-only cached config
+            print(f"[GUI] Loaded profile {profile} with {len(config)} buttons")
         except Exception as e:
             print(f"[GUI ERROR] Failed to load preferences: {e}")
             return
@@ -32,6 +42,8 @@ def open_gui():
         # Initialize pygame with error handling
         try:
             init_pygame()
+            if profile != DEFAULT_PROFILE:
+                pygame.display.set_caption(f"StreamDeck - {profile}")
             pygame.key.set_repeat(300, 30)
             # Add FPS clock for better performance
             clock = pygame.time.Clock()
@@ -74,6 +86,7 @@ def open_gui():
                             print("[GUI DEBUG] Cancel button clicked")
                             gui.temp_config_type = None
                             gui.temp_config_value = None
+                            gui.temp_config_method = None
                             gui.save_enabled = False
                             gui.save_clicked = False
                             gui.input_active = False
@@ -86,34 +99,41 @@ def open_gui():
                         if hasattr(gui, "save_button_rect") and gui.save_button_rect and gui.save_button_rect.collidepoint(mx, my) and gui.save_enabled:
                             try:
                                 # Validate the configuration before saving
-                                new_type = gui.temp_config_type or "none"
-                                new_value = gui.temp_config_value or ""
+                                saved = config.get(selected, {"type": "none", "value": ""})
+                                new_type = gui.temp_config_type or saved.get("type", "none")
+                                new_value = gui.temp_config_value if gui.temp_config_value is not None else saved.get("value", "")
                                 
                                 # Additional validation for specific types
                                 if new_type == "link" and new_value.strip():
                                     if not (new_value.startswith("http://") or new_value.startswith("https://")):
                                         new_value = "https://" + new_value.strip()
+                                elif new_type == "http" and new_value.strip():
+                                    if "://" not in new_value:
+                                        new_value = "http://" + new_value.strip()
                                 elif new_type == "exe" and new_value.strip():
                                     if not os.path.exists(new_value):
                                         print(f"[GUI WARNING] Executable file not found: {new_value}")
                                 
-                                # Save the configuration
-                                config[selected] = {
-                                    "type": new_type,
-                                    "value": new_value
-                                }
+                                # Save the configuration; options set in pref.json (body, policy, ...)
+                                # are kept while the type stays the same
+                                entry = dict(saved) if saved.get("type") == new_type else {}
+                                entry.update({"type": new_type, "value": new_value})
+                                if new_type == "http":
+                                    entry["method"] = gui.get_http_method(saved)
+                                config[selected] = entry
                                 
                                 print(f"[GUI] Saving button {selected}: type={new_type}, value={new_value}")
                                 
                                 # Reset temporary state but keep button selected
                                 gui.temp_config_type = None
                                 gui.temp_config_value = None
+                                gui.temp_config_method = None
                                 gui.save_enabled = False
                                 gui.save_clicked = True
                                 gui.input_active = False
                                 
                                 # Save to file
-                                save_pref(config)
+                                save_pref(config, profile)
                                 
                                 # Reset clicked state
                                 gui.save_clicked = False
@@ -127,13 +147,21 @@ def open_gui():
                                 import traceback
                                 traceback.print_exc()
                                 
-                        # Click on one of the 3 exclusive buttons (LINK, EXE, NONE)
+                        # Click on the HTTP method toggle
+                        if selected and gui.method_button_rect and gui.method_button_rect.collidepoint(mx, my):
+                            current_config = config.get(selected, {"type": "none", "value": ""})
+                            gui.temp_config_method = gui.next_http_method(gui.get_http_method(current_config))
+                            gui.save_enabled = gui.is_dirty(selected, config)
+                            needs_redraw = True
+                        
+                        # Click on one of the exclusive type buttons (LINK, EXE, HTTP, NONE)
                         if selected and hasattr(gui, "type_button_rects") and gui.type_button_rects:
                             for name, rect in gui.type_button_rects.items():
                                 if rect and rect.collidepoint(mx, my):
                                     button_type = name.lower()
                                     old_type = gui.temp_config_type
                                     gui.temp_config_type = button_type
+                                    gui.temp_config_method = None
                                     
                                     print(f"[GUI DEBUG] Button type changed: {old_type} -> {button_type}")
                                     
@@ -158,7 +186,7 @@ def open_gui():
                                     break
                                 
                         # Click on "Browse"
-                        if selected and (gui.temp_config_type or config[selected]["type"]) == "exe":
+                        if selected and (gui.temp_config_type or config.get(selected, {}).get("type")) == "exe":
                             if hasattr(gui, "browse_button_rect") and gui.browse_button_rect.collidepoint(mx, my):
                                 try:
                                     from tkinter import filedialog
@@ -180,7 +208,13 @@ def open_gui():
                                 except Exception as e:
                                     print(f"[GUI ERROR] Failed to open file dialog: {e}")
                                     
-                        # Click on one of the buttons 1-9
+                        # Click on the page arrows
+                        for rect, step in ((gui.prev_page_rect, -1), (gui.next_page_rect, 1)):
+                            if rect and rect.collidepoint(mx, my):
+                                gui.change_page(step)
+                                needs_redraw = True
+                        
+                        # Click on one of the buttons of the current page
                         btn = find_button_click(mx, my)
                         if btn:
                             current_selected = get_selected_button()
@@ -194,6 +228,7 @@ def open_gui():
                                 # Reset temporary configuration state when selecting a new button
                                 gui.temp_config_type = None
                                 gui.temp_config_value = None
+                                gui.temp_config_method = None
                                 gui.save_enabled = False
                                 gui.input_active = False
                                 
@@ -276,7 +311,8 @@ def open_gui():
         except:
             pass
         
-        # Signal the serial thread to reload config after GUI closes
+        # Write saves still being coalesced, then signal the serial thread to reload config
+        flush_pref()
         try:
             from gpio import signal_config_reload
             signal_config_reload()
@@ -287,14 +323,22 @@ def open_gui():
 def start_serial_background():
     """Start serial listening in background thread with config reload capability"""
     import threading
-    from gpio import listen_serial_with_reload
+    from gpio import listen_serial_with_reload, start_config_watcher
     
     # Start the enhanced serial listener that can reload config
     serial_thread = threading.Thread(target=listen_serial_with_reload, daemon=True)
     serial_thread.start()
     print("[MAIN] Serial monitoring started in background")
+    
+    # Pick up edits to pref.json / gpio_config.json made outside the GUI
+    try:
+        start_config_watcher()
+    except Exception as e:
+        print(f"[MAIN WARNING] Config file watcher not started: {e}")
 
 def main():
+    # Also keep a rotating log next to the app (a windowed build has no console)
+    configure_logging(log_file=default_log_file(get_app_data_dir()))
     print("StreamDeck - Starting background service...")
     
     # Check for command line parameters
@@ -318,7 +362,10 @@ def main():
                 print(f"[MAIN ERROR] Failed to open button configuration: {e}")
                 return
     
-    # Normal startup - start background service and tray
+    # Normal startup - read every config file once (the listener, tray and GUI share the
+    # parsed configs), then start background service and tray
+    load_profiles()
+    store.load_all()
     start_serial_background()
     # Run system tray (this blocks until quit)
     tray.create_tray_icon(open_gui)
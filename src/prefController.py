@@ -1,129 +1,123 @@
 import os
-import json
-import sys
-from functools import lru_cache
-
-def get_app_data_dir():
-    """Get the directory where the application should store its data files"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-    return app_dir
+from collections.abc import Mapping
+from types import MappingProxyType
+from app_logging import get_logger
+from config_store import store, get_app_data_dir
+from process_launcher import POLICIES
+
+log = get_logger("PREF")
 
 PREF_FILE = os.path.join(get_app_data_dir(), "pref.json")
 
-# Cache for configuration with file modification time
-_config_cache = {}
-_config_mtime = 0
+# Named profiles: profiles/<name>.json, same format as pref.json (the "Default" profile)
+PROFILES_DIR = os.path.join(get_app_data_dir(), "profiles")
+DEFAULT_PROFILE = "Default"
 
-def load_pref():
-    global _config_cache, _config_mtime
-    
-    print(f"[DEBUG] Loading config from: {PREF_FILE}")
-    
-    # Check if file exists and get modification time
-    if os.path.exists(PREF_FILE):
-        current_mtime = os.path.getmtime(PREF_FILE)
-        
-        # Return cached config if file hasn't changed
-        if current_mtime == _config_mtime and _config_cache:
-            print("[DEBUG] Using cached config (no file changes)")
-            return _config_cache
-        
-        # Load and cache new config
-        try:
-            with open(PREF_FILE, "r") as f:
-                config = json.load(f)
-                _config_cache = config
-                _config_mtime = current_mtime
-                print("[DEBUG] Config loaded and cached:", json.dumps(config, indent=2))
-                return config
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"[DEBUG ERROR] Failed to load config: {e}")
-            # Fall through to default config
-    
-    # Create default config
-    print("[DEBUG] Config file not found, creating default config.")
-    config = {}
-    for i in range(1, 10):
-        config[f"BUTTON_{i}"] = {"type": "none", "value": ""}
-    config["BUTTON_1"] = {"type": "link", "value": "https://www.youtube.com"}
-    
-    # Cache the default config
-    _config_cache = config
-    _config_mtime = 0
-    return config
+# Every GUI save click saves the whole config; a burst of them is written once
+SAVE_DELAY_MS = 300
 
-def save_pref(config):
-    global _config_cache, _config_mtime
-    
+DEFAULT_PREF = {"BUTTON_1": {"type": "link", "value": "https://www.youtube.com"}}
+
+def profile_file(profile=None):
+    """Button config file of a profile (pref.json for the default profile)"""
+    if profile is None or profile == DEFAULT_PROFILE:
+        return PREF_FILE
+    return os.path.join(PROFILES_DIR, profile + ".json")
+
+def list_profiles():
+    """Names of the named profiles, sorted (the default profile is not included)"""
     try:
-        print(f"[DEBUG] Saving config to: {PREF_FILE}")
-        print(f"[DEBUG] App data directory: {get_app_data_dir()}")
-        
-        # Validate config structure before saving
-        if not isinstance(config, dict):
-            raise ValueError("Configuration must be a dictionary")
-        
-        # Ensure all button configurations have required fields
-        cleaned_config = {}
-        for button_key, button_config in config.items():
-            if isinstance(button_config, dict):
-                cleaned_config[button_key] = {
-                    "type": button_config.get("type", "none"),
-                    "value": str(button_config.get("value", "")).strip()
-                }
-            else:
-                # Handle malformed button config
-                print(f"[DEBUG WARNING] Invalid config for {button_key}, resetting to default")
-                cleaned_config[button_key] = {"type": "none", "value": ""}
-        
-        print(f"[DEBUG] Cleaned config being saved:", json.dumps(cleaned_config, indent=2))
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(PREF_FILE), exist_ok=True)
-        
-        # Write to temporary file first, then move to ensure atomic write
-        temp_file = PREF_FILE + ".tmp"
-        with open(temp_file, "w", encoding='utf-8') as f:
-            json.dump(cleaned_config, f, indent=2, ensure_ascii=False)
-        
-        # Move temp file to final location (atomic operation on most systems)
-        if os.path.exists(temp_file):
-            if os.path.exists(PREF_FILE):
-                os.remove(PREF_FILE)
-            os.rename(temp_file, PREF_FILE)
-        
-        # Update cache with new config and modification time
-        _config_cache = cleaned_config.copy()
-        _config_mtime = os.path.getmtime(PREF_FILE) if os.path.exists(PREF_FILE) else 0
-        
-        print(f"[DEBUG] Config saved successfully to: {PREF_FILE}")
-        
-        # Verify the file was created and has content
-        if os.path.exists(PREF_FILE):
-            file_size = os.path.getsize(PREF_FILE)
-            print(f"[DEBUG] File verification: {PREF_FILE} exists, size: {file_size} bytes")
-            
-            # Verify file can be read back
-            with open(PREF_FILE, "r", encoding='utf-8') as f:
-                verification_config = json.load(f)
-                print(f"[DEBUG] File verification: Successfully read back {len(verification_config)} button configs")
+        names = os.listdir(PROFILES_DIR)
+    except OSError:
+        return []
+    return sorted(name[:-5] for name in names
+                  if name.endswith(".json") and name[:-5] and name[:-5] != DEFAULT_PROFILE)
+
+def load_profiles():
+    """Button config of every named profile"""
+    return {name: load_pref(name) for name in list_profiles()}
+
+def _read_only(config):
+    """Read-only view of a button config (the config and each button's action)"""
+    return MappingProxyType({key: MappingProxyType(action) if isinstance(action, dict) else action
+                             for key, action in config.items()})
+
+def pref_config(profile=None):
+    """The config store entry of a profile's button config"""
+    default = profile is None or profile == DEFAULT_PROFILE
+    # A named profile starts out empty; unassigned buttons are simply absent
+    return store.register("pref:" + (DEFAULT_PROFILE if default else profile), profile_file(profile),
+                          defaults=DEFAULT_PREF if default else {}, validate=validate_pref,
+                          view=_read_only, indent=2)
+
+def invalidate_pref(profile=None):
+    """Forget the cached config of a profile, so the next load_pref reads the file"""
+    pref_config(profile).invalidate()
+
+def load_pref(profile=None):
+    """Button config of a profile as a read-only mapping (copy it to edit)
+
+    One os.stat per call; the file is only read and parsed when its
+    (mtime_ns, size, inode) changed.
+    """
+    return pref_config(profile).load()
+
+def validate_pref(config):
+    """Raise ValueError if a loaded button config cannot be used"""
+    if not isinstance(config, dict):
+        raise ValueError("button config must be a JSON object")
+    for button_key, button_config in config.items():
+        if not isinstance(button_config, dict) or not isinstance(button_config.get("type"), str):
+            raise ValueError(f"{button_key} must be an object with a \"type\"")
+
+def _clean_pref(config):
+    """Button config as it is written: required fields, known options, no unassigned buttons"""
+    # Validate config structure before saving
+    if not isinstance(config, Mapping):
+        raise ValueError("Configuration must be a dictionary")
+    
+    # Ensure all button configurations have required fields. Only assigned
+    # buttons are written, so a 64-key controller with a few bindings stays
+    # a few lines (a missing key means "none")
+    cleaned_config = {}
+    for button_key, button_config in config.items():
+        if isinstance(button_config, Mapping) and button_config.get("type", "none") == "none":
+            continue
+        if isinstance(button_config, Mapping):
+            cleaned_config[button_key] = {
+                "type": button_config.get("type", "none"),
+                "value": str(button_config.get("value", "")).strip()
+            }
+            # Keep action options (http method/body/headers/timeout, exe policy)
+            for option, option_value in button_config.items():
+                if option not in ("type", "value") and option_value is not None:
+                    cleaned_config[button_key][option] = option_value
+            policy = cleaned_config[button_key].get("policy")
+            if policy == "launch":
+                del cleaned_config[button_key]["policy"]  # The default, not stored
+            elif policy is not None and policy not in POLICIES:
+                log.warning("Unknown launch policy for %s: %s", button_key, policy)
+                del cleaned_config[button_key]["policy"]
         else:
-            print(f"[DEBUG ERROR] File was not created: {PREF_FILE}")
-            
+            # Handle malformed button config
+            log.warning("Invalid config for %s, dropping it", button_key)
+    return cleaned_config
+
+def save_pref(config, profile=None, wait=False):
+    """Save a profile's button config
+
+    Saves are coalesced: the file is written SAVE_DELAY_MS after the last
+    save of a burst, or at once with wait=True. load_pref returns the saved
+    config right away.
+    """
+    try:
+        pref_config(profile).save(_clean_pref(config), delay_ms=0 if wait else SAVE_DELAY_MS)
     except Exception as e:
-        print(f"[DEBUG ERROR] Failed to save config: {e}")
-        import traceback
-        traceback.print_exc()
-        
-        # Clean up temp file if it exists
-        temp_file = PREF_FILE + ".tmp"
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
\ No newline at end of file
+        log.error("Failed to save config: %s", e)
+
+def flush_pref():
+    """Write all queued saves now (also run at exit)"""
+    store.flush_all()
+
+# The default profile is always registered; named profiles are registered on first load
+pref_config()
@@ -0,0 +1,333 @@
+"""
+Process launcher for StreamDeck
+程序启动服务（预解析路径 + 异步回收）
+
+"exe" actions used to call subprocess.Popen(value) cold on every press:
+the path was searched for again, the child inherited our handles and full
+environment, and finished children were never waited for. Here:
+
+- prepare() resolves and validates each exe path once, when the button
+  config is loaded, and caches the result (missing files are reported then,
+  not on the first press)
+- launch() starts the child with a small, precomputed environment, no
+  inherited handles and the exe's folder as working directory; GUI programs
+  are detached from our console/session with DEVNULL stdio, console
+  programs (.bat/.cmd scripts, console-subsystem .exe) get a console window
+  of their own, as when they are started from Explorer
+- a single reaper thread waits for finished children
+- optionally ("launcher": {"helper": true}) a small helper process is kept
+  running and does the spawning, so a launch from the app is one pipe
+  round trip (request in, pid out); if the helper dies, launches fall back
+  to spawning directly
+
+Each exe button can have a "policy" in pref.json:
+- "launch" (default): start a new instance on every press
+- "focus-if-running": bring the running instance to the front instead
+- "toggle": close the running instance, or start it if none is running
+The running check is a lookup in the cached ProcessTable.
+"""
+
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from app_logging import get_logger
+from process_table import ProcessTable, normalize_path
+
+log = get_logger("LAUNCH")
+
+REAP_INTERVAL = 1.0
+HELPER_ARGUMENT = "--launcher-helper"
+
+POLICIES = ("launch", "focus-if-running", "toggle")
+
+CONSOLE_SCRIPTS = (".bat", ".cmd")
+IMAGE_SUBSYSTEM_WINDOWS_CUI = 3
+
+# Variables a launched program may need; everything else stays with us
+WINDOWS_ENV = ("SYSTEMROOT", "WINDIR", "SYSTEMDRIVE", "COMSPEC", "PATH", "PATHEXT", "TEMP", "TMP",
+               "USERNAME", "USERDOMAIN", "USERPROFILE", "HOMEDRIVE", "HOMEPATH", "APPDATA", "LOCALAPPDATA",
+               "PROGRAMDATA", "ALLUSERSPROFILE", "PUBLIC", "PROGRAMFILES", "PROGRAMFILES(X86)", "PROGRAMW6432",
+               "COMMONPROGRAMFILES", "COMMONPROGRAMFILES(X86)", "COMPUTERNAME", "OS",
+               "PROCESSOR_ARCHITECTURE", "NUMBER_OF_PROCESSORS")
+POSIX_ENV = ("PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "LC_ALL", "TMPDIR", "DISPLAY",
+             "WAYLAND_DISPLAY", "XAUTHORITY", "XDG_RUNTIME_DIR", "XDG_SESSION_TYPE", "DBUS_SESSION_BUS_ADDRESS")
+
+
+def minimal_environment(environ=None):
+    environ = os.environ if environ is None else environ
+    names = WINDOWS_ENV if sys.platform == "win32" else POSIX_ENV
+    return {name: environ[name] for name in names if name in environ}
+
+
+def popen_options(env, console=False):
+    """Keyword arguments for a child that inherits nothing
+
+    On Windows a console program gets a new console (and keeps its stdio
+    there); everything else is detached with DEVNULL stdio.
+    """
+    options = {
+        "env": env,
+        "close_fds": True,
+    }
+    if sys.platform == "win32" and console:
+        options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NEW_CONSOLE
+        return options
+    options.update(stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if sys.platform == "win32":
+        options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        options["start_new_session"] = True
+    return options
+
+
+def is_console_program(path):
+    """True for Windows programs that expect a console: scripts and console-subsystem executables"""
+    if sys.platform != "win32":
+        return False
+    extension = os.path.splitext(path)[1].lower()
+    if extension in CONSOLE_SCRIPTS:
+        return True
+    if extension not in (".exe", ".com"):
+        return False
+    try:
+        # PE header: e_lfanew at 0x3C, Subsystem at offset 68 of the optional header (PE32 and PE32+)
+        with open(path, "rb") as f:
+            header = f.read(0x40)
+            if len(header) < 0x40 or header[:2] != b"MZ":
+                return False
+            f.seek(int.from_bytes(header[0x3C:0x40], "little"))
+            pe = f.read(24 + 70)
+    except OSError:
+        return False
+    if len(pe) < 94 or pe[:4] != b"PE\0\0":
+        return False
+    return int.from_bytes(pe[24 + 68:24 + 70], "little") == IMAGE_SUBSYSTEM_WINDOWS_CUI
+
+
+class LaunchTarget:
+    """An exe action resolved to an argument list"""
+
+    __slots__ = ("value", "args", "cwd", "valid", "path", "console")
+
+    def __init__(self, value, args, cwd, valid):
+        self.value = value    # As written in pref.json
+        self.args = args      # [resolved program, arguments...]
+        self.cwd = cwd        # Program's folder (many Windows apps expect it)
+        self.valid = valid
+        self.path = normalize_path(args[0]) if valid else None  # Key in the process table
+        self.console = valid and is_console_program(args[0])   # Started in a console window of its own
+
+
+def resolve(value):
+    """Resolve "C:\\Tools\\app.exe", "notepad" or '"C:\\My App\\app.exe" --flag' to a LaunchTarget"""
+    value = value.strip()
+    if os.path.isfile(value):
+        path = os.path.abspath(value)
+        return LaunchTarget(value, [path], os.path.dirname(path), True)
+    try:
+        parts = shlex.split(value, posix=sys.platform != "win32")
+    except ValueError:
+        parts = [value]
+    if sys.platform == "win32":
+        parts = [part.strip('"') for part in parts]
+    if parts:
+        program = parts[0]
+        path = program if os.path.isfile(program) else shutil.which(program)
+        if path:
+            path = os.path.abspath(path)
+            return LaunchTarget(value, [path] + parts[1:], os.path.dirname(path), True)
+    return LaunchTarget(value, [value], None, False)
+
+
+class _Helper:
+    """Warm child process that spawns programs on request (see helper_main)"""
+
+    def __init__(self):
+        if getattr(sys, "frozen", False):
+            command = [sys.executable, HELPER_ARGUMENT]
+        else:
+            command = [sys.executable, os.path.abspath(__file__), HELPER_ARGUMENT]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, close_fds=True,
+                                        **({"creationflags": subprocess.CREATE_NO_WINDOW}
+                                           if sys.platform == "win32" else {}))
+        self._lock = threading.Lock()  # Requests from several action workers must not interleave
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def launch(self, target):
+        """Pid of the started program
+
+        Raises OSError if the helper is gone and RuntimeError if the program could not be started.
+        """
+        request = json.dumps({"args": target.args, "cwd": target.cwd, "console": target.console}) + "\n"
+        with self._lock:
+            self.process.stdin.write(request.encode("utf-8"))
+            self.process.stdin.flush()
+            reply = self.process.stdout.readline()
+        if not reply:
+            raise BrokenPipeError("launcher helper exited")
+        reply = json.loads(reply)
+        if reply.get("pid") is None:
+            raise RuntimeError(reply.get("error", "launch failed"))
+        return reply["pid"]
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+
+
+class ProcessLauncher:
+    """Launches exe actions; targets are resolved once and cached"""
+
+    def __init__(self, helper=False):
+        self.env = minimal_environment()
+        self.options = popen_options(self.env)
+        self.console_options = popen_options(self.env, console=True)
+        self.launched = 0
+        self._targets = {}
+        self._children = []
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._helper = None
+        self._table = None
+        if helper:
+            self._start_helper()
+
+    def prepare(self, value):
+        """LaunchTarget for an exe value, resolved on first use and cached"""
+        target = self._targets.get(value)
+        if target is None:
+            target = self._targets[value] = resolve(value)
+            if not target.valid:
+                log.warning("Executable not found: %s", value)
+        return target
+
+    def prepare_all(self, values, track=False):
+        """Resolve every exe of a button config up front and drop stale cache entries
+
+        track starts the process table, needed by "focus-if-running"/"toggle".
+        """
+        values = set(values)
+        self._targets = {value: target for value, target in self._targets.items() if value in values}
+        for value in values:
+            self.prepare(value)
+        if track and self._table is None:
+            try:
+                self._table = ProcessTable()
+            except Exception as e:
+                log.warning("Process table unavailable (%s), every press launches a new instance", e)
+
+    def launch(self, value, policy="launch"):
+        target = self.prepare(value)
+        if not target.valid:
+            # Unresolved: let the OS try the raw command, as before
+            self._spawn(value, None)
+            return
+        if policy in POLICIES[1:] and self._table is not None:
+            pids = self._table.running(target.path)
+            if pids:
+                if policy == "toggle":
+                    self._table.source.close(pids)
+                    self._table.discard(pids)  # Seen again on the next refresh if it stays open
+                    return
+                if self._table.source.focus(pids):
+                    return
+                # Running without a window (tray-only or stale pid): start it, most apps hand over to the running one
+        helper = self._helper
+        if helper is not None and helper.alive():
+            try:
+                pid = helper.launch(target)
+                self.launched += 1
+                if self._table is not None:
+                    self._table.add(pid, target.path)
+                return
+            except (OSError, ValueError) as e:
+                log.warning("Launcher helper failed (%s), launching directly", e)
+                self._helper = None
+                threading.Thread(target=self._start_helper, daemon=True).start()
+        process = self._spawn(target.args, target.cwd, target.console)
+        if self._table is not None:
+            self._table.add(process.pid, target.path)
+
+    def _spawn(self, args, cwd, console=False):
+        process = subprocess.Popen(args, cwd=cwd, **(self.console_options if console else self.options))
+        self.launched += 1
+        with self._lock:
+            self._children.append(process)
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="launch-reaper", daemon=True)
+                self._reaper.start()
+        return process
+
+    def _reap(self):
+        while True:
+            time.sleep(REAP_INTERVAL)
+            with self._lock:
+                self._children = [child for child in self._children if child.poll() is None]
+                if not self._children:
+                    self._reaper = None
+                    return
+
+    def _start_helper(self):
+        try:
+            self._helper = _Helper()
+        except Exception as e:
+            log.warning("Launcher helper not started: %s", e)
+
+    def close(self):
+        if self._table is not None:
+            self._table.stop()
+        if self._helper is not None:
+            self._helper.close()
+            self._helper = None
+
+    def get_stats(self):
+        """Launch counters (for debugging/status)"""
+        with self._lock:
+            running = len(self._children)
+        return {
+            "launched": self.launched,
+            "children": running,
+            "targets": len(self._targets),
+            "helper": self._helper is not None and self._helper.alive(),
+            "process_table": self._table is not None,
+        }
+
+
+def helper_main():
+    """Helper process loop: one JSON launch request per stdin line until stdin closes
+
+    Each request is answered with one JSON line on stdout: {"pid": ...} or {"error": ...}.
+    """
+    env = minimal_environment()
+    options = popen_options(env)
+    console_options = popen_options(env, console=True)
+    children = []
+    for line in sys.stdin.buffer:
+        try:
+            request = json.loads(line)
+            child = subprocess.Popen(request["args"], cwd=request.get("cwd"),
+                                     **(console_options if request.get("console") else options))
+            children.append(child)
+            reply = {"pid": child.pid}
+        except Exception as e:
+            reply = {"error": str(e)}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+        children = [child for child in children if child.poll() is None]
+
+
+if __name__ == "__main__":
+    if HELPER_ARGUMENT in sys.argv:
+        helper_main()
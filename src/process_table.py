@@ -0,0 +1,218 @@
+"""
+Process table for StreamDeck
+运行中程序缓存（增量刷新）
+
+Buttons with a "focus-if-running" or "toggle" policy need to know whether
+their program is already running. Scanning every process on each press
+would take tens of milliseconds on Windows, so a background thread keeps
+a table of program path -> pids instead:
+
+- each refresh lists the current pids (one cheap call) and only looks up
+  the image path of pids it has not seen before; vanished pids are dropped
+- processes we start ourselves are added the moment they are spawned
+- a press is then a dict lookup
+
+Windows uses EnumProcesses/QueryFullProcessImageNameW, and can bring a
+program's window to the front or ask it to close (WM_CLOSE). Elsewhere the
+table is built from /proc; closing sends SIGTERM and focusing is not
+available.
+"""
+
+import os
+import signal
+import sys
+import threading
+
+from app_logging import get_logger
+
+log = get_logger("LAUNCH")
+
+REFRESH_INTERVAL = 1.0
+
+
+def normalize_path(path):
+    """Comparable form of a program path (case-insensitive on Windows)"""
+    return os.path.normcase(os.path.realpath(path))
+
+
+class WindowsProcesses:
+    """EnumProcesses + QueryFullProcessImageNameW, window focus/close via user32"""
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    GW_OWNER = 4
+    SW_RESTORE = 9
+    WM_CLOSE = 0x0010
+    VK_MENU = 0x12
+    KEYEVENTF_KEYUP = 0x0002
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._kernel32.OpenProcess.restype = wintypes.HANDLE
+        self._kernel32.QueryFullProcessImageNameW.argtypes = [
+            wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)]
+        self._enum_callback = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self._pids = (wintypes.DWORD * 4096)()
+        self._name = ctypes.create_unicode_buffer(1024)
+
+    def pids(self):
+        needed = self._ctypes.c_ulong()
+        if not self._kernel32.K32EnumProcesses(self._pids, self._ctypes.sizeof(self._pids),
+                                               self._ctypes.byref(needed)):
+            raise self._ctypes.WinError(self._ctypes.get_last_error())
+        return set(self._pids[:needed.value // self._ctypes.sizeof(self._ctypes.c_ulong)])
+
+    def image_path(self, pid):
+        handle = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            size = self._ctypes.c_ulong(len(self._name))
+            if not self._kernel32.QueryFullProcessImageNameW(handle, 0, self._name, self._ctypes.byref(size)):
+                return None
+            return self._name.value
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+    def windows(self, pids):
+        """Visible top-level windows belonging to the given pids"""
+        found = []
+        pid = self._ctypes.c_ulong()
+
+        def collect(hwnd, _):
+            if self._user32.IsWindowVisible(hwnd) and not self._user32.GetWindow(hwnd, self.GW_OWNER):
+                self._user32.GetWindowThreadProcessId(hwnd, self._ctypes.byref(pid))
+                if pid.value in pids:
+                    found.append(hwnd)
+            return True
+
+        self._user32.EnumWindows(self._enum_callback(collect), 0)
+        return found
+
+    def focus(self, pids):
+        windows = self.windows(pids)
+        if not windows:
+            return False
+        hwnd = windows[0]
+        if self._user32.IsIconic(hwnd):
+            self._user32.ShowWindow(hwnd, self.SW_RESTORE)
+        # Windows only lets the foreground process hand over focus; a synthetic
+        # Alt tap makes us count as having received the last input
+        self._user32.keybd_event(self.VK_MENU, 0, 0, 0)
+        self._user32.keybd_event(self.VK_MENU, 0, self.KEYEVENTF_KEYUP, 0)
+        return bool(self._user32.SetForegroundWindow(hwnd))
+
+    def close(self, pids):
+        windows = self.windows(pids)
+        for hwnd in windows:
+            self._user32.PostMessageW(hwnd, self.WM_CLOSE, 0, 0)
+        if not windows:
+            for pid in pids:
+                _terminate(pid)
+
+
+class ProcFsProcesses:
+    """/proc/<pid>/exe on Linux"""
+
+    def pids(self):
+        return {int(name) for name in os.listdir("/proc") if name.isdigit()}
+
+    def image_path(self, pid):
+        try:
+            return os.readlink(f"/proc/{pid}/exe")
+        except OSError:
+            return None
+
+    def focus(self, pids):
+        # No portable way to raise a window; the launcher starts the program again instead
+        return False
+
+    def close(self, pids):
+        for pid in pids:
+            _terminate(pid)
+
+
+def _terminate(pid):
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass
+
+
+def create_process_source():
+    if sys.platform == "win32":
+        return WindowsProcesses()
+    if os.path.isdir("/proc"):
+        return ProcFsProcesses()
+    raise OSError("No process listing available on this platform")
+
+
+class ProcessTable:
+    """Program path -> running pids, refreshed incrementally in the background"""
+
+    def __init__(self, interval=REFRESH_INTERVAL, source=None):
+        self.interval = interval
+        self.source = source or create_process_source()
+        self._paths = {}    # pid -> normalized program path (None if it could not be read)
+        self._by_path = {}  # normalized program path -> set of pids
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.refresh()
+        threading.Thread(target=self._run, name="process-table", daemon=True).start()
+
+    def refresh(self):
+        current = self.source.pids()
+        new = [pid for pid in current if pid not in self._paths]
+        resolved = {}
+        for pid in new:
+            path = self.source.image_path(pid)
+            resolved[pid] = normalize_path(path) if path else None
+        with self._lock:
+            for pid in [pid for pid in self._paths if pid not in current]:
+                self._forget(pid)
+            for pid, path in resolved.items():
+                self._add(pid, path)
+
+    def _add(self, pid, path):
+        # Caller holds the lock
+        self._paths[pid] = path
+        if path is not None:
+            self._by_path.setdefault(path, set()).add(pid)
+
+    def _forget(self, pid):
+        # Caller holds the lock
+        path = self._paths.pop(pid, None)
+        pids = self._by_path.get(path)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._by_path[path]
+
+    def add(self, pid, path):
+        """Record a process we just started, without waiting for the next refresh"""
+        with self._lock:
+            self._forget(pid)
+            self._add(pid, path)
+
+    def discard(self, pids):
+        with self._lock:
+            for pid in pids:
+                self._forget(pid)
+
+    def running(self, path):
+        """Pids running the given normalized program path (empty set if none)"""
+        with self._lock:
+            return set(self._by_path.get(path, ()))
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning("Process table refresh failed: %s", e)
@@ -0,0 +1,189 @@
+"""
+Reconnect manager for StreamDeck
+串口热插拔重连与端口发现
+
+When a controller is unplugged, its next connection attempts are spaced
+with exponential backoff plus jitter, starting at a fraction of a second,
+so a re-plugged board is back within a few hundred milliseconds while a
+missing board costs almost nothing.
+
+Boards are remembered by USB identity (VID, PID and serial number), either
+from the config or learned from serial.tools.list_ports on the first
+successful connection. If Windows re-enumerates the board under another
+COM number (or Linux under another ttyACM), it is found again by identity.
+
+Enumerating ports (SetupAPI on Windows) can take a few hundred
+milliseconds, so it never runs on the serial thread per retry: a helper
+thread refreshes one shared port list, every device resolves against that
+list, and the serial thread is woken when the set of ports changed. While a
+board with a known identity is missing the list is refreshed every
+search_interval (about the backoff), otherwise at most once per
+ENUMERATE_INTERVAL.
+"""
+
+import random
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("GPIO")
+
+DEFAULT_INITIAL_DELAY_MS = 100
+DEFAULT_MAX_DELAY_MS = 500
+DEFAULT_JITTER = 0.2  # +/- 20% so several devices do not retry in lockstep
+ENUMERATE_INTERVAL = 1.0  # Seconds a port list is reused before it is refreshed
+SEARCH_INTERVAL_MIN = 0.1  # Refresh interval bounds while a known board is missing
+SEARCH_INTERVAL_MAX = 0.25
+
+
+def parse_usb_id(value):
+    """Accept 0x2341, "2341" (hex, as shown by list_ports) or None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    return int(str(value), 16)
+
+
+def list_ports():
+    """Currently enumerated serial ports (empty list if enumeration fails)"""
+    try:
+        import serial.tools.list_ports
+        return serial.tools.list_ports.comports()
+    except Exception as e:
+        log.warning("Could not enumerate serial ports: %s", e)
+        return []
+
+
+def identify_port(port, ports=None):
+    """(vid, pid, serial_number) of a port, or None for non-USB/unknown ports"""
+    for info in ports if ports is not None else list_ports():
+        if info.device == port and info.vid is not None:
+            return info.vid, info.pid, info.serial_number
+    return None
+
+
+def find_port(vid, pid, serial_number=None, preferred=None, exclude=(), ports=None):
+    """Port path of a board with the given USB identity, or None if it is not plugged in
+
+    With several identical boards and no serial number, the preferred
+    (last known) port wins, and ports used by other devices are skipped.
+    """
+    matches = []
+    for info in ports if ports is not None else list_ports():
+        if info.device in exclude:
+            continue
+        if vid is not None and info.vid != vid:
+            continue
+        if pid is not None and info.pid != pid:
+            continue
+        if serial_number and info.serial_number != serial_number:
+            continue
+        matches.append(info.device)
+    if preferred in matches:
+        return preferred
+    return matches[0] if matches else None
+
+
+def _port_set(ports):
+    return {(info.device, info.vid, info.pid, info.serial_number) for info in ports}
+
+
+class ReconnectManager:
+    """Schedules connection attempts and resolves which port a device is on"""
+
+    def __init__(self, initial_delay_ms=DEFAULT_INITIAL_DELAY_MS, max_delay_ms=DEFAULT_MAX_DELAY_MS,
+                 jitter=DEFAULT_JITTER, wakeup=None):
+        self.initial_delay = max(0.0, initial_delay_ms / 1000.0)
+        self.max_delay = max(self.initial_delay, max_delay_ms / 1000.0)
+        self.jitter = jitter
+        self.wakeup = wakeup        # Notified when a refresh finds added or removed ports
+        self.search_interval = min(SEARCH_INTERVAL_MAX, max(SEARCH_INTERVAL_MIN, self.initial_delay))
+        self._searching = {}        # Device name -> when its missing board was last looked for
+        self._ports = None          # Last enumeration (None until the first one finished)
+        self._ports_at = 0.0
+        self._enumerating = False
+        self._lock = threading.Lock()
+
+    def ports(self):
+        """Last enumerated ports, refreshed in the background once they are ENUMERATE_INTERVAL
+        (search_interval while a known board is missing) old
+
+        None until the first enumeration has finished.
+        """
+        with self._lock:
+            interval = self.search_interval if self._searching else ENUMERATE_INTERVAL
+            if not self._enumerating and time.perf_counter() - self._ports_at >= interval:
+                self._enumerating = True
+                threading.Thread(target=self._enumerate, name="port-enum", daemon=True).start()
+            return self._ports
+
+    def _enumerate(self):
+        # Keeps refreshing every search_interval while a known board is being looked for
+        while True:
+            self._refresh()
+            with self._lock:
+                if not self._is_searching():
+                    self._enumerating = False
+                    return
+            time.sleep(self.search_interval)
+
+    def _is_searching(self):
+        # Caller holds _lock. Devices retry at least every max_delay; older entries
+        # belong to devices that were removed from the config
+        cutoff = time.perf_counter() - 2 * self.max_delay - self.search_interval
+        for name, at in list(self._searching.items()):
+            if at < cutoff:
+                del self._searching[name]
+        return bool(self._searching)
+
+    def _refresh(self):
+        ports = list_ports()
+        with self._lock:
+            changed = self._ports is None or _port_set(ports) != _port_set(self._ports)
+            self._ports = ports
+            self._ports_at = time.perf_counter()
+        if changed and self.wakeup is not None:
+            # Devices waiting for a board retry right away instead of after their backoff
+            self.wakeup.notify()
+
+    def next_delay(self, failures):
+        """Backoff for the given number of consecutive failures (jittered)"""
+        delay = min(self.max_delay, self.initial_delay * (2 ** max(0, failures - 1)))
+        return delay * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def failed(self, device):
+        """Record a failed attempt and schedule the next one"""
+        device.failures += 1
+        device.retry_at = time.perf_counter() + self.next_delay(device.failures)
+
+    def connected(self, device):
+        """Reset the backoff and remember the board's USB identity"""
+        device.failures = 0
+        with self._lock:
+            self._searching.pop(device.name, None)
+        if device.vid is None:
+            ports = self.ports()
+            if ports is None:
+                # First connect before the first enumeration finished: enumerate once here
+                ports = list_ports()
+            identity = identify_port(device.port, ports)
+            if identity is not None:
+                device.vid, device.pid, device.serial_number = identity
+
+    def resolve_port(self, device, exclude=()):
+        """Port to try for a device, or None if a known board is not plugged in"""
+        if device.vid is None and device.pid is None and not device.serial_number:
+            return device.port  # Identity unknown: keep trying the configured port
+        with self._lock:
+            self._searching[device.name] = time.perf_counter()
+        ports = self.ports()
+        if ports is None:
+            return None  # Still enumerating; the wakeup after it retries
+        port = find_port(device.vid, device.pid, device.serial_number,
+                         preferred=device.port, exclude=exclude, ports=ports)
+        if port is not None and port != device.port:
+            log.info("%s found on %s (was %s)", device.name, port, device.port)
+            device.port = port
+        return port
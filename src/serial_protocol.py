@@ -0,0 +1,249 @@
+"""
+Serial protocol helpers for StreamDeck
+Arduino 串口协议解析（文本行 + 二进制帧）
+
+The Arduino sketch speaks two formats on the same wire:
+
+- Text lines (legacy): "BUTTON_3\\r\\n", "RELEASE_3\\r\\n", "VOLUME_42\\r\\n", "MUTE\\r\\n", "MEDIA\\r\\n"
+- Binary frames (negotiated): SYNC, OPCODE, PAYLOAD..., CRC8
+
+Text is pure ASCII, so the sync byte (0xA5) can never appear inside a line.
+That lets one decoder accept both formats at any time, which keeps the
+switch-over during negotiation and old sketches working without a mode flag.
+Binary frames are decoded back into the same text tokens, so the dispatch
+code in gpio.py does not need to know which format was used.
+"""
+
+# Frame layout
+FRAME_SYNC = 0xA5
+SYNC_BYTE = bytes([FRAME_SYNC])
+
+# Opcodes (BUTTON_n is encoded in the opcode itself: 0x80 | n)
+OP_MUTE = 0x01
+OP_MEDIA = 0x02
+OP_VOLUME = 0x03
+OP_RELEASE = 0x04
+OP_HELLO = 0x7F
+OP_BUTTON = 0x80
+
+# Payload length for each non-button opcode
+PAYLOAD_LENGTHS = {
+    OP_MUTE: 0,
+    OP_MEDIA: 0,
+    OP_VOLUME: 2,
+    OP_RELEASE: 1,
+    OP_HELLO: 1,
+}
+
+PROTOCOL_VERSION = 2  # 2: RELEASE_n frames
+
+# Host -> Arduino negotiation commands (plain text so old sketches can ignore them)
+BINARY_REQUEST = b"PROTO_BINARY\n"
+TEXT_REQUEST = b"PROTO_TEXT\n"
+
+# How many times the host asks for binary mode before assuming an old sketch
+BINARY_REQUEST_ATTEMPTS = 3
+
+# Longest text line we keep waiting for; anything longer is line noise
+MAX_LINE_LENGTH = 64
+
+# Size of the reusable receive buffer (a fast knob sweep is a few hundred bytes)
+BUFFER_SIZE = 4096
+
+
+def _build_crc8_table():
+    """Build the lookup table for CRC-8 (polynomial 0x07, init 0x00)"""
+    table = []
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+_CRC8_TABLE = _build_crc8_table()
+
+
+def crc8(data, start=0, end=None):
+    """Calculate the CRC-8 of data[start:end]"""
+    if end is None:
+        end = len(data)
+    crc = 0
+    table = _CRC8_TABLE
+    for i in range(start, end):
+        crc = table[crc ^ data[i]]
+    return crc
+
+
+def encode_frame(opcode, payload=b""):
+    """Encode a single binary frame (used by the simulator and for testing)"""
+    body = bytes([opcode]) + bytes(payload)
+    return SYNC_BYTE + body + bytes([crc8(body)])
+
+
+def encode_token(token):
+    """Encode a text token such as "BUTTON_3" or "VOLUME_-4" as a binary frame"""
+    if token.startswith("BUTTON_"):
+        return encode_frame(OP_BUTTON | int(token[7:]))
+    if token.startswith("RELEASE_"):
+        return encode_frame(OP_RELEASE, bytes([int(token[8:])]))
+    if token.startswith("VOLUME_"):
+        return encode_frame(OP_VOLUME, int(token[7:]).to_bytes(2, "big", signed=True))
+    if token == "MUTE":
+        return encode_frame(OP_MUTE)
+    if token == "MEDIA":
+        return encode_frame(OP_MEDIA)
+    raise ValueError(f"Token has no binary encoding: {token}")
+
+
+class StreamDecoder:
+    """Incremental decoder for a mixed text/binary serial byte stream
+
+    Bytes are drained from the port straight into one reusable buffer and
+    split in place, so a burst of encoder events costs one read call and no
+    intermediate bytes objects - only the final token strings are created.
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.binary_active = False
+        self.remote_version = None
+        self.text_lines = 0
+        self.frames = 0
+        self.crc_errors = 0
+
+    def reset(self):
+        """Forget any partial data (called after a reconnect)"""
+        self.start = 0
+        self.end = 0
+        self.binary_active = False
+        self.remote_version = None
+
+    def _make_room(self, needed):
+        """Move unparsed bytes to the front of the buffer when the tail is too short"""
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif len(self.buffer) - self.end < needed:
+            remaining = self.end - self.start
+            self.buffer[:remaining] = self.view[self.start:self.end]
+            self.start = 0
+            self.end = remaining
+        return min(needed, len(self.buffer) - self.end)
+
+    def read_from(self, ser):
+        """Drain everything waiting on the port into the buffer, return the byte count
+
+        Blocks for up to the port timeout only when nothing is waiting.
+        """
+        waiting = ser.in_waiting
+        if not waiting:
+            self._make_room(1)
+            got = ser.readinto(self.view[self.end:self.end + 1])
+            if not got:
+                return 0
+            self.end += got
+            waiting = ser.in_waiting
+            if not waiting:
+                return got
+        else:
+            got = 0
+        count = self._make_room(waiting)
+        read = ser.readinto(self.view[self.end:self.end + count]) or 0
+        self.end += read
+        return got + read
+
+    def append(self, data):
+        """Copy bytes read elsewhere into the buffer, return how many fit"""
+        count = self._make_room(len(data))
+        self.buffer[self.end:self.end + count] = data[:count]
+        self.end += count
+        return count
+
+    def feed(self, data):
+        """Append raw bytes and return the list of complete tokens decoded so far"""
+        data = memoryview(data)
+        tokens = []
+        while len(data):
+            count = self.append(data)
+            data = data[count:]
+            tokens.extend(self.decode())
+        return tokens
+
+    def decode(self):
+        """Decode every complete line or frame currently in the buffer"""
+        buf = self.buffer
+        view = self.view
+        tokens = []
+        pos = self.start
+        size = self.end
+        sync = -2  # Next sync byte position, looked up lazily and reused across lines
+
+        while pos < size:
+            if buf[pos] == FRAME_SYNC:
+                if pos + 1 >= size:
+                    break
+                opcode = buf[pos + 1]
+                payload_length = 0 if opcode & OP_BUTTON else PAYLOAD_LENGTHS.get(opcode)
+                if payload_length is None:
+                    # Unknown opcode - treat this sync byte as noise and resync
+                    self.crc_errors += 1
+                    pos += 1
+                    continue
+                end = pos + 3 + payload_length
+                if end > size:
+                    break
+                if crc8(buf, pos + 1, end - 1) != buf[end - 1]:
+                    self.crc_errors += 1
+                    pos += 1
+                    continue
+                token = self._decode_frame(opcode, buf, pos + 2, payload_length)
+                if token:
+                    tokens.append(token)
+                self.frames += 1
+                pos = end
+            else:
+                newline = buf.find(b"\n", pos, size)
+                if sync != -1 and sync < pos:
+                    sync = buf.find(SYNC_BYTE, pos, size)
+                if sync != -1 and (newline == -1 or sync < newline):
+                    # A frame started in the middle of a line, so the line is corrupt
+                    pos = sync
+                    continue
+                if newline == -1:
+                    if size - pos > MAX_LINE_LENGTH:
+                        pos = size
+                    break
+                # Trim CR/whitespace by index, then decode straight from the buffer
+                line_end = newline
+                while line_end > pos and buf[line_end - 1] <= 0x20:
+                    line_end -= 1
+                line_start = pos
+                while line_start < line_end and buf[line_start] <= 0x20:
+                    line_start += 1
+                if line_start < line_end:
+                    tokens.append(str(view[line_start:line_end], "utf-8", "ignore"))
+                    self.text_lines += 1
+                pos = newline + 1
+
+        self.start = pos
+        return tokens
+
+    def _decode_frame(self, opcode, buf, start, length):
+        """Turn a validated frame into its text token"""
+        if opcode & OP_BUTTON:
+            return f"BUTTON_{opcode & 0x7F}"
+        if opcode == OP_VOLUME:
+            return f"VOLUME_{int.from_bytes(buf[start:start + length], 'big', signed=True)}"
+        if opcode == OP_RELEASE:
+            return f"RELEASE_{buf[start]}"
+        if opcode == OP_MUTE:
+            return "MUTE"
+        if opcode == OP_MEDIA:
+            return "MEDIA"
+        if opcode == OP_HELLO:
+            self.binary_active = True
+            self.remote_version = buf[start]
+        return None
@@ -0,0 +1,391 @@
+"""
+Serial device simulator for StreamDeck
+无硬件串口模拟与回放测试
+
+Runs the real gpio.listen_serial_with_reload() against a fake Arduino so the
+serial pipeline can be exercised and measured on Linux/macOS without hardware.
+
+The fake device is a pseudo terminal: the listener opens the slave side
+through a stable symlink, the simulator writes events into the master side.
+It answers the PROTO_BINARY negotiation like the real sketch (or ignores it,
+to emulate an old sketch) and can drop and restore the connection.
+
+Usage:
+    python serial_simulator.py --scenario encoder-sweep --events 5000 --rate 2000
+    python serial_simulator.py --scenario button-storm --protocol text
+    python serial_simulator.py --scenario garbage --disconnect-every 1000
+    python serial_simulator.py --scenario button-storm --devices 3
+    python serial_simulator.py --scenario bouncy-buttons --events 200
+    python serial_simulator.py --replay recorded_events.txt
+
+Replay files contain one token per line ("BUTTON_3", "VOLUME_12", ...),
+optionally prefixed with a delay in milliseconds ("250 BUTTON_3").
+"""
+
+import argparse
+import collections
+import dataclasses
+import json
+import os
+import random
+import select
+import shutil
+import tempfile
+import threading
+import time
+
+from serial_protocol import (BINARY_REQUEST, TEXT_REQUEST, OP_HELLO, PROTOCOL_VERSION,
+                             encode_frame, encode_token)
+
+
+class FakeSerialDevice:
+    """A pty-backed fake Arduino reachable through a stable port path"""
+
+    def __init__(self, binary_capable=True, namespace=None):
+        import pty  # POSIX only
+        self._pty = pty
+        self.binary_capable = binary_capable
+        self.binary_mode = False
+        self.namespace = namespace
+        self.directory = tempfile.mkdtemp(prefix="streamdeck-sim-")
+        self.port = os.path.join(self.directory, "ttyFAKE0")
+        self.master = None
+        self.slave = None
+        self.host_commands = []
+        self._reader = None
+        self._stop_reader = threading.Event()
+        self.connect()
+
+    def connect(self):
+        """Create a fresh pty pair and point the port path at it (simulates plugging in)"""
+        import tty
+        self.master, self.slave = self._pty.openpty()
+        tty.setraw(self.slave)
+        if os.path.lexists(self.port):
+            os.remove(self.port)
+        os.symlink(os.ttyname(self.slave), self.port)
+        self.binary_mode = False
+        self._stop_reader.clear()
+        self._reader = threading.Thread(target=self._read_host, args=(self.master,), daemon=True)
+        self._reader.start()
+
+    def disconnect(self):
+        """Close the pty pair (simulates unplugging the Arduino)"""
+        # A read in progress keeps the master open, so stop the reader first
+        self._stop_reader.set()
+        if self._reader is not None:
+            self._reader.join()
+            self._reader = None
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.master = self.slave = None
+
+    def close(self):
+        self.disconnect()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _read_host(self, master):
+        """Answer negotiation commands the way the real sketch does"""
+        pending = b""
+        while not self._stop_reader.is_set():
+            try:
+                if not select.select([master], [], [], 0.05)[0]:
+                    continue
+                data = os.read(master, 256)
+            except OSError:
+                return
+            if not data:
+                return
+            pending += data
+            while b"\n" in pending:
+                line, pending = pending.split(b"\n", 1)
+                command = line.strip() + b"\n"
+                self.host_commands.append(command)
+                if command == BINARY_REQUEST and self.binary_capable:
+                    self.binary_mode = True
+                    self.write(encode_frame(OP_HELLO, bytes([PROTOCOL_VERSION])))
+                elif command == TEXT_REQUEST:
+                    self.binary_mode = False
+
+    def encode(self, token):
+        """Encode a token in whatever format the device currently speaks"""
+        if self.binary_mode:
+            try:
+                return encode_token(token)
+            except ValueError:
+                pass
+        return token.encode("ascii") + b"\r\n"
+
+    def write(self, data):
+        if self.master is None:
+            return 0
+        try:
+            return os.write(self.master, data)
+        except OSError:
+            return 0
+
+
+# Synthetic event streams: each yields (token or raw bytes, delay before it in seconds or None)
+
+def button_storm(count, buttons=9):
+    """Rapid presses cycling over all buttons"""
+    for i in range(count):
+        yield f"BUTTON_{i % buttons + 1}", None
+
+
+def encoder_sweep(count):
+    """Knob turned back and forth quickly"""
+    value = 0
+    direction = 1
+    for _ in range(count):
+        value += direction
+        if abs(value) >= 100:
+            direction = -direction
+        yield f"VOLUME_{value}", None
+
+
+def garbage_stream(count, noise_ratio=0.2, seed=1):
+    """Valid events interleaved with line noise and corrupted frames"""
+    rng = random.Random(seed)
+    tokens = ["BUTTON_1", "BUTTON_5", "MUTE", "MEDIA", "VOLUME_3"]
+    for _ in range(count):
+        if rng.random() < noise_ratio:
+            yield bytes(rng.randrange(256) for _ in range(rng.randrange(1, 12))), None
+        else:
+            yield rng.choice(tokens), None
+
+
+def bouncy_buttons(count, seed=1):
+    """Presses on cheap buttons: each one followed by 1-2 bounce copies a few ms later"""
+    rng = random.Random(seed)
+    for i in range(count):
+        token = f"BUTTON_{rng.randrange(9) + 1}"
+        yield token, 0.12 if i else None
+        for _ in range(rng.randrange(1, 3)):
+            yield token, rng.uniform(0.002, 0.008)
+
+
+def replay_file(path):
+    """Recorded stream: "TOKEN" or "DELAY_MS TOKEN" per line"""
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            parts = raw.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            if len(parts) >= 2:
+                yield parts[1], float(parts[0]) / 1000.0
+            else:
+                yield parts[0], None
+
+
+SCENARIOS = {
+    "button-storm": button_storm,
+    "encoder-sweep": encoder_sweep,
+    "garbage": garbage_stream,
+    "bouncy-buttons": bouncy_buttons,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ListenerHarness:
+    """Runs the real serial listener against FakeSerialDevices and measures it
+
+    With several devices, events are spread round-robin over them; every
+    device but the first gets a namespace (DEV2, DEV3, ...).
+    """
+
+    def __init__(self, devices, protocol="auto"):
+        self.devices = devices
+        self.device = devices[0]
+        self.sent = collections.defaultdict(collections.deque)  # Per device namespace, in send order
+        self.latencies = []
+        self.dispatched = 0
+        self.unexpected = 0
+        self.executed = 0
+        self.reconnects = []
+        self._lock = threading.Lock()
+        self._configure_gpio(protocol)
+
+    def _configure_gpio(self, protocol):
+        import gpio
+        import prefController
+        from gpio_settings import DeviceSettings
+        from input_backend import RecordingBackend
+
+        # Buttons bound to "none" so nothing is launched while benchmarking
+        self.pref_file = os.path.join(self.device.directory, "pref.json")
+        with open(self.pref_file, "w") as f:
+            json.dump({f"BUTTON_{i}": {"type": "none", "value": ""} for i in range(1, 10)}, f)
+        prefController.PREF_FILE = self.pref_file
+
+        gpio.publish_snapshot(settings=dataclasses.replace(
+            gpio.get_settings(),
+            debug_enabled=False,
+            log_level="INFO",
+            devices=tuple(DeviceSettings(name=f"sim{index + 1}", port=device.port, baudrate=9600, timeout=1,
+                                         protocol=protocol, namespace=device.namespace)
+                          for index, device in enumerate(self.devices))))
+        gpio.input_backend = RecordingBackend()
+        gpio.volume_coalescer.configure(
+            backend=gpio.create_volume_backend("keypress", gpio.input_backend), debug=False)
+        gpio.execute_action = self._execute
+        gpio.set_dispatch_observer(self._observe)
+        self.gpio = gpio
+
+    def start(self):
+        thread = threading.Thread(target=self.gpio.listen_serial_with_reload, daemon=True)
+        thread.start()
+        time.sleep(0.3)  # Let the listener connect and negotiate
+
+    def _execute(self, action):
+        with self._lock:
+            self.executed += 1
+
+    def _observe(self, line):
+        now = time.perf_counter()
+        with self._lock:
+            self.dispatched += 1
+            # Match in order per device; tokens lost to noise are skipped
+            sent = self.sent[line.rpartition(":")[0]]
+            while sent:
+                token, sent_at = sent.popleft()
+                if token == line:
+                    self.latencies.append(now - sent_at)
+                    return
+            self.unexpected += 1
+
+    def replay(self, events, rate=None, disconnect_every=0):
+        """Write events at the given rate (events per second, None = as fast as possible)"""
+        interval = 1.0 / rate if rate else 0.0
+        next_time = time.perf_counter()
+        written = 0
+        batches = [[] for _ in self.devices]
+        batch_tokens = []
+
+        def flush():
+            now = time.perf_counter()
+            with self._lock:
+                for token in batch_tokens:
+                    self.sent[token.rpartition(":")[0]].append((token, now))
+            for device, batch in zip(self.devices, batches):
+                if batch:
+                    device.write(b"".join(batch))
+                    batch.clear()
+            batch_tokens.clear()
+
+        for item, delay in events:
+            if delay:
+                flush()
+                time.sleep(delay)
+                next_time = time.perf_counter()
+            index = written % len(self.devices)
+            device = self.devices[index]
+            if isinstance(item, bytes):
+                batches[index].append(item)
+            else:
+                batches[index].append(device.encode(item))
+                batch_tokens.append(f"{device.namespace}:{item}" if device.namespace else item)
+            written += 1
+
+            if disconnect_every and written % disconnect_every == 0:
+                flush()
+                for device in self.devices:
+                    device.disconnect()
+                self._wait_listener(lambda devices: not any(d.connected for d in devices))
+                time.sleep(0.05)
+                for device in self.devices:
+                    device.connect()
+                # The port is flushed when it is opened, so hold events until the listener is back
+                replugged_at = time.perf_counter()
+                if self._wait_listener(lambda devices: all(d.connected for d in devices)):
+                    self.reconnects.append(time.perf_counter() - replugged_at)
+                next_time = time.perf_counter()
+                continue
+
+            if interval:
+                next_time += interval
+                if next_time > time.perf_counter():
+                    flush()
+                    time.sleep(max(0.0, next_time - time.perf_counter()))
+        flush()
+        return written
+
+    def _wait_listener(self, condition, timeout=5.0):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if condition(self.gpio.serial_devices):
+                return True
+            time.sleep(0.002)
+        return False
+
+    def wait_idle(self, timeout=5.0):
+        """Wait until every sent token has been dispatched (or the timeout expires)"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            with self._lock:
+                if not any(self.sent.values()):
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def report(self, elapsed, written):
+        latencies = sorted(self.latencies)
+        return {
+            "events_written": written,
+            "events_dispatched": self.dispatched,
+            "unexpected_tokens": self.unexpected,
+            "actions_executed": self.executed,
+            "elapsed_s": round(elapsed, 3),
+            "events_per_s": round(self.dispatched / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50) * 1000, 3),
+                "p95": round(percentile(latencies, 0.95) * 1000, 3),
+                "p99": round(percentile(latencies, 0.99) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3) if latencies else 0.0
+            },
+            "devices": len(self.devices),
+            "reconnect_ms": [round(seconds * 1000, 1) for seconds in self.reconnects],
+            "binary_protocol": all(device.binary_mode for device in self.devices),
+            "pipeline_latency": self.gpio.get_latency_stats()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated Arduino events into the StreamDeck serial listener")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="button-storm")
+    parser.add_argument("--replay", help="Replay a recorded event file instead of a scenario")
+    parser.add_argument("--events", type=int, default=2000, help="Number of synthetic events")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Events per second (0 = unthrottled)")
+    parser.add_argument("--protocol", choices=["auto", "text"], default="auto", help="Host protocol setting")
+    parser.add_argument("--old-sketch", action="store_true", help="Emulate a sketch without binary frame support")
+    parser.add_argument("--disconnect-every", type=int, default=0, help="Unplug and replug after every N events")
+    parser.add_argument("--devices", type=int, default=1, help="Number of fake controllers on one listener")
+    args = parser.parse_args()
+
+    devices = [FakeSerialDevice(binary_capable=not args.old_sketch, namespace=f"DEV{i + 1}" if i else None)
+               for i in range(max(1, args.devices))]
+    try:
+        harness = ListenerHarness(devices, protocol=args.protocol)
+        harness.start()
+        events = replay_file(args.replay) if args.replay else SCENARIOS[args.scenario](args.events)
+        started = time.perf_counter()
+        written = harness.replay(events, rate=args.rate or None, disconnect_every=args.disconnect_every)
+        harness.wait_idle()
+        elapsed = time.perf_counter() - started
+        print(json.dumps(harness.report(elapsed, written), indent=2))
+    finally:
+        for device in devices:
+            device.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Serial transport helpers for StreamDeck
+串口事件驱动等待（selectors）
+
+The serial thread sleeps in a selector until any connected Arduino sends
+bytes or another thread (GUI, tray, GPIO dialog) signals a reload, so both
+are handled immediately and the thread never wakes up while idle.
+
+On POSIX the serial port file descriptors are registered directly. Windows
+serial handles cannot be selected, so there each port gets a PortReader
+thread that blocks in ser.read() without a timeout and hands the bytes over
+through a second wakeup socket; cancel_read() interrupts it when the port
+is unregistered. An idle port costs no wakeups on either platform.
+"""
+
+import collections
+import selectors
+import socket
+import threading
+import serial
+from serial_protocol import StreamDecoder
+
+
+class SerialWakeup:
+    """Cross-thread wakeup for a thread blocked in a selector
+
+    Built on a socket pair because sockets are selectable on every platform.
+    """
+
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def notify(self):
+        """Wake the waiting thread (safe to call from any thread, never blocks)"""
+        try:
+            self._writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already has a pending wakeup
+
+    def drain(self):
+        """Consume pending wakeups"""
+        try:
+            while self._reader.recv(64):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def wait(self, timeout=None):
+        """Sleep until notify() is called or the timeout expires
+
+        Returns True when woken by notify().
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._reader, selectors.EVENT_READ)
+            woken = bool(selector.select(timeout))
+        if woken:
+            self.drain()
+        return woken
+
+
+class SerialDevice:
+    """One configured controller: its settings, open port and stream decoder"""
+
+    def __init__(self, name, port, baudrate, timeout=1, protocol="auto", namespace=None,
+                 vid=None, pid=None, serial_number=None):
+        self.name = name
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.protocol = protocol        # "auto" negotiates binary frames, "text" never does
+        self.namespace = namespace      # Prefix for this device's commands ("PEDAL" -> "PEDAL:BUTTON_1")
+        self.prefix = f"{namespace}:" if namespace else ""
+        self.ser = None
+        self.decoder = None
+        self.reader = None              # PortReader when the port is not selectable
+        self.binary_requests = 0
+        self.retry_at = 0.0             # perf_counter() time of the next connection attempt
+        self.failures = 0               # Consecutive failed attempts (drives the backoff)
+        self.vid = vid                  # USB identity, used to find the board again after re-plug
+        self.pid = pid
+        self.serial_number = serial_number
+
+    @property
+    def connected(self):
+        return self.ser is not None
+
+    def open(self):
+        """Open the port with a fresh decoder (raises on failure)"""
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+        self.decoder = StreamDecoder()
+        self.binary_requests = 0
+        return self.ser
+
+    def read(self):
+        """Move the received bytes into the decoder, return the byte count (raises if the port failed)"""
+        if self.reader is not None:
+            return self.reader.drain_into(self.decoder)
+        return self.decoder.read_from(self.ser)
+
+    def close(self):
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+        self.decoder = None
+
+
+class PortReader:
+    """Reads one port without a selectable handle (Windows) on its own thread
+
+    The thread blocks in ser.read() with no timeout, so it sleeps until
+    bytes arrive; everything waiting is read in one go and queued for the
+    serial thread, which is woken through ready.
+    """
+
+    def __init__(self, device, ready):
+        self.ser = device.ser
+        self.ready = ready
+        self.chunks = collections.deque()
+        self.error = None
+        self._stopped = False
+        self.ser.timeout = None
+        threading.Thread(target=self._run, name=f"serial-read-{device.port}", daemon=True).start()
+
+    @property
+    def pending(self):
+        return bool(self.chunks) or self.error is not None
+
+    def _run(self):
+        ser = self.ser
+        try:
+            while not self._stopped:
+                data = ser.read(1)  # Blocks until a byte arrives or cancel_read()
+                if not data:
+                    continue
+                waiting = ser.in_waiting
+                if waiting:
+                    data += ser.read(waiting)
+                self.chunks.append(data)
+                self.ready.notify()
+        except Exception as e:
+            if not self._stopped:
+                self.error = e  # Raised to the serial thread by drain_into
+                self.ready.notify()
+
+    def drain_into(self, decoder):
+        """Copy queued bytes into the decoder buffer, return the byte count"""
+        count = 0
+        while self.chunks:
+            data = self.chunks[0]
+            taken = decoder.append(data)
+            count += taken
+            if taken < len(data):
+                # Buffer full: the rest is taken after this batch is decoded
+                self.chunks[0] = data[taken:]
+                self.ready.notify()
+                break
+            self.chunks.popleft()
+        if not count and self.error is not None:
+            raise self.error
+        return count
+
+    def stop(self):
+        self._stopped = True
+        try:
+            self.ser.cancel_read()
+        except Exception:
+            pass
+
+
+class SerialWaiter:
+    """Waits for incoming bytes on any registered serial port or for a wakeup
+
+    One selector covers every connected device; ports that cannot be
+    selected report through a shared data wakeup instead.
+    """
+
+    def __init__(self, wakeup):
+        self.wakeup = wakeup
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(wakeup, selectors.EVENT_READ, None)
+        self.data_ready = SerialWakeup()  # Notified by PortReader threads
+        self.selector.register(self.data_ready, selectors.EVENT_READ, self.data_ready)
+        self.readers = {}  # Device -> PortReader
+
+    def register(self, device):
+        try:
+            self.selector.register(device.ser.fileno(), selectors.EVENT_READ, device)
+        except (AttributeError, OSError, ValueError):
+            # Windows serial handles are not selectable - read on a blocking thread
+            device.reader = self.readers[device] = PortReader(device, self.data_ready)
+
+    def unregister(self, device):
+        reader = self.readers.pop(device, None)
+        if reader is not None:
+            reader.stop()
+            device.reader = None
+            return
+        for key in list(self.selector.get_map().values()):
+            if key.data is device:
+                self.selector.unregister(key.fileobj)
+                return
+
+    def close(self):
+        for reader in self.readers.values():
+            reader.stop()
+        self.readers.clear()
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def wait(self, timeout=None):
+        """Block until a port has data, the wakeup fires or the timeout expires
+
+        Returns the list of readable devices (empty on timeout), or None on wakeup.
+        """
+        ready = []
+        for key, _ in self.selector.select(timeout):
+            if key.data is None:
+                self.wakeup.drain()
+                return None
+            if key.data is self.data_ready:
+                self.data_ready.drain()
+                ready.extend(device for device, reader in self.readers.items() if reader.pending)
+            else:
+                ready.append(key.data)
+        return ready
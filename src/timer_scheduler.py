@@ -0,0 +1,97 @@
+"""
+Timer scheduler for StreamDeck
+定时回调调度器（单线程 + 最小堆）
+
+Deferred work on the serial path (trailing-edge debounce, gesture
+timeouts) is scheduled here instead of starting a threading.Timer per
+event. One daemon thread sleeps until the earliest deadline in a heap and
+runs the callbacks that are due, so a thousand pending timers cost one
+thread and O(log n) per schedule/cancel.
+
+Callbacks run on the scheduler thread and must be short (queue work on the
+action pool rather than doing it inline). Deadlines are time.perf_counter()
+values.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from app_logging import get_logger
+
+log = get_logger("TIMER")
+
+
+class Timer:
+    """Handle of a scheduled callback; cancel() before it runs to drop it"""
+
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        # Lazy deletion: the heap entry stays and is skipped when it comes up
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """Runs callbacks at perf_counter() deadlines on one background thread"""
+
+    def __init__(self, name="timers"):
+        self.name = name
+        self._heap = []
+        self._sequence = itertools.count()  # Tie-breaker: equal deadlines run in scheduling order
+        self._condition = threading.Condition(threading.Lock())
+        self._thread = None
+        self._stopped = False
+
+    def call_at(self, when, callback, *args):
+        timer = Timer(when, callback, args)
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (when, next(self._sequence), timer))
+            # Only the new earliest deadline needs to wake the thread
+            if self._heap[0][2] is timer:
+                self._condition.notify()
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(time.perf_counter() + delay, callback, *args)
+
+    def pending(self):
+        """Number of timers not yet run or cancelled (for status)"""
+        with self._condition:
+            return sum(1 for _, _, timer in self._heap if not timer.cancelled)
+
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if self._heap:
+                        delay = self._heap[0][0] - time.perf_counter()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                timer = heapq.heappop(self._heap)[2]
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                log.error("Timer callback failed: %s", e)
@@ -104,6 +104,61 @@ def create_tray_icon(config_callback):
         gpio_thread.start()
         print("[TRAY] Opening GPIO settings GUI...")
     
+    def show_latency_stats():
+        """Print the serial latency report and write it next to the config"""
+        try:
+            from gpio import dump_latency_stats
+            path = dump_latency_stats()
+            if path:
+                icon.notify("Latency Stats", f"Report written to {os.path.basename(path)}")
+        except Exception as e:
+            print(f"[TRAY ERROR] Failed to dump latency stats: {e}")
+    
+    def toggle_debug(icon, item):
+        """Switch debug output on or off without touching gpio_config.json"""
+        try:
+            from gpio import set_debug_enabled, is_debug_enabled
+            set_debug_enabled(not is_debug_enabled())
+        except Exception as e:
+            print(f"[TRAY ERROR] Failed to toggle debug output: {e}")
+    
+    def debug_checked(item):
+        try:
+            from gpio import is_debug_enabled
+            return is_debug_enabled()
+        except Exception:
+            return False
+    
+
+    def profile_items():
+        """One radio item per profile, built each time the menu opens"""
+        try:
+            from gpio import get_profiles
+            names, _ = get_profiles()
+        except Exception as e:
+            print(f"[TRAY ERROR] Failed to list profiles: {e}")
+            return []
+        return [pystray.MenuItem(name, select_profile(name), checked=profile_checked(name), radio=True)
+                for name in names]
+    
+    def select_profile(name):
+        def select(icon, item):
+            try:
+                from gpio import switch_profile_by_name
+                switch_profile_by_name(name)
+            except Exception as e:
+                print(f"[TRAY ERROR] Failed to switch profile: {e}")
+        return select
+    
+    def profile_checked(name):
+        def checked(item):
+            try:
+                from gpio import get_profiles
+                return get_profiles()[1] == name
+            except Exception:
+                return False
+        return checked
+    
 
     def check_for_updates_manual():
         """Manually check for updates"""
@@ -422,6 +477,9 @@ def create_tray_icon(config_callback):
         return pystray.Menu(
         pystray.MenuItem("Button Preferences", run_preferences),
         pystray.MenuItem("GPIO Settings", open_gpio_settings),
+        pystray.MenuItem("Latency Stats", show_latency_stats),
+        pystray.MenuItem("Debug Output", toggle_debug, checked=debug_checked),
+        pystray.MenuItem("Profile", pystray.Menu(profile_items)),
             pystray.Menu.SEPARATOR,
             create_update_menu(),
         pystray.Menu.SEPARATOR,
@@ -4,7 +4,6 @@ StreamDeck - Version Management and Auto-Update System
 """
 
 import os
-import sys
 import json
 import requests
 import threading
@@ -14,6 +13,11 @@ import zipfile
 import shutil
 import subprocess
 from datetime import datetime, timedelta
+from app_logging import get_logger, DEBUG
+from config_store import store, get_app_data_dir
+
+log = get_logger("UPDATE")
+version_log = get_logger("VERSION")
 
 # Application Version - MANUALLY UPDATE THIS
 CURRENT_VERSION = "2.2.0"  # 手动更新这个版本号
@@ -31,7 +35,7 @@ def set_current_version(new_version):
     """Set the current version manually"""
     global CURRENT_VERSION
     CURRENT_VERSION = new_version
-    print(f"[VERSION] Current version set to: {CURRENT_VERSION}")
+    version_log.info("Current version set to: %s", CURRENT_VERSION)
     return CURRENT_VERSION
 
 def save_current_version(new_version):
@@ -45,9 +49,9 @@ def save_current_version(new_version):
     try:
         with open(version_file, 'w', encoding='utf-8') as f:
             f.write(new_version)
-        print(f"[VERSION] Saved current version to version.txt: {new_version}")
+        version_log.info("Saved current version to version.txt: %s", new_version)
     except Exception as e:
-        print(f"[VERSION ERROR] Failed to save version.txt: {e}")
+        version_log.error("Failed to save version.txt: %s", e)
     
     # Save to update_info.json
     update_info_file = os.path.join(app_dir, "update_info.json")
@@ -70,19 +74,9 @@ def save_current_version(new_version):
         
         with open(update_info_file, 'w', encoding='utf-8') as f:
             json.dump(update_info, f, indent=2, ensure_ascii=False)
-        print(f"[VERSION] Saved update info: {new_version}")
+        version_log.info("Saved update info: %s", new_version)
     except Exception as e:
-        print(f"[VERSION ERROR] Failed to save update_info.json: {e}")
-
-def get_app_data_dir():
-    """Get the directory where the application should store its data files"""
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        app_dir = os.path.dirname(sys.executable)
-    else:
-        # Running as script
-        app_dir = os.path.dirname(os.path.abspath(__file__))
-    return app_dir
+        version_log.error("Failed to save update_info.json: %s", e)
 
 # Update configuration file
 UPDATE_CONFIG_FILE = os.path.join(get_app_data_dir(), "update_config.json")
@@ -101,6 +95,24 @@ DEFAULT_UPDATE_CONFIG = {
     "download_path": os.path.join(get_app_data_dir(), "updates")
 }
 
+def validate_update_config(config):
+    """Raise ValueError if an update config cannot be used"""
+    if not isinstance(config, dict):
+        raise ValueError("update config must be a JSON object")
+    for key in ("auto_check", "auto_download", "auto_install", "auto_install_prompt"):
+        if not isinstance(config.get(key), bool):
+            raise ValueError(f"{key} must be true or false")
+    for key in ("install_delay", "check_interval"):
+        value = config.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"{key} must be a number of seconds")
+    if not isinstance(config.get("download_path"), str) or not config["download_path"]:
+        raise ValueError("download_path must be a non-empty string")
+
+# Missing keys are filled in from the defaults, so older files keep working
+update_config = store.register("update", UPDATE_CONFIG_FILE, defaults=DEFAULT_UPDATE_CONFIG,
+                               validate=validate_update_config, merge_defaults=True, create=True, indent=2)
+
 class UpdateManager:
     def __init__(self):
         self.config = self.load_config()
@@ -115,25 +127,12 @@ class UpdateManager:
         # Ensure download directory exists
         os.makedirs(self.config["download_path"], exist_ok=True)
         
-        print(f"[UPDATE] UpdateManager initialized - Current version: {self.current_version}")
+        log.info("UpdateManager initialized - Current version: %s", self.current_version)
         
     
     def load_config(self):
-        """Load update configuration from file"""
-        try:
-            if os.path.exists(UPDATE_CONFIG_FILE):
-                with open(UPDATE_CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # Merge with defaults to ensure all keys exist
-                    merged_config = DEFAULT_UPDATE_CONFIG.copy()
-                    merged_config.update(config)
-                    return merged_config
-            else:
-                self.save_config(DEFAULT_UPDATE_CONFIG)
-                return DEFAULT_UPDATE_CONFIG.copy()
-        except Exception as e:
-            print(f"[UPDATE ERROR] Failed to load update config: {e}")
-            return DEFAULT_UPDATE_CONFIG.copy()
+        """Load update configuration (an editable copy of the config store's)"""
+        return update_config.edit()
     
     def save_config(self, config=None):
         """Save update configuration to file"""
@@ -141,11 +140,10 @@ class UpdateManager:
             if config is None:
                 config = self.config
             
-            with open(UPDATE_CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            print(f"[UPDATE] Configuration saved to: {UPDATE_CONFIG_FILE}")
+            if update_config.save(config):
+                log.info("Configuration saved to: %s", UPDATE_CONFIG_FILE)
         except Exception as e:
-            print(f"[UPDATE ERROR] Failed to save update config: {e}")
+            log.error("Failed to save update config: %s", e)
     
     def add_update_callback(self, callback):
         """Add callback function to be called when update status changes"""
@@ -157,15 +155,16 @@ class UpdateManager:
             try:
                 callback(event_type, data)
             except Exception as e:
-                print(f"[UPDATE ERROR] Callback error: {e}")
+                log.error("Callback error: %s", e)
     
     def check_for_updates(self, manual=False):
         """Check for available updates from GitHub releases"""
         
         try:
-            print(f"[UPDATE] Checking for updates... (manual: {manual})")
-            print(f"[UPDATE] Current version: {self.current_version}")
-            print(f"[UPDATE] API URL: {GITHUB_API_URL}")
+            log.info("Checking for updates... (manual: %s)", manual)
+            if DEBUG.enabled:
+                log.debug("Current version: %s", self.current_version)
+                log.debug("API URL: %s", GITHUB_API_URL)
             
             # Make API request to GitHub
             headers = {
@@ -173,54 +172,52 @@ class UpdateManager:
                 'User-Agent': f'StreamDeck-V2/{self.current_version}'
             }
             
-            print("[UPDATE] Making API request...")
+            log.debug("Making API request...")
             response = requests.get(GITHUB_API_URL, headers=headers, timeout=15)
-            print(f"[UPDATE] API response status: {response.status_code}")
+            log.debug("API response status: %s", response.status_code)
             response.raise_for_status()
             
             release_data = response.json()
             self.latest_release_info = release_data
             self.latest_version = release_data['tag_name'].lstrip('v')
             
-            print(f"[UPDATE] Latest version from API: {self.latest_version}")
-            print(f"[UPDATE] Release published at: {release_data.get('published_at', 'Unknown')}")
+            if DEBUG.enabled:
+                log.debug("Latest version from API: %s", self.latest_version)
+                log.debug("Release published at: %s", release_data.get('published_at', 'Unknown'))
             
             # Update last check time
             self.config["last_check"] = datetime.now().isoformat()
             self.save_config()
             
             # Compare versions with detailed logging
-            print(f"[UPDATE] Comparing versions: '{self.current_version}' vs '{self.latest_version}'")
+            log.debug("Comparing versions: '%s' vs '%s'", self.current_version, self.latest_version)
             
             try:
                 current_parsed = version.parse(self.current_version)
                 latest_parsed = version.parse(self.latest_version)
                 
-                print(f"[UPDATE] Parsed current: {current_parsed} (type: {type(current_parsed)})")
-                print(f"[UPDATE] Parsed latest: {latest_parsed} (type: {type(latest_parsed)})")
-                
-                # Normalize versions for comparison
-                current_normalized = f"{current_parsed.major}.{current_parsed.minor}.{current_parsed.micro}"
-                latest_normalized = f"{latest_parsed.major}.{latest_parsed.minor}.{latest_parsed.micro}"
-                
-                print(f"[UPDATE] Normalized current: {current_normalized}")
-                print(f"[UPDATE] Normalized latest: {latest_normalized}")
+                if DEBUG.enabled:
+                    log.debug("Parsed current: %s (type: %s)", current_parsed, type(current_parsed))
+                    log.debug("Parsed latest: %s (type: %s)", latest_parsed, type(latest_parsed))
+                    # Normalized versions, for comparing by eye
+                    log.debug("Normalized current: %s.%s.%s", current_parsed.major, current_parsed.minor, current_parsed.micro)
+                    log.debug("Normalized latest: %s.%s.%s", latest_parsed.major, latest_parsed.minor, latest_parsed.micro)
                 
                 is_newer = latest_parsed > current_parsed
-                print(f"[UPDATE] Is newer version available? {is_newer}")
+                log.debug("Is newer version available? %s", is_newer)
                 
             except Exception as parse_error:
-                print(f"[UPDATE ERROR] Version parsing failed: {parse_error}")
-                print(f"[UPDATE] Raw versions - Current: '{self.current_version}', Latest: '{self.latest_version}'")
+                log.error("Version parsing failed: %s", parse_error)
+                log.debug("Raw versions - Current: '%s', Latest: '%s'", self.current_version, self.latest_version)
                 # Fallback to string comparison
                 is_newer = self.latest_version != self.current_version
-                print(f"[UPDATE] Using string comparison fallback: {is_newer}")
+                log.debug("Using string comparison fallback: %s", is_newer)
             
             if is_newer:
                 try:
-                    print(f"[UPDATE] Update available! {latest_parsed} > {current_parsed}")
+                    log.info("Update available! %s > %s", latest_parsed, current_parsed)
                 except:
-                    print(f"[UPDATE] Update available! '{self.latest_version}' > '{self.current_version}'")
+                    log.info("Update available! '%s' > '%s'", self.latest_version, self.current_version)
                 # Check if this version was ignored
                 if self.config["ignored_version"] != self.latest_version:
                     # Check if we've already processed this version
@@ -228,13 +225,14 @@ class UpdateManager:
                     
                     if last_processed_version != self.latest_version:
                         self.update_available = True
-                        print(f"[UPDATE] New version available: {self.latest_version} (current: {self.current_version})")
+                        log.info("New version available: %s (current: %s)", self.latest_version, self.current_version)
                         
                         # Check for available assets
                         assets = release_data.get('assets', [])
-                        print(f"[UPDATE] Available assets: {len(assets)}")
-                        for asset in assets:
-                            print(f"[UPDATE]   - {asset['name']} ({asset['size']} bytes)")
+                        if DEBUG.enabled:
+                            log.debug("Available assets: %s", len(assets))
+                            for asset in assets:
+                                log.debug("  - %s (%s bytes)", asset['name'], asset['size'])
                         
                         # Mark this version as processed to prevent repeated notifications
                         self.config["last_processed_version"] = self.latest_version
@@ -248,24 +246,24 @@ class UpdateManager:
                         
                         # 自动下载和安装逻辑 (只在新版本处理时执行)
                         auto_download = self.config.get("auto_download", False)
-                        print(f"[UPDATE] Auto-download setting: {auto_download}")
+                        log.debug("Auto-download setting: %s", auto_download)
                         
                         if auto_download:
-                            print("[UPDATE] Auto-download enabled, starting download...")
+                            log.info("Auto-download enabled, starting download...")
                             self.auto_download_and_install()
                         else:
-                            print("[UPDATE] Auto-download disabled, manual action required")
+                            log.info("Auto-download disabled, manual action required")
                     else:
                         # Version already processed, just set the flag but don't notify or auto-download again
                         self.update_available = True
-                        print(f"[UPDATE] Version {self.latest_version} already processed, skipping notifications and auto-download")
+                        log.info("Version %s already processed, skipping notifications and auto-download", self.latest_version)
                     
                     return True
                 else:
-                    print(f"[UPDATE] Version {self.latest_version} is ignored by user")
+                    log.info("Version %s is ignored by user", self.latest_version)
                     self.update_available = False
             else:
-                print(f"[UPDATE] No updates available (latest: {self.latest_version}, current: {self.current_version})")
+                log.info("No updates available (latest: %s, current: %s)", self.latest_version, self.current_version)
                 self.update_available = False
                 if manual:
                     self.notify_callbacks("no_update", {
@@ -277,13 +275,13 @@ class UpdateManager:
             
         except requests.RequestException as e:
             error_msg = f"Network error while checking for updates: {e}"
-            print(f"[UPDATE ERROR] {error_msg}")
+            log.error("%s", error_msg)
             if manual:
                 self.notify_callbacks("check_error", {"error": error_msg})
             return False
         except Exception as e:
             error_msg = f"Unexpected error while checking for updates: {e}"
-            print(f"[UPDATE ERROR] {error_msg}")
+            log.error("%s", error_msg)
             if manual:
                 self.notify_callbacks("check_error", {"error": error_msg})
             return False
@@ -291,11 +289,11 @@ class UpdateManager:
     def download_update(self):
         """Download the latest update"""
         if not self.update_available or not self.latest_release_info:
-            print("[UPDATE ERROR] No update available to download")
+            log.error("No update available to download")
             return False
         
         if self.downloading:
-            print("[UPDATE] Download already in progress")
+            log.info("Download already in progress")
             return False
         
         try:
@@ -321,7 +319,7 @@ class UpdateManager:
             filename = download_asset['name']
             file_path = os.path.join(self.config["download_path"], filename)
             
-            print(f"[UPDATE] Downloading {filename} from {download_url}")
+            log.info("Downloading %s from %s", filename, download_url)
             
             # Download with progress tracking
             response = requests.get(download_url, stream=True, timeout=30)
@@ -351,7 +349,7 @@ class UpdateManager:
             # Store the downloaded file path for later installation
             self.downloaded_file_path = file_path
             
-            print(f"[UPDATE] Download completed: {file_path}")
+            log.info("Download completed: %s", file_path)
             self.notify_callbacks("download_completed", {
                 "file_path": file_path,
                 "version": self.latest_version
@@ -363,7 +361,7 @@ class UpdateManager:
             self.downloading = False
             self.download_progress = 0
             error_msg = f"Failed to download update: {e}"
-            print(f"[UPDATE ERROR] {error_msg}")
+            log.error("%s", error_msg)
             self.notify_callbacks("download_error", {"error": error_msg})
             return False
     
@@ -371,7 +369,7 @@ class UpdateManager:
         """自动下载并安装更新"""
         def auto_process():
             try:
-                print("[UPDATE] Starting automatic download...")
+                log.info("Starting automatic download...")
                 
                 # 先发送通知告知用户开始自动更新
                 self.notify_callbacks("auto_update_started", {
@@ -382,16 +380,16 @@ class UpdateManager:
                 file_path = self.download_update()
                 
                 if file_path:
-                    print(f"[UPDATE] Auto-download completed: {file_path}")
+                    log.info("Auto-download completed: %s", file_path)
                     
                     # 检查是否启用自动安装
                     if self.config.get("auto_install", False):
-                        print("[UPDATE] Auto-install enabled...")
+                        log.info("Auto-install enabled...")
                         
                         # 检查是否需要用户确认提示
                         if self.config.get("auto_install_prompt", True):
                             install_delay = self.config.get("install_delay", 5)
-                            print(f"[UPDATE] Auto-install will begin in {install_delay} seconds...")
+                            log.info("Auto-install will begin in %s seconds...", install_delay)
                             
                             # 发送倒计时通知
                             self.notify_callbacks("auto_install_countdown", {
@@ -402,11 +400,11 @@ class UpdateManager:
                             
                             # 等待指定时间
                             for i in range(install_delay, 0, -1):
-                                print(f"[UPDATE] Auto-installing in {i} seconds...")
+                                log.info("Auto-installing in %s seconds...", i)
                                 time.sleep(1)
                         
                         # 开始安装
-                        print("[UPDATE] Starting automatic installation...")
+                        log.info("Starting automatic installation...")
                         self.notify_callbacks("auto_install_started", {
                             "version": self.latest_version,
                             "file_path": file_path
@@ -415,34 +413,34 @@ class UpdateManager:
                         result = self.install_update(file_path)
                         
                         if result == "restart_required":
-                            print("[UPDATE] Auto-install completed, application will restart")
+                            log.info("Auto-install completed, application will restart")
                             self.notify_callbacks("auto_install_restart", {
                                 "version": self.latest_version
                             })
                         elif result:
-                            print("[UPDATE] Auto-install completed successfully")
+                            log.info("Auto-install completed successfully")
                             self.notify_callbacks("auto_install_completed", {
                                 "version": self.latest_version
                             })
                         else:
-                            print("[UPDATE] Auto-install failed")
+                            log.info("Auto-install failed")
                             self.notify_callbacks("auto_install_failed", {
                                 "version": self.latest_version
                             })
                     else:
-                        print("[UPDATE] Auto-install disabled, download completed")
+                        log.info("Auto-install disabled, download completed")
                         self.notify_callbacks("auto_download_completed", {
                             "version": self.latest_version,
                             "file_path": file_path
                         })
                 else:
-                    print("[UPDATE] Auto-download failed")
+                    log.info("Auto-download failed")
                     self.notify_callbacks("auto_download_failed", {
                         "version": self.latest_version
                     })
                     
             except Exception as e:
-                print(f"[UPDATE ERROR] Auto-update process failed: {e}")
+                log.error("Auto-update process failed: %s", e)
                 self.notify_callbacks("auto_update_error", {
                     "error": str(e),
                     "version": self.latest_version
@@ -455,7 +453,7 @@ class UpdateManager:
     def install_update(self, update_file_path):
         """Install the downloaded update"""
         try:
-            print(f"[UPDATE] Installing update from: {update_file_path}")
+            log.info("Installing update from: %s", update_file_path)
             
             if not os.path.exists(update_file_path):
                 raise Exception("Update file not found")
@@ -467,15 +465,15 @@ class UpdateManager:
             current_dir = get_app_data_dir()
             backup_path = os.path.join(backup_dir, f"backup_{self.current_version}_{int(time.time())}")
             
-            print(f"[UPDATE] Creating backup at: {backup_path}")
+            log.info("Creating backup at: %s", backup_path)
             try:
                 shutil.copytree(current_dir, backup_path, ignore=shutil.ignore_patterns('*.log', '*.tmp', '__pycache__', 'updates'))
             except Exception as backup_error:
-                print(f"[UPDATE WARNING] Backup failed: {backup_error}")
+                log.warning("Backup failed: %s", backup_error)
             
             # Handle different file types
             if update_file_path.endswith('.zip'):
-                print("[UPDATE] Extracting update archive...")
+                log.info("Extracting update archive...")
                 with zipfile.ZipFile(update_file_path, 'r') as zip_ref:
                     extract_path = os.path.join(self.config["download_path"], "extracted")
                     os.makedirs(extract_path, exist_ok=True)
@@ -497,19 +495,19 @@ class UpdateManager:
                                     os.remove(old_exe)
                                 os.rename(dst_path, old_exe)
                             except:
-                                print(f"[UPDATE WARNING] Could not backup {file}")
+                                log.warning("Could not backup %s", file)
                         
                         # Ensure destination directory exists
                         os.makedirs(os.path.dirname(dst_path), exist_ok=True)
                         shutil.copy2(src_path, dst_path)
-                        print(f"[UPDATE] Updated: {rel_path}")
+                        log.info("Updated: %s", rel_path)
                 
                 # Clean up extracted files
                 shutil.rmtree(extract_path)
                 
             elif update_file_path.endswith('.exe'):
                 # For executable installers, we need a different approach
-                print("[UPDATE] Preparing to run installer...")
+                log.info("Preparing to run installer...")
                 
                 # Create a batch script to run the installer after the app closes
                 batch_script = os.path.join(self.config["download_path"], "update_installer.bat")
@@ -524,7 +522,7 @@ class UpdateManager:
                     f.write('timeout /t 2 /nobreak\n')
                     f.write(f'del "{batch_script}"\n')  # Clean up
                 
-                print(f"[UPDATE] Created installer script: {batch_script}")
+                log.info("Created installer script: %s", batch_script)
                 
                 # Run the batch script in background and exit the app
                 self.notify_callbacks("install_started", {
@@ -537,10 +535,10 @@ class UpdateManager:
                 subprocess.Popen([batch_script], shell=True, creationflags=subprocess.CREATE_NEW_CONSOLE)
                 
                 # Signal that the app should exit
-                print("[UPDATE] Installer will run after app exit")
+                log.info("Installer will run after app exit")
                 return "restart_required"
             
-            print("[UPDATE] Installation completed successfully")
+            log.info("Installation completed successfully")
             
             # Update the current version and save it
             self.current_version = self.latest_version
@@ -555,7 +553,7 @@ class UpdateManager:
             
         except Exception as e:
             error_msg = f"Failed to install update: {e}"
-            print(f"[UPDATE ERROR] {error_msg}")
+            log.error("%s", error_msg)
             self.notify_callbacks("install_error", {"error": error_msg})
             return False
     
@@ -567,7 +565,7 @@ class UpdateManager:
         self.config["ignored_version"] = version_to_ignore
         self.save_config()
         self.update_available = False
-        print(f"[UPDATE] Version {version_to_ignore} will be ignored")
+        log.info("Version %s will be ignored", version_to_ignore)
         self.notify_callbacks("version_ignored", {"version": version_to_ignore})
     
     def should_check_now(self):
@@ -591,29 +589,29 @@ class UpdateManager:
         def background_check():
             # Initial check after startup (delayed by 30 seconds)
             time.sleep(30)
-            print("[UPDATE] Performing initial update check...")
+            log.info("Performing initial update check...")
             try:
                 self.check_for_updates(manual=False)
             except Exception as e:
-                print(f"[UPDATE ERROR] Initial check error: {e}")
+                log.error("Initial check error: %s", e)
             
             while True:
                 try:
                     if self.should_check_now():
-                        print("[UPDATE] Time for scheduled update check...")
+                        log.info("Time for scheduled update check...")
                         self.check_for_updates(manual=False)
                     time.sleep(300)  # Check every 5 minutes whether it's time to check
                 except Exception as e:
-                    print(f"[UPDATE ERROR] Background check error: {e}")
+                    log.error("Background check error: %s", e)
                     time.sleep(600)  # Wait 10 minutes on error
         
         if self.config["auto_check"]:
             thread = threading.Thread(target=background_check, daemon=True)
             thread.start()
-            print("[UPDATE] Background update checker started")
-            print(f"[UPDATE] Will check every {self.config['check_interval']} seconds")
+            log.info("Background update checker started")
+            log.info("Will check every %s seconds", self.config['check_interval'])
         else:
-            print("[UPDATE] Auto-check disabled")
+            log.info("Auto-check disabled")
 
 # Global update manager instance
 update_manager = UpdateManager()
@@ -0,0 +1,139 @@
+"""
+Volume control for StreamDeck
+音量旋钮合并处理
+
+The encoder sends one VOLUME_n line per detent, so a fast sweep produces
+dozens of lines. Instead of pressing the volume key once per step as each
+line arrives, the serial thread only records the latest target value and a
+worker thread applies the net change: the first change is applied at once,
+and anything that arrives within the coalescing window after it is folded
+into a single adjustment.
+
+Two backends are available:
+- "keypress": taps VK_VOLUME_UP/DOWN once per step through the input
+  backend, submitted as one batch (works everywhere)
+- "endpoint": sets the Windows master volume directly in one call
+  (needs the optional pycaw package, falls back to "keypress" without it)
+"""
+
+import importlib.util
+import threading
+import time
+from input_backend import VK_VOLUME_DOWN, VK_VOLUME_UP
+from app_logging import get_logger
+
+log = get_logger("VOLUME")
+
+DEFAULT_COALESCE_MS = 30
+
+# Windows moves the master volume by 2% per volume key press
+ENDPOINT_STEP = 0.02
+
+
+class KeypressVolumeBackend:
+    """Adjusts the volume by simulating one volume key press per step"""
+
+    name = "keypress"
+
+    def __init__(self, input_backend):
+        self.input_backend = input_backend
+
+    def adjust(self, delta):
+        vk = VK_VOLUME_UP if delta > 0 else VK_VOLUME_DOWN
+        self.input_backend.tap(vk, abs(delta))
+
+
+class EndpointVolumeBackend:
+    """Adjusts the Windows master volume directly through the Core Audio API"""
+
+    name = "endpoint"
+
+    def __init__(self, step=ENDPOINT_STEP):
+        self.step = step
+        self._endpoint = None
+
+    @staticmethod
+    def is_available():
+        # Looked up without importing: pycaw pulls in comtypes and COM setup
+        return all(importlib.util.find_spec(name) is not None for name in ("pycaw", "comtypes"))
+
+    def _get_endpoint(self):
+        # COM objects are per thread, so this runs lazily on the worker thread
+        if self._endpoint is None:
+            from ctypes import cast, POINTER
+            from comtypes import CLSCTX_ALL, CoInitialize
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            CoInitialize()
+            speakers = AudioUtilities.GetSpeakers()
+            interface = speakers.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            self._endpoint = cast(interface, POINTER(IAudioEndpointVolume))
+        return self._endpoint
+
+    def adjust(self, delta):
+        endpoint = self._get_endpoint()
+        level = endpoint.GetMasterVolumeLevelScalar() + delta * self.step
+        endpoint.SetMasterVolumeLevelScalar(min(1.0, max(0.0, level)), None)
+
+
+def create_volume_backend(name, input_backend):
+    """Create the configured backend, falling back to key presses"""
+    if name == "endpoint":
+        if EndpointVolumeBackend.is_available():
+            return EndpointVolumeBackend()
+        log.warning("pycaw not installed, using keypress volume backend")
+    return KeypressVolumeBackend(input_backend)
+
+
+class VolumeCoalescer:
+    """Collapses bursts of VOLUME_n targets into one net adjustment"""
+
+    def __init__(self, backend, initial_value=0, coalesce_ms=DEFAULT_COALESCE_MS, debug=False):
+        self.backend = backend
+        self.window = coalesce_ms / 1000.0
+        self.debug = debug
+        self.applied_value = initial_value
+        self.target_value = initial_value
+        self.adjustments = 0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="volume-coalescer", daemon=True)
+        self._thread.start()
+
+    def configure(self, backend=None, coalesce_ms=None, debug=None):
+        """Apply new settings without losing the current position"""
+        with self._condition:
+            if backend is not None:
+                self.backend = backend
+            if coalesce_ms is not None:
+                self.window = coalesce_ms / 1000.0
+            if debug is not None:
+                self.debug = debug
+
+    def set_target(self, value):
+        """Record the latest knob position (called from the serial thread, never blocks)"""
+        with self._condition:
+            self.target_value = value
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self.target_value == self.applied_value:
+                    self._condition.wait()
+                target = self.target_value
+                delta = target - self.applied_value
+                self.applied_value = target
+                backend = self.backend
+                window = self.window
+                debug = self.debug
+
+            try:
+                backend.adjust(delta)
+                self.adjustments += 1
+                if debug:
+                    log.debug("Volume adjusted by %s", delta)
+            except Exception as e:
+                log.error("Failed to adjust volume: %s", e)
+
+            # Let the rest of a burst accumulate into the next single adjustment
+            if window > 0:
+                time.sleep(window)